@@ -1,372 +1,202 @@
-import customtkinter as ctk
+import time
+_STARTED = time.perf_counter()
 import os
 import sys
-import shutil
-import datetime
-import re
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Command-line mode never touches Tk, so dispatch before the GUI imports
+    from goselect.cli import main
+    sys.exit(main([a for a in sys.argv[1:] if a != "--headless"]))
+
+PROFILE = None
+if __name__ == "__main__" and "--startup-profile" in sys.argv[1:]:
+    from goselect.startup import StartupProfile
+    PROFILE = StartupProfile(_STARTED)
+    PROFILE.track_imports()
+
+# Only what the first paint needs is imported here. Dialogs, scanning, search
+# and backups are imported where they are first used.
+import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import glob
 import configparser
+import threading
+import queue
+from goselect.selectdef import SelectDef, Slot
+from goselect.history import History
+from goselect.trace import TRACE
+from goselect.game import find_select_def_from_system, find_grid_dimensions, find_char_def
+from goselect.config import LOCAL_CFG, GLOBAL_DIR, GLOBAL_CFG, read_config
 
 # Set theme
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-def parse_params_string(params_str):
-    d = {}
-    positional = []
-    if not params_str: return d, positional
-    
-    parts = params_str.split(',')
-    for p in parts:
-        p = p.strip()
-        if not p: continue
-        if '=' in p:
-            k, v = p.split('=', 1)
-            d[k.strip().lower()] = v.strip()
-        else:
-            positional.append(p)
-    return d, positional
-
-def build_params_string(kv_dict, positional_list, managed_keys=[]):
-    parts = []
-    parts.extend(positional_list)
-    for k in managed_keys:
-        if k in kv_dict and kv_dict[k]:
-            parts.append(f"{k}={kv_dict[k]}")
-    for k, v in kv_dict.items():
-        if k not in managed_keys and v:
-            parts.append(f"{k}={v}")
-    return ", ".join(parts)
-
-class StagePropertiesDialog(ctk.CTkToplevel):
-    def __init__(self, parent, stage_line, on_save):
-        super().__init__(parent)
-        self.title("Stage Properties")
-        self.geometry("500x600")
-        self.on_save = on_save
-        
-        self.params_dict, self.positional = parse_params_string(stage_line)
-        self.stage_path = self.positional[0] if self.positional else ""
-        
-        self.create_widgets()
-        self.transient(parent)
-        self.lift()
-        self.focus_force()
-        self.grab_set()
+# Select grid cell geometry (pixels)
+CELL_W = 60
+CELL_H = 30
+CELL_GAP = 2
 
-    def create_widgets(self):
-        self.main_frame = ctk.CTkScrollableFrame(self)
-        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        self.entries = {}
-        
-        # Main Stage Path
-        lbl = ctk.CTkLabel(self.main_frame, text="Stage Path")
-        lbl.pack(pady=(5,0))
-        entry_path = ctk.CTkEntry(self.main_frame, width=300)
-        entry_path.insert(0, self.stage_path)
-        entry_path.pack(pady=5)
-        self.entries["path"] = entry_path
-        
-        # Params
-        fields = [
-            ("music", "Music", "sound/music.mp3"),
-            ("final.music", "Final Round Music", "sound/final.mp3"),
-            ("victory.music", "Victory Music", "sound/win.mp3"),
-            ("round.music", "Round Music (Generic)", ""),
-            ("life.music", "Low Life Music", ""),
-            ("order", "Order", "1"),
-            ("unlock", "Unlock (Lua)", "return true")
-        ]
-        
-        for i in range(1, 4):
-            fields.insert(1+i, (f"round{i}.music", f"Round {i} Music", ""))
-
-        for key, label, example in fields:
-            lbl = ctk.CTkLabel(self.main_frame, text=label)
-            lbl.pack(pady=(5,0))
-            entry = ctk.CTkEntry(self.main_frame, width=300, placeholder_text=example)
-            entry.pack(pady=2)
-            if key in self.params_dict:
-                entry.insert(0, self.params_dict[key])
-            self.entries[key] = entry
-            
-        btn = ctk.CTkButton(self, text="Save", command=self.save)
-        btn.pack(pady=10)
+# Per-install state that is kept in memory when switching profiles
+WARM_FIELDS = ("base_path", "select_def_path", "data_dir", "chars_dir", "stages_dir", "rows", "cols",
+               "select_def", "history", "validator", "backups", "available_chars", "available_stages",
+               "char_paths", "char_search", "stage_search", "music", "grid_page", "selected_slot_index", "selection")
+NEW_PROFILE = "New profile..."
+REMOVE_PROFILE = "Remove profile..."
 
-    def save(self):
-        new_path = self.entries["path"].get().strip()
-        if not new_path:
-            messagebox.showerror("Error", "Stage path cannot be empty")
-            return
-            
-        new_positional = [new_path]
-        new_dict = self.params_dict.copy()
-        
-        keys = ["music", "final.music", "victory.music", "life.music", "order", "unlock"]
-        for i in range(1,4): keys.append(f"round{i}.music")
-        
-        for k in keys:
-            if k in self.entries:
-                val = self.entries[k].get().strip()
-                if val: new_dict[k] = val
-                elif k in new_dict: del new_dict[k]
-                
-        result = build_params_string(new_dict, new_positional, keys)
-        self.on_save(result)
-        self.destroy()
+def new_dirty():
+    """What the next render pass has to redraw."""
+    return {"grid": False, "visible": False, "slots": set(), "page": False, "current": False,
+            "stages": False, "stage_rows": set()}
+
+def content_change(chars_dir, char_info, top, added, removed):
+    """Turn a ContentIndex diff into the ("chars"|"stages", added, removed) form the sidebars take.
+
+    Reads [Info] of new characters, so it runs off the Tk thread.
+    """
+    from goselect.content import char_entry, stage_entry
+    if top == chars_dir:
+        added = [(char_entry(d, f), os.path.join(top, d, f)) for d, f in added]
+        removed = [(char_entry(d, f), os.path.join(top, d, f)) for d, f in removed]
+        for _, path in added: char_info.refresh_one(path)
+        return "chars", added, removed
+    return "stages", [stage_entry(d, f) for d, f in added], [stage_entry(d, f) for d, f in removed]
+
+def message_lines(lines, limit=12):
+    return "\n".join(lines[:limit]) + (f"\n... and {len(lines) - limit} more" if len(lines) > limit else "")
 
-class CharPropertiesDialog(ctk.CTkToplevel):
-    def __init__(self, parent, char_name, full_path, current_params, on_save):
-        super().__init__(parent)
-        self.title(f"Properties: {char_name}")
-        self.geometry("650x700")
-        self.full_path = full_path
-        self.on_save = on_save
+def char_keys(name, path, info):
+    """Search keys for a character: folder, def name and the [Info] names."""
+    return (name, os.path.splitext(os.path.basename(path))[0], info.get("displayname"), info.get("name"))
+
+def stage_keys(stage):
+    path, display = stage
+    return (display, path.split("/", 1)[-1])
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that keeps a small pool of row buttons and rebinds them to
+    the visible slice of `items`, so it stays fast with any number of entries."""
+    def __init__(self, parent, label_text="", command=None, text_of=str, row_height=30, height=200, on_search=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.command = command
+        self.text_of = text_of
+        self.row_height = row_height
+        self.items = []
+        self.offset = 0
+        self.pool = []
+        self.bound = []
+        self.on_search = on_search
+        self.search_job = None
         
-        self.params_dict, self.stages_list = parse_params_string(current_params)
-        self.char_info = self.parse_char_def()
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        if label_text:
+            ctk.CTkLabel(self, text=label_text, fg_color=("gray78", "gray23"), corner_radius=6).grid(row=0, column=0, columnspan=2, sticky="ew", padx=3, pady=(3,0))
+        self.search_entry = None
+        if on_search:
+            self.search_entry = ctk.CTkEntry(self, placeholder_text="Search...")
+            self.search_entry.grid(row=1, column=0, columnspan=2, sticky="ew", padx=3, pady=(3,0))
+            self.search_entry.bind("<KeyRelease>", lambda e: self.schedule_search())
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", height=height)
+        self.viewport.grid(row=2, column=0, sticky="nsew", padx=(3,0), pady=3)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=2, column=1, sticky="ns", pady=3)
         
-        self.create_widgets()
-        self.transient(parent)
-        self.lift()
-        self.focus_force()
-        self.grab_set()
-
-    def parse_char_def(self):
-        info = {}
-        if not self.full_path or not os.path.exists(self.full_path):
-            info["Status"] = "Definition file not found"
-            return info
-        if os.path.isdir(self.full_path):
-             info["Status"] = "Error: Path is a directory"
-             return info
-        try:
-            with open(self.full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                in_info = False
-                for line in f:
-                    line = line.strip()
-                    if line.lower().startswith('[info]'):
-                        in_info = True
-                        continue
-                    if line.startswith('[') and in_info: break
-                    if in_info and '=' in line:
-                        k, v = line.split('=', 1)
-                        info[k.strip().lower()] = v.strip().strip('"')
-        except Exception as e:
-            info["Error"] = str(e)
-        return info
-
-    def create_widgets(self):
-        self.tabview = ctk.CTkTabview(self)
-        self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
-        self.tab_config = self.tabview.add("Configure")
-        self.tab_details = self.tabview.add("Details")
-        self.tab_music = self.tabview.add("Music")
-        
-        # Details
-        details_frame = ctk.CTkScrollableFrame(self.tab_details)
-        details_frame.pack(fill="both", expand=True)
-        r=0
-        for k,v in self.char_info.items():
-            ctk.CTkLabel(details_frame, text=k.capitalize(), font=("Arial",12,"bold")).grid(row=r,column=0,sticky="w",padx=10)
-            ctk.CTkLabel(details_frame, text=v).grid(row=r,column=1,sticky="w",padx=10)
-            r+=1
-            
-        # Configure
-        config_frame = ctk.CTkScrollableFrame(self.tab_config)
-        config_frame.pack(fill="both", expand=True)
-        self.entries = {}
-        
-        r=0
-        
-        # Standard Params
-        ctk.CTkLabel(config_frame, text="--- Standard Params ---", text_color="gray").grid(row=r,column=0,columnspan=2,pady=(5,5))
-        r+=1
-        
-        fields_std = [
-            ("stage", "Stage Path", "stages/kfm.def"),
-            ("music", "Music Path", "sound/bgm.mp3"),
-            ("order", "Order", "1"),
-            ("ai", "AI Level", "1-8"),
-            ("vsscreen", "VS Screen (0/1)", "1"),
-            ("victoryscreen", "Victory Screen (0/1)", "1"),
-            ("rounds", "Rounds", "2"),
-            ("time", "Time (Seconds)", "-1"),
-            ("includestage", "Include Stage (0/1/-1)", "1")
-        ]
-        
-        for key, label, example in fields_std:
-            ctk.CTkLabel(config_frame, text=label).grid(row=r, column=0, sticky="w", padx=10, pady=2)
-            if key == "stage":
-                entry = ctk.CTkEntry(config_frame, width=250, placeholder_text=example)
-                if self.stages_list: entry.insert(0, ", ".join(self.stages_list))
-                entry.grid(row=r, column=1, sticky="w", padx=10)
-                self.entries[key] = entry
-            else:
-                entry = ctk.CTkEntry(config_frame, width=250, placeholder_text=example)
-                if key in self.params_dict: entry.insert(0, self.params_dict[key])
-                entry.grid(row=r, column=1, sticky="w", padx=10)
-                self.entries[key] = entry
-            r+=1
-
-        # Ikemen Params
-        ctk.CTkLabel(config_frame, text="--- Ikemen Params ---", text_color="gray").grid(row=r,column=0,columnspan=2,pady=(10,5))
-        r+=1
-        
-        fields_ikemen = [
-            ("single", "Single Mode (0/1)", "0"),
-            ("bonus", "Bonus Game (0/1)", "0"),
-            ("exclude", "Exclude (0/1)", "0"),
-            ("hidden", "Hidden (0/1/2/3)", "0"),
-            ("ordersurvival", "Survival Order", "1"),
-            ("arcadepath", "Arcade Path (Lua)", "data/arcade.lua"),
-            ("ratiopath", "Ratio Path (Lua)", "data/ratio.lua"),
-            ("unlock", "Unlock (Lua)", "true"),
-        ]
-        
-        for key, label, example in fields_ikemen:
-            ctk.CTkLabel(config_frame, text=label).grid(row=r, column=0, sticky="w", padx=10, pady=2)
-            
-            if key == "exclude":
-                var = ctk.BooleanVar(value=False)
-                if key in self.params_dict and self.params_dict[key] == "1": var.set(True)
-                entry = ctk.CTkCheckBox(config_frame, text="Exclude", variable=var)
-                entry.grid(row=r, column=1, sticky="w", padx=10)
-                self.entries[key] = entry
-            else:
-                entry = ctk.CTkEntry(config_frame, width=250, placeholder_text=example)
-                if key in self.params_dict: entry.insert(0, self.params_dict[key])
-                entry.grid(row=r, column=1, sticky="w", padx=10)
-                self.entries[key] = entry
-            r+=1
-
-        # Slot Params
-        ctk.CTkLabel(config_frame, text="--- Slot Params (Inside 'slot={}') ---", text_color="gray").grid(row=r,column=0,columnspan=2,pady=(10,5))
-        r+=1
-        fields_slot = [
-            ("select", "Select Command", "/s+a"),
-            ("next", "Next Command", "w"),
-            ("previous", "Previous Command", "d")
-        ]
-        for key, label, example in fields_slot:
-            ctk.CTkLabel(config_frame, text=label).grid(row=r, column=0, sticky="w", padx=10, pady=2)
-            entry = ctk.CTkEntry(config_frame, width=250, placeholder_text=example)
-            if key in self.params_dict: entry.insert(0, self.params_dict[key])
-            entry.grid(row=r, column=1, sticky="w", padx=10)
-            self.entries[key] = entry
-            r+=1
-
-        # Music Tab
-        music_frame = ctk.CTkScrollableFrame(self.tab_music)
-        music_frame.pack(fill="both", expand=True)
-        r=0
-        music_fields = [
-            ("final.music", "Final Round Music"),
-            ("victory.music", "Victory Music"),
-            ("life.music", "Low Life Music"),
-            ("round.music", "Round Music (Generic)")
-        ]
-        for i in range(1, 10):
-            music_fields.insert(i-1, (f"round{i}.music", f"Round {i} Music"))
-        
-        for key, label in music_fields:
-            ctk.CTkLabel(music_frame, text=label).grid(row=r,column=0,sticky="w",padx=10,pady=5)
-            entry = ctk.CTkEntry(music_frame, width=300)
-            if key in self.params_dict: entry.insert(0, self.params_dict[key])
-            entry.grid(row=r,column=1,sticky="w",padx=10)
-            self.entries[key] = entry
-            r+=1
-
-        ctk.CTkButton(self, text="OK", command=self.save).pack(pady=10)
-
-    def save(self):
-        new_dict = self.params_dict.copy()
-        
-        managed = ["music", "order", "ai", "rounds", "time", "vsscreen", "victoryscreen", "exclude", 
-                   "single", "bonus", "includestage",
-                   "hidden", "unlock", "arcadepath", "ratiopath", "ordersurvival",
-                   "select", "next", "previous",
-                   "final.music", "victory.music", "life.music", "round.music"]
-        for i in range(1,10): managed.append(f"round{i}.music")
-        
-        if self.entries["exclude"].get():
-            new_dict["exclude"] = "1"
-        elif "exclude" in new_dict:
-            del new_dict["exclude"]
-            
-        for k in managed:
-            if k == "exclude": continue
-            if k in self.entries:
-                val = self.entries[k].get().strip()
-                if val: new_dict[k] = val
-                elif k in new_dict: del new_dict[k]
-            
-        new_stages = []
-        stage_val = self.entries["stage"].get().strip()
-        if stage_val: new_stages.append(stage_val)
+        self.viewport.bind("<Configure>", lambda e: self.render())
+        self.bind_wheel(self.viewport)
         
-        result = build_params_string(new_dict, new_stages, managed)
-        self.on_save(result)
-        self.destroy()
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll_units(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll_units(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll_units(1))
 
-class OptionsDialog(ctk.CTkToplevel):
-    def __init__(self, parent, current_config, on_save):
-        super().__init__(parent)
-        self.title("Options")
-        self.geometry("400x300")
-        self.config = current_config
-        self.on_save = on_save
-        self.create_widgets()
-        self.transient(parent)
-        self.lift()
-        self.focus_force()
-        self.grab_set()
-        
-    def create_widgets(self):
-        self.tabview = ctk.CTkTabview(self)
-        self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
-        self.tab_adv = self.tabview.add("Advanced")
-        
-        # Options File
-        adv_frame = ctk.CTkFrame(self.tab_adv, fg_color="transparent")
-        adv_frame.pack(fill="x", padx=5, pady=5)
-        ctk.CTkLabel(adv_frame, text="Options file", font=("Arial", 12, "bold")).pack(anchor="w")
-        
-        val_local = self.config.getboolean("Options", "UseLocal", fallback=True)
-        self.var_local = ctk.BooleanVar(value=val_local)
-        ctk.CTkCheckBox(adv_frame, text="Use local options file", variable=self.var_local).pack(anchor="w", padx=10, pady=5)
-        
-        # Backups
-        ctk.CTkLabel(adv_frame, text="Backups", font=("Arial", 12, "bold")).pack(anchor="w", pady=(10,0))
-        val_bk = self.config.getboolean("Options", "Backup", fallback=True)
-        self.var_backup = ctk.BooleanVar(value=val_bk)
-        ctk.CTkCheckBox(adv_frame, text="Make a backup before every save", variable=self.var_backup).pack(anchor="w", padx=10, pady=5)
-
-        ctk.CTkButton(self, text="OK", command=self.save).pack(pady=10)
-        
-    def save(self):
-        if "Options" not in self.config: self.config["Options"] = {}
-        self.config["Options"]["UseLocal"] = str(self.var_local.get())
-        self.config["Options"]["Backup"] = str(self.var_backup.get())
-        self.on_save(self.config)
-        self.destroy()
+    def query(self):
+        return self.search_entry.get().strip() if self.search_entry else ""
+
+    def schedule_search(self):
+        # Debounce: only search once typing pauses
+        if self.search_job: self.after_cancel(self.search_job)
+        self.search_job = self.after(120, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.on_search(self.query())
+
+    def set_items(self, items):
+        self.items = items
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-render after `items` was changed in place, keeping the scroll position."""
+        self.bound = [None] * len(self.pool)
+        self.render()
+
+    def max_offset(self):
+        return max(0, len(self.items) * self.row_height - self.viewport.winfo_height())
+
+    def scroll_units(self, n):
+        self.offset += n * self.row_height * 3
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.offset = float(args[1]) * len(self.items) * self.row_height
+        elif args[0] == "scroll":
+            step = self.viewport.winfo_height() if args[2] == "pages" else self.row_height
+            self.offset += int(args[1]) * step
+        self.render()
+
+    def on_row_click(self, i):
+        if self.command and self.bound[i] is not None: self.command(self.bound[i])
+
+    def render(self):
+        h = self.viewport.winfo_height()
+        needed = h // self.row_height + 2
+        while len(self.pool) < needed:
+            i = len(self.pool)
+            btn = ctk.CTkButton(self.viewport, text="", anchor="w", height=self.row_height - 2, command=lambda i=i: self.on_row_click(i))
+            self.bind_wheel(btn)
+            self.pool.append(btn)
+            self.bound.append(None)
+            
+        self.offset = max(0, min(self.offset, self.max_offset()))
+        first, shift = divmod(int(self.offset), self.row_height)
+        for i, btn in enumerate(self.pool):
+            idx = first + i
+            if i < needed and idx < len(self.items):
+                item = self.items[idx]
+                # Only touch the widget when the row now shows a different item
+                if self.bound[i] is not item:
+                    btn.configure(text=self.text_of(item))
+                    self.bound[i] = item
+                btn.place(x=0, y=i * self.row_height - shift, relwidth=1.0)
+            elif self.bound[i] is not None:
+                btn.place_forget()
+                self.bound[i] = None
+                
+        total = len(self.items) * self.row_height
+        if total <= h: self.scrollbar.set(0.0, 1.0)
+        else: self.scrollbar.set(self.offset / total, (self.offset + h) / total)
 
 class GOSelect(ctk.CTk):
-    def __init__(self, base_path=None):
+    def __init__(self, base_path=None, profile=None):
+        self.profile = profile
+        self.mark("imports")
         super().__init__()
         self.title("GO-Select")
         self.geometry("1400x800") 
         
         self.base_path = None
+        self.select_def_path = None
+        self.profile_name = None
+        self.warm = None
 
         # Config Init
         self.config = configparser.ConfigParser()
-        self.local_cfg = os.path.join(os.path.dirname(os.path.abspath(__file__)), "go_select.ini")
-        self.global_dir = os.path.join(os.getenv('APPDATA'), "GO-Select") if os.getenv('APPDATA') else os.path.expanduser("~/.config/GO-Select")
-        self.global_cfg = os.path.join(self.global_dir, "go_select.ini")
+        self.local_cfg = LOCAL_CFG
+        self.global_dir = GLOBAL_DIR
+        self.global_cfg = GLOBAL_CFG
         
         self.load_config()
         if base_path: self.base_path = base_path
@@ -376,48 +206,93 @@ class GOSelect(ctk.CTk):
         self.cols = 10
         self.available_chars = []
         self.available_stages = [] 
-        self.slots = []
-        self.extra_stages = [] 
-        self.sections = {"pre":[], "chars":[], "mid":[], "stages":[], "post":[]}
+        self.select_def = SelectDef()
+        self.history = History(self.select_def)
+        self.extra_stage_labels = []
+        self.validator = None
+        self.backups = None
         self.selected_slot_index = None
+        self.selection = set()
+        self.drag_anchor = None
+        self.dirty = new_dirty()
+        self.render_after = None
+        self.dialogs = {}
+        self.content_index = None
+        self.char_info = None
+        self.char_paths = {}
+        self.char_search = None
+        self.stage_search = None
+        self.music = None
+        self.scan_queue = None
+        self.scan_cancel = None
+        self.watcher = None
+        self.watch_queue = None
+        self.import_queue = None
+        self.import_cancel = None
+        self.import_done = self.import_total = 0
+        self.thumb_loader = None
+        self.thumbs = None
+        self.thumb_queue = None
+        self.thumb_polling = False
+        self.log_queue = None
+        self.grid_page = 0
+        self.grid_cells = {}
+        self.grid_origin = (0, 0)
+        self.side_panels_built = False
 
         self.grid_columnconfigure(0, weight=1) 
         self.grid_columnconfigure(1, weight=3) 
         self.grid_columnconfigure(2, weight=1) 
         self.grid_rowconfigure(0, weight=1)
 
-        self.update_paths()
+        self.update_paths(self.select_def_path if not base_path else None)
+        self.title(f"GO-Select - {self.profile_name}")
         self.create_widgets()
+        self.watch_log()
+        self.mark("main window built")
         
         if not os.path.exists(self.select_def_path):
              self.ask_system_def()
         else:
             self.find_grid_dimensions()
             self.load_data()
+        
+        # Paint the grid before building the sidebars; they fill in right after
+        self.update()
+        self.mark("first paint")
+        self.create_side_panels()
+        self.mark("side panels built")
+        if self.profile: self.after_idle(lambda: self.profile.report())
+
+    def mark(self, label):
+        if self.profile: self.profile.mark(label)
+
+    # The roster itself lives on the headless SelectDef model
+    @property
+    def slots(self): return self.select_def.slots
+
+    @property
+    def extra_stages(self): return self.select_def.extra_stages
+
 
-    def update_paths(self):
+    def update_paths(self, select_def=None):
         self.chars_dir = os.path.join(self.base_path, "chars")
         self.stages_dir = os.path.join(self.base_path, "stages")
         self.data_dir = os.path.join(self.base_path, "data")
         self.select_def_path = os.path.join(self.data_dir, "select.def")
+        if select_def:
+            self.select_def_path = select_def
+            self.data_dir = os.path.dirname(select_def)
 
     def load_config(self):
-        if os.path.exists(self.local_cfg):
-            self.config.read(self.local_cfg)
-        elif os.path.exists(self.global_cfg):
-            self.config.read(self.global_cfg)
-            
-        if "Paths" in self.config and "MugenRoot" in self.config["Paths"]:
-            val = self.config["Paths"]["MugenRoot"]
-            if val and os.path.exists(val):
-                self.base_path = val
-        
-        # Also restore select_def_path if saved
-        if "Paths" in self.config and "SelectDef" in self.config["Paths"]:
-            val = self.config["Paths"]["SelectDef"]
-            if val and os.path.exists(val):
-                self.select_def_path = val
-                self.data_dir = os.path.dirname(val)
+        from goselect.profiles import active_profile, get_profile
+        read_config(self.config)
+        
+        # The active profile's paths; an ini without profiles becomes the "Default" one
+        self.profile_name = active_profile(self.config)
+        root, select_def = get_profile(self.config, self.profile_name)
+        if root and os.path.exists(root): self.base_path = root
+        if select_def and os.path.exists(select_def): self.select_def_path = select_def
 
     def save_config(self):
         use_local = self.config.getboolean("Options", "UseLocal", fallback=True)
@@ -433,43 +308,15 @@ class GOSelect(ctk.CTk):
         if self.base_path: self.config["Paths"]["MugenRoot"] = self.base_path
         if hasattr(self, 'select_def_path') and self.select_def_path:
             self.config["Paths"]["SelectDef"] = self.select_def_path
+        if self.profile_name:
+            from goselect.profiles import set_profile
+            set_profile(self.config, self.profile_name, self.base_path, self.select_def_path)
+            self.config["Paths"]["Profile"] = self.profile_name
         
         try:
             with open(target, 'w') as f: self.config.write(f)
         except Exception as e: messagebox.showerror("Config Error", str(e))
 
-    def find_select_def_from_system(self, system_def_path):
-        """Parse system.def to find the actual select.def path."""
-        system_dir = os.path.dirname(system_def_path)
-        select_path = None
-        
-        try:
-            with open(system_def_path, 'r', encoding='utf-8', errors='ignore') as f:
-                in_files = False
-                for line in f:
-                    stripped = line.strip()
-                    # Check for [Files] section
-                    if stripped.lower().startswith('[files]'):
-                        in_files = True
-                        continue
-                    if stripped.startswith('[') and in_files:
-                        break
-                    if in_files and '=' in stripped:
-                        # Remove comments
-                        if ';' in stripped:
-                            stripped = stripped.split(';')[0].strip()
-                        key, value = stripped.split('=', 1)
-                        key = key.strip().lower()
-                        value = value.strip().strip('"')
-                        if key == 'select':
-                            # Path is relative to game root, not system.def location
-                            select_path = value
-                            break
-        except Exception as e:
-            print(f"Error parsing system.def: {e}")
-        
-        return select_path
-
     def ask_system_def(self):
         msg = "Please locate the 'system.def' file for your Mugen/Ikemen game.\nThis is usually in the 'data' folder."
         messagebox.showinfo("Setup", msg)
@@ -480,7 +327,7 @@ class GOSelect(ctk.CTk):
             self.base_path = base
             
             # Try to find select.def path from system.def
-            select_rel_path = self.find_select_def_from_system(path)
+            select_rel_path = find_select_def_from_system(path)
             
             if select_rel_path:
                 # Path in system.def is relative to game root
@@ -517,39 +364,17 @@ class GOSelect(ctk.CTk):
                  sys.exit()
 
     def find_grid_dimensions(self):
-        cfg_path = os.path.join(self.data_dir, "mugen.cfg")
-        motif_path = os.path.join(self.data_dir, "system.def")
-        if os.path.exists(cfg_path):
-            try:
-                with open(cfg_path,'r',encoding='utf-8',errors='ignore') as f:
-                    for l in f:
-                        if l.strip().lower().startswith("motif"):
-                            p = l.split("=",1)[1].strip()
-                            if os.path.exists(os.path.join(self.base_path,p)): motif_path = os.path.join(self.base_path,p)
-            except: pass
-        if os.path.exists(motif_path):
-            try:
-                with open(motif_path,'r',encoding='utf-8',errors='ignore') as f:
-                    reading=False
-                    for l in f:
-                        l=l.strip()
-                        if l.lower().startswith("[select info]"): reading=True; continue
-                        if l.startswith("[") and reading: break
-                        if reading:
-                            if l.lower().startswith("rows"): self.rows = int(l.split("=")[1].split(",")[0].strip())
-                            if l.lower().startswith("columns"): self.cols = int(l.split("=")[1].split(",")[0].strip())
-            except: pass
+        self.rows, self.cols = find_grid_dimensions(self.base_path, self.data_dir, self.rows, self.cols)
 
     def create_widgets(self):
-        # --- Left: Chars ---
+        # Side panel frames hold their place in the layout; their contents come later
         self.sidebar = ctk.CTkFrame(self, corner_radius=0)
         self.sidebar.grid(row=0, column=0, sticky="nsew")
-        self.sidebar.grid_rowconfigure(2, weight=1)
-        ctk.CTkLabel(self.sidebar, text="Characters", font=("Arial",16,"bold")).grid(row=0,column=0,pady=10)
-        ctk.CTkButton(self.sidebar, text="Rescan", command=self.scan_content).grid(row=1,column=0,pady=5)
-        self.char_list_frame = ctk.CTkScrollableFrame(self.sidebar, label_text="Available")
-        self.char_list_frame.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
+        self.stage_sidebar = ctk.CTkFrame(self, corner_radius=0)
+        self.stage_sidebar.grid(row=0, column=2, sticky="nsew")
+        self.create_grid_area()
 
+    def create_grid_area(self):
         # --- Center: Grid ---
         self.main_area = ctk.CTkFrame(self, corner_radius=0)
         self.main_area.grid(row=0, column=1, sticky="nsew")
@@ -560,9 +385,25 @@ class GOSelect(ctk.CTk):
         self.toolbar.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
         ctk.CTkButton(self.toolbar, text="Options", command=self.open_options, width=80).pack(side="right", padx=5)
         ctk.CTkButton(self.toolbar, text="Save select.def", command=self.save_select_def, fg_color="green").pack(side="right", padx=5)
+        ctk.CTkButton(self.toolbar, text="Validate", command=self.validate_references, width=80).pack(side="right", padx=5)
+        ctk.CTkButton(self.toolbar, text="History", command=self.open_history, width=80).pack(side="right", padx=5)
+        self.profile_menu = ctk.CTkOptionMenu(self.toolbar, values=[], command=self.on_profile_menu, width=160)
+        self.profile_menu.pack(side="right", padx=5)
+        self.profile_labels = {}
+        self.refresh_profile_menu()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.param_entry = ctk.CTkEntry(self.toolbar, placeholder_text="Quick Params", width=250)
         self.param_entry.pack(side="left", padx=5)
         ctk.CTkButton(self.toolbar, text="Update", command=self.update_current_slot_params, width=60).pack(side="left")
+        ctk.CTkButton(self.toolbar, text="↶", command=self.undo, width=30).pack(side="left", padx=(15,2))
+        ctk.CTkButton(self.toolbar, text="↷", command=self.redo, width=30).pack(side="left", padx=2)
+        self.bind("<Control-z>", lambda e: self.roster_shortcut(self.undo))
+        self.bind("<Control-y>", lambda e: self.roster_shortcut(self.redo))
+        self.bind("<Control-Z>", lambda e: self.roster_shortcut(self.redo))
+        ctk.CTkButton(self.toolbar, text="◀", command=lambda: self.set_grid_page(self.grid_page - 1), width=30).pack(side="left", padx=(15,2))
+        self.page_label = ctk.CTkLabel(self.toolbar, text="Page 1/1", width=80)
+        self.page_label.pack(side="left")
+        ctk.CTkButton(self.toolbar, text="▶", command=lambda: self.set_grid_page(self.grid_page + 1), width=30).pack(side="left", padx=2)
 
         self.grid_container = ctk.CTkFrame(self.main_area, corner_radius=0, fg_color="transparent")
         self.grid_container.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
@@ -572,37 +413,60 @@ class GOSelect(ctk.CTk):
         self.grid_canvas = tk.Canvas(self.grid_container, highlightthickness=0, bg="#2B2B2B")
         self.grid_canvas.grid(row=0, column=0, sticky="nsew")
         
-        self.v_scroll = ctk.CTkScrollbar(self.grid_container, orientation="vertical", command=self.grid_canvas.yview)
+        self.v_scroll = ctk.CTkScrollbar(self.grid_container, orientation="vertical", command=self.grid_yview)
         self.v_scroll.grid(row=0, column=1, sticky="ns")
-        self.h_scroll = ctk.CTkScrollbar(self.grid_container, orientation="horizontal", command=self.grid_canvas.xview)
+        self.h_scroll = ctk.CTkScrollbar(self.grid_container, orientation="horizontal", command=self.grid_xview)
         self.h_scroll.grid(row=1, column=0, sticky="ew")
         
-        self.grid_canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
-        
-        self.grid_frame = ctk.CTkFrame(self.grid_canvas, fg_color="#2B2B2B")
-        self.grid_window_id = self.grid_canvas.create_window((0, 0), window=self.grid_frame, anchor="nw")
-        
-        def _update_layout(e):
-            self.grid_canvas.configure(scrollregion=self.grid_canvas.bbox("all"))
-            # Center logic
-            cw = self.grid_canvas.winfo_width()
-            ch = self.grid_canvas.winfo_height()
-            fw = self.grid_frame.winfo_reqwidth()
-            fh = self.grid_frame.winfo_reqheight()
-            x, y = 0, 0
-            if fw < cw: x = (cw - fw) // 2
-            if fh < ch: y = (ch - fh) // 2
-            self.grid_canvas.coords(self.grid_window_id, x, y)
-            
-        self.grid_frame.bind("<Configure>", _update_layout)
-        self.grid_canvas.bind("<Configure>", _update_layout)
+        self.grid_canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set,
+                                   xscrollincrement=CELL_W + CELL_GAP, yscrollincrement=CELL_H + CELL_GAP)
+        
+        # Cells are drawn straight onto the canvas; only the visible ones exist as items
+        self.grid_canvas.bind("<Configure>", lambda e: self.layout_grid())
+        self.grid_canvas.bind("<Button-1>", self.on_grid_click)
+        self.grid_canvas.bind("<B1-Motion>", self.on_grid_drag)
+        self.grid_canvas.bind("<Control-Button-1>", self.on_grid_ctrl_click)
+        self.grid_canvas.bind("<Shift-Button-1>", self.on_grid_shift_click)
+        self.bind("<Escape>", lambda e: self.set_selection({self.selected_slot_index} - {None}))
+        self.grid_canvas.bind("<Button-3>", self.on_grid_right_click)
+        self.grid_canvas.bind("<MouseWheel>", self.on_grid_wheel)
+        self.grid_canvas.bind("<Shift-MouseWheel>", lambda e: self.on_grid_wheel(e, horizontal=True))
+        self.grid_canvas.bind("<Button-4>", lambda e: self.on_grid_wheel(e, delta=1))
+        self.grid_canvas.bind("<Button-5>", lambda e: self.on_grid_wheel(e, delta=-1))
 
         self.status_bar = ctk.CTkLabel(self.main_area, text="Ready", anchor="w")
         self.status_bar.grid(row=2, column=0, sticky="ew", padx=5)
+        # Timing overlay (F12): the cost of the last traced operation, on the right of the status bar
+        self.trace_label = ctk.CTkLabel(self.main_area, text="", anchor="e", text_color="gray60")
+        self.trace_overlay = False
+        self.trace_after = None
+        self.bind("<F12>", lambda e: self.toggle_trace_overlay())
+        if self.config.getboolean("Options", "TraceOverlay", fallback=False): self.toggle_trace_overlay()
+
+    def create_side_panels(self):
+        # --- Left: Chars ---
+        self.sidebar.grid_rowconfigure(2, weight=1)
+        ctk.CTkLabel(self.sidebar, text="Characters", font=("Arial",16,"bold")).grid(row=0,column=0,pady=10)
+        char_bar = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        char_bar.grid(row=1, column=0, pady=5)
+        ctk.CTkButton(char_bar, text="Rescan", command=self.scan_content, width=80).pack(side="left", padx=2)
+        ctk.CTkButton(char_bar, text="Import...", command=self.import_packs, width=80).pack(side="left", padx=2)
+        self.char_sort_menu = ctk.CTkOptionMenu(char_bar, values=["Folder", "Name", "Author"], width=90, command=lambda v: self.sort_chars())
+        self.char_sort_menu.pack(side="left", padx=2)
+        self.char_list_frame = VirtualList(self.sidebar, label_text="Available", command=self.assign_char_to_slot, text_of=self.char_label,
+                                           on_search=lambda q: self.update_char_list())
+        self.char_list_frame.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
+        
+        # Scan/import progress, only shown while one is running
+        self.scan_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        self.scan_frame.grid_columnconfigure(0, weight=1)
+        self.scan_label = ctk.CTkLabel(self.scan_frame, text="", anchor="w")
+        self.scan_label.grid(row=0, column=0, sticky="ew")
+        ctk.CTkButton(self.scan_frame, text="Cancel", width=60, command=lambda: self.cancel_import() if self.import_queue else self.cancel_scan()).grid(row=0, column=1, padx=(5,0))
+        self.scan_progress = ctk.CTkProgressBar(self.scan_frame, mode="indeterminate")
+        self.scan_progress.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(2,0))
 
         # --- Right: Stages ---
-        self.stage_sidebar = ctk.CTkFrame(self, corner_radius=0)
-        self.stage_sidebar.grid(row=0, column=2, sticky="nsew")
         self.stage_sidebar.grid_rowconfigure(2, weight=1)
         self.stage_sidebar.grid_rowconfigure(4, weight=1)
         
@@ -611,7 +475,9 @@ class GOSelect(ctk.CTk):
         # Add a Rescan button to align with Chars column
         ctk.CTkButton(self.stage_sidebar, text="Rescan", command=self.scan_content).grid(row=1,column=0,pady=5)
         
-        self.scanned_stage_frame = ctk.CTkScrollableFrame(self.stage_sidebar, label_text="Available Stages", height=200)
+        self.scanned_stage_frame = VirtualList(self.stage_sidebar, label_text="Available Stages", height=200,
+                                               command=lambda st: self.preview_stage_add(st[0]), text_of=lambda st: st[1],
+                                               on_search=lambda q: self.update_stage_list())
         self.scanned_stage_frame.grid(row=2, column=0, sticky="ew", padx=5, pady=5)
         
         controls = ctk.CTkFrame(self.stage_sidebar)
@@ -620,164 +486,893 @@ class GOSelect(ctk.CTk):
         
         self.extra_stage_frame = ctk.CTkScrollableFrame(self.stage_sidebar, label_text="Selected Stages")
         self.extra_stage_frame.grid(row=4, column=0, sticky="nsew", padx=5, pady=5)
+        
+        self.side_panels_built = True
+        self.invalidate(stages=True)
+        self.scan_content()
 
-    def scan_content(self):
-        self.scan_characters()
-        self.scan_stages()
+    def index_path(self, filename):
+        """Index files live next to whichever go_select.ini is in use."""
+        use_local = self.config.getboolean("Options", "UseLocal", fallback=True)
+        cfg = self.local_cfg if use_local else self.global_cfg
+        return os.path.join(os.path.dirname(cfg), filename)
 
-    def scan_characters(self):
-        for w in self.char_list_frame.winfo_children(): w.destroy()
-        if not os.path.exists(self.chars_dir): return
+    def scan_content(self):
+        """Start a background scan of chars/ and stages/; results stream into the sidebars."""
+        if not self.side_panels_built: return
+        if self.import_queue is not None:
+            self.status_bar.configure(text="Wait for the import to finish before rescanning")
+            return
+        from goselect.content import ContentIndex, INDEX_FILENAME
+        from goselect.charinfo import CharInfoIndex, CHARINFO_FILENAME
+        self.cancel_scan()
+        # Music is only indexed once a properties dialog has asked for it
+        if self.music is not None and self.music.root == self.base_path: self.music.refresh()
+        if self.content_index is None or self.content_index.path != self.index_path(INDEX_FILENAME):
+            self.content_index = ContentIndex(self.index_path(INDEX_FILENAME))
+        if self.char_info is None or self.char_info.path != self.index_path(CHARINFO_FILENAME):
+            self.char_info = CharInfoIndex(self.index_path(CHARINFO_FILENAME))
         
+        self.char_paths = {}
+        self.char_search = self.stage_search = None
         self.available_chars = []
-        for root, dirs, files in os.walk(self.chars_dir):
-            for file in files:
-                if file.lower().endswith(".def"):
-                    full = os.path.join(root, file)
-                    rel = os.path.relpath(full, self.chars_dir).replace("\\", "/")
-                    folder = os.path.basename(os.path.dirname(full))
-                    fname = os.path.splitext(file)[0]
-                    if folder.lower() == fname.lower() and rel.count('/')==1: rel = folder
-                    self.available_chars.append(rel)
-        self.available_chars.sort()
-        for c in self.available_chars:
-            ctk.CTkButton(self.char_list_frame, text=c, anchor="w", command=lambda x=c: self.assign_char_to_slot(x)).pack(fill="x", pady=1)
-
-    def scan_stages(self):
-        for w in self.scanned_stage_frame.winfo_children(): w.destroy()
-        if not os.path.exists(self.stages_dir): return
-        
         self.available_stages = []
-        for root, dirs, files in os.walk(self.stages_dir):
-            for file in files:
-                if file.lower().endswith(".def"):
-                    full = os.path.join(root, file)
-                    rel = os.path.relpath(full, self.stages_dir).replace("\\", "/")
-                    path_str = f"stages/{rel}"
-                    # Display name only
-                    display = os.path.splitext(os.path.basename(file))[0]
-                    self.available_stages.append((path_str, display))
-        
-        self.available_stages.sort(key=lambda x: x[1])
-        for path, display in self.available_stages:
-            ctk.CTkButton(self.scanned_stage_frame, text=display, anchor="w", command=lambda x=path: self.preview_stage_add(x)).pack(fill="x", pady=1)
+        self.char_list_frame.set_items(self.available_chars)
+        self.scanned_stage_frame.set_items(self.available_stages)
+        
+        self.scan_cancel = threading.Event()
+        self.scan_queue = queue.Queue()
+        threading.Thread(target=self.scan_worker, args=(self.content_index, self.char_info, self.scan_cancel, self.scan_queue), daemon=True).start()
+        
+        self.scan_label.configure(text="Scanning...")
+        self.scan_frame.grid(row=3, column=0, sticky="ew", padx=5, pady=(0,5))
+        self.scan_progress.start()
+        self.after(50, lambda: self.poll_scan(self.scan_queue))
+
+    def cancel_scan(self):
+        if self.scan_cancel: self.scan_cancel.set()
+        self.stop_watcher()
+
+    def scan_worker(self, index, char_info, cancel, q):
+        # Runs off the Tk thread: only talks to the UI through the queue
+        try:
+            # Scans and imports never overlap, so anything left in the import staging folder is stale
+            from goselect.importer import clean_staging
+            clean_staging(self.chars_dir)
+            chars = self.scan_characters(index, cancel, q)
+            stages = self.scan_stages(index, cancel, q)
+            if not cancel.is_set(): index.save()
+            # [Info] sections are read last so the lists fill in as fast as possible
+            with TRACE.span("charinfo update", "scan"):
+                info_changed = not cancel.is_set() and char_info.update([p for _, p in chars], cancel)
+            if info_changed: q.put(("info", None))
+            if not cancel.is_set():
+                char_info.save()
+                q.put(("search", self.build_search_indexes(chars, stages, char_info)))
+        except Exception as e:
+            q.put(("error", str(e)))
+        q.put(("done", cancel.is_set()))
+
+    @TRACE.traced(cat="scan")
+    def scan_characters(self, index, cancel, q):
+        from goselect.content import char_entry
+        found = []
+        if not os.path.exists(self.chars_dir): return found
+        for batch in index.iter_scan(self.chars_dir, cancel):
+            entries = [(char_entry(d, f), os.path.join(self.chars_dir, d, f)) for d, f in batch]
+            found.extend(entries)
+            q.put(("chars", entries))
+        return found
+
+    @TRACE.traced(cat="scan")
+    def scan_stages(self, index, cancel, q):
+        from goselect.content import stage_entry
+        found = []
+        if not os.path.exists(self.stages_dir): return found
+        for batch in index.iter_scan(self.stages_dir, cancel):
+            entries = [stage_entry(d, f) for d, f in batch]
+            found.extend(entries)
+            q.put(("stages", entries))
+        return found
+
+    @TRACE.traced(cat="scan")
+    def build_search_indexes(self, chars, stages, char_info):
+        from goselect.search import SearchIndex
+        char_search = SearchIndex()
+        for name, path in sorted(chars):
+            char_search.add(name, char_keys(name, path, char_info.get(path)))
+        stage_search = SearchIndex()
+        for stage in sorted(stages, key=lambda x: x[1]):
+            stage_search.add(stage, stage_keys(stage))
+        return char_search, stage_search
+
+    def poll_scan(self, q):
+        if q is not self.scan_queue: return  # superseded by a newer scan
+        new_chars = new_stages = new_info = False
+        finished = error = None
+        try:
+            while True:
+                kind, payload = q.get_nowait()
+                if kind == "chars":
+                    for name, path in payload:
+                        self.char_paths[name] = path
+                        self.available_chars.append(name)
+                    new_chars = True
+                elif kind == "stages":
+                    self.available_stages.extend(payload)
+                    new_stages = True
+                elif kind == "info":
+                    new_info = True
+                elif kind == "search":
+                    self.char_search, self.stage_search = payload
+                    new_chars = new_stages = True
+                elif kind == "error":
+                    error = payload
+                elif kind == "done":
+                    finished = payload
+        except queue.Empty:
+            pass
+            
+        if new_chars or new_info: self.sort_chars()
+        if new_stages:
+            self.available_stages.sort(key=lambda x: x[1])
+            self.update_stage_list()
+            
+        counts = f"{len(self.available_chars)} chars, {len(self.available_stages)} stages"
+        if finished is None:
+            self.scan_label.configure(text=f"Scanning... {counts}")
+            self.after(50, lambda: self.poll_scan(q))
+        else:
+            self.scan_progress.stop()
+            self.scan_frame.grid_remove()
+            self.scan_queue = self.scan_cancel = None
+            if error: self.status_bar.configure(text=f"Scan failed: {error}")
+            elif finished: self.status_bar.configure(text=f"Scan cancelled ({counts})")
+            else:
+                self.status_bar.configure(text=f"Found {counts}")
+                self.start_watcher()
+
+    # --- Live updates ---
+    def start_watcher(self):
+        """Follow chars/ and stages/ after a full scan, so new content shows up without rescanning."""
+        from goselect.watcher import ContentWatcher
+        self.stop_watcher()
+        q = self.watch_queue = queue.Queue()
+        index, char_info, chars_dir = self.content_index, self.char_info, self.chars_dir
+        
+        def on_change(top, added, removed):
+            # Watcher thread: read [Info] for new characters here, then hand the diff to the UI
+            q.put(content_change(chars_dir, char_info, top, added, removed))
+            index.save()
+        
+        self.watcher = ContentWatcher(index, (self.chars_dir, self.stages_dir), on_change)
+        self.watcher.start()
+        self.after(250, lambda: self.poll_watcher(q))
+
+    def stop_watcher(self):
+        if self.watcher: self.watcher.stop()
+        self.watcher = self.watch_queue = None
+
+    def poll_watcher(self, q):
+        if q is not self.watch_queue: return
+        changes = []
+        try:
+            while True: changes.append(q.get_nowait())
+        except queue.Empty:
+            pass
+        if changes:
+            self.apply_content_changes(changes)
+            added, removed = sum(len(c[1]) for c in changes), sum(len(c[2]) for c in changes)
+            self.status_bar.configure(text=f"Content changed: {added} added, {removed} removed")
+        self.after(250, lambda: self.poll_watcher(q))
+
+    def apply_content_changes(self, changes):
+        """Fold ("chars"|"stages", added, removed) diffs into the lists and search indexes without a rescan."""
+        chars = stages = False
+        for kind, new, gone in changes:
+            if kind == "chars":
+                gone = {name for name, path in gone if self.char_paths.get(name) == path}
+                for name in gone:
+                    del self.char_paths[name]
+                    if self.char_search is not None: self.char_search.remove(name)
+                if gone: self.available_chars = [c for c in self.available_chars if c not in gone]
+                for name, path in new:
+                    if name in self.char_paths: continue
+                    self.char_paths[name] = path
+                    self.available_chars.append(name)
+                    if self.char_search is not None: self.char_search.add(name, char_keys(name, path, self.char_info.get(path)))
+                chars = True
+            else:
+                gone = set(gone)
+                for st in gone:
+                    if self.stage_search is not None: self.stage_search.remove(st)
+                if gone: self.available_stages = [st for st in self.available_stages if st not in gone]
+                known = set(self.available_stages)
+                for st in new:
+                    if st in known: continue
+                    self.available_stages.append(st)
+                    if self.stage_search is not None: self.stage_search.add(st, stage_keys(st))
+                stages = True
+        if chars: self.sort_chars()
+        if stages:
+            self.available_stages.sort(key=lambda x: x[1])
+            self.update_stage_list()
+
+    # --- Background errors ---
+    def watch_log(self):
+        """Show warnings and errors logged by worker threads (backups, watcher, portraits, music).
+
+        The windowed build has no console: warnings go to the status bar,
+        errors to an error box.
+        """
+        import logging
+        from logging.handlers import QueueHandler
+        self.log_queue = queue.Queue()
+        handler = QueueHandler(self.log_queue)
+        handler.setLevel(logging.WARNING)
+        logging.getLogger("goselect").addHandler(handler)
+        self.after(500, self.poll_log)
+
+    def poll_log(self):
+        import logging
+        errors = []
+        try:
+            while True:
+                record = self.log_queue.get_nowait()
+                self.status_bar.configure(text=record.getMessage())
+                if record.levelno >= logging.ERROR: errors.append(record.getMessage())
+        except queue.Empty:
+            pass
+        # Everything that failed since the last poll goes into one box
+        if errors: messagebox.showerror("GO-Select", message_lines(errors))
+        self.after(500, self.poll_log)
+
+    # --- Import ---
+    def import_packs(self):
+        """Install character/stage archives into chars/ and stages/ without a rescan."""
+        if not self.side_panels_built: return
+        if self.scan_queue is not None or self.import_queue is not None:
+            self.status_bar.configure(text="Wait for the current scan or import to finish")
+            return
+        from goselect.importer import ARCHIVE_TYPES
+        paths = filedialog.askopenfilenames(title="Import character/stage packs",
+                                            filetypes=[("Archives", " ".join("*" + e for e in ARCHIVE_TYPES)), ("All Files", "*.*")])
+        if not paths: return
+        q = self.import_queue = queue.Queue()
+        cancel = self.import_cancel = threading.Event()
+        threading.Thread(target=self.inspect_worker, args=(list(paths), q), daemon=True).start()
+        self.import_done = self.import_total = 0
+        self.scan_label.configure(text=f"Reading {len(paths)} archive(s)...")
+        self.scan_frame.grid(row=3, column=0, sticky="ew", padx=5, pady=(0,5))
+        self.scan_progress.start()
+        self.after(50, lambda: self.poll_import(q, cancel))
+
+    def inspect_worker(self, paths, q):
+        # Listings only: nothing is extracted until the collisions are settled
+        from goselect.importer import inspect, ArchiveError
+        packs, errors = [], []
+        for path in paths:
+            try: packs.append(inspect(path))
+            except ArchiveError as e: errors.append(str(e))
+        q.put(("inspected", (packs, errors)))
+
+    def install_worker(self, packs, dirs, index, char_info, cancel, q):
+        from goselect.importer import install
+        chars_dir, stages_dir = dirs
+        try:
+            result = install(packs, chars_dir, stages_dir, progress=lambda n: q.put(("progress", n)), cancel=cancel)
+            # Only the folders the import touched are re-listed, the rest of the index stays as it is
+            changes = []
+            for top, rels in ((chars_dir, result.char_dirs), (stages_dir, result.stage_dirs)):
+                added, removed = index.update_dirs(top, ["", *rels])
+                if added or removed: changes.append(content_change(chars_dir, char_info, top, added, removed))
+            index.save()
+            char_info.save()
+            q.put(("done", (result, changes)))
+        except Exception as e:
+            q.put(("error", str(e)))
+
+    def poll_import(self, q, cancel):
+        if q is not self.import_queue: return  # cancelled, or the profile changed
+        try:
+            while True:
+                kind, payload = q.get_nowait()
+                if kind == "progress":
+                    self.import_done += payload
+                elif kind == "inspected":
+                    if not self.start_install(*payload, q, cancel): return
+                elif kind == "done":
+                    return self.finish_import(*payload)
+                elif kind == "error":
+                    self.end_import()
+                    self.status_bar.configure(text=f"Import failed: {payload}")
+                    return
+        except queue.Empty:
+            pass
+        if self.import_total:
+            self.scan_progress.set(min(1.0, self.import_done / self.import_total))
+            self.scan_label.configure(text=f"Importing... {self.import_done / 2**20:.1f} / {self.import_total / 2**20:.1f} MB")
+        self.after(100, lambda: self.poll_import(q, cancel))
+
+    def start_install(self, packs, errors, q, cancel):
+        from goselect.importer import plan, ignored_message
+        clashes = plan(packs, self.chars_dir, self.stages_dir, "skip")
+        errors += [m for m in map(ignored_message, packs) if m]
+        if errors or clashes:
+            lines = errors + clashes
+            text = message_lines(lines)
+            if clashes:
+                answer = messagebox.askyesnocancel("Import", f"{text}\n\nInstall existing characters under a new name (e.g. kfm_2)?\nNo skips them.")
+                if answer is None:
+                    self.end_import()
+                    return False
+                if answer: plan(packs, self.chars_dir, self.stages_dir, "rename")
+            else:
+                messagebox.showwarning("Import", text)
+        packs = [p for p in packs if any(not i.skip for i in p.items)]
+        if not packs:
+            self.end_import()
+            self.status_bar.configure(text="Nothing to import")
+            return False
+        self.import_total = sum(p.size for p in packs) or 1
+        self.scan_progress.stop()
+        self.scan_progress.configure(mode="determinate")
+        self.scan_progress.set(0)
+        threading.Thread(target=self.install_worker, daemon=True,
+                         args=(packs, (self.chars_dir, self.stages_dir), self.content_index, self.char_info, cancel, q)).start()
+        return True
+
+    def finish_import(self, result, changes):
+        cancelled = self.import_cancel.is_set()
+        self.end_import()
+        self.apply_content_changes(changes)
+        status = f"Imported {len(result.chars)} chars, {len(result.stages)} stages"
+        if cancelled: status += " (cancelled)"
+        if result.errors: status += f", {len(result.errors)} failed"
+        self.status_bar.configure(text=status)
+        if result.errors:
+            lines = result.errors
+            text = message_lines(lines)
+            messagebox.showerror("Import", f"{len(lines)} archive(s) could not be installed:\n\n{text}")
+        names = [name for name, _ in result.chars]
+        if names and messagebox.askyesno("Import", f"Place {len(names)} new character(s) into empty slots?"):
+            self.bulk_edit("import place", self.select_def.free_slots(len(names)), lambda: self.select_def.place_chars(names))
+
+    def cancel_import(self):
+        if self.import_cancel: self.import_cancel.set()
+        # Extraction stops at the next file; archives not yet complete are rolled back, finished ones are reported
+        if self.import_queue is not None and not self.import_total: self.end_import()
+
+    def end_import(self):
+        self.import_queue = self.import_cancel = None
+        self.scan_progress.stop()
+        self.scan_progress.configure(mode="indeterminate")
+        self.scan_frame.grid_remove()
+
+    def char_details(self, name):
+        if self.char_info is None or name not in self.char_paths: return {}
+        return self.char_info.get(self.char_paths[name])
+
+    def char_label(self, name):
+        mode = self.char_sort_menu.get()
+        if mode == "Folder": return name
+        from goselect.charinfo import display_name
+        info = self.char_details(name)
+        if mode == "Author": return f"{info.get('author') or '?'} - {display_name(info, name)}"
+        return display_name(info, name)
+
+    def sort_chars(self):
+        from goselect.charinfo import display_name
+        mode = self.char_sort_menu.get()
+        if mode == "Name":
+            self.available_chars.sort(key=lambda c: display_name(self.char_details(c), c).lower())
+        elif mode == "Author":
+            self.available_chars.sort(key=lambda c: ((self.char_details(c).get("author") or "").lower(), display_name(self.char_details(c), c).lower()))
+        else:
+            self.available_chars.sort()
+        self.update_char_list()
+
+    @TRACE.traced(cat="render")
+    def update_char_list(self):
+        q = self.char_list_frame.query()
+        if not q: items = self.available_chars
+        elif self.char_search is not None: items = self.char_search.search(q)
+        else:
+            # Still scanning: the index is built once the roster is complete
+            ql = q.lower()
+            items = [c for c in self.available_chars if ql in c.lower() or ql in self.char_label(c).lower()]
+        if items is self.char_list_frame.items: self.char_list_frame.refresh()
+        else: self.char_list_frame.set_items(items)
+
+    @TRACE.traced(cat="render")
+    def update_stage_list(self):
+        q = self.scanned_stage_frame.query()
+        if not q: items = self.available_stages
+        elif self.stage_search is not None: items = self.stage_search.search(q)
+        else:
+            ql = q.lower()
+            items = [st for st in self.available_stages if ql in st[0].lower()]
+        if items is self.scanned_stage_frame.items: self.scanned_stage_frame.refresh()
+        else: self.scanned_stage_frame.set_items(items)
 
     def preview_stage_add(self, stage_path):
-        self.extra_stages.append(stage_path)
-        self.refresh_extra_stages()
+        with self.history.stages(len(self.extra_stages)): self.extra_stages.append(stage_path)
+        self.invalidate(stage_rows=[len(self.extra_stages) - 1])
 
     def add_stage(self):
         pass
 
+    @TRACE.traced(cat="load")
     def load_data(self):
-        self.slots = []
-        self.extra_stages = []
-        self.sections = {"pre":[], "chars":[], "mid":[], "stages":[], "post":[]}
-        current_section = "pre"
-        
+        self.selected_slot_index = None
+        self.selection = set()
+        self.grid_page = 0
         try:
-            with open(self.select_def_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    clean = line.strip().lower()
-                    if clean.startswith("[characters]"):
-                        self.sections["pre"].append(line)
-                        current_section = "chars"
-                        continue
-                    elif clean.startswith("[extrastages]"):
-                        current_section = "stages"
-                        self.sections["mid"].append(line)
-                        continue
-                    elif clean.startswith("["):
-                        current_section = "post"
-                        self.sections["post"].append(line)
-                        continue
-                        
-                    if current_section == "pre": self.sections["pre"].append(line)
-                    elif current_section == "chars":
-                        content = line.split(';', 1)[0].strip()
-                        if content:
-                            parts = content.split(',', 1)
-                            char = parts[0].strip()
-                            params = parts[1].strip() if len(parts)>1 else ""
-                            self.slots.append({"char": char, "params": params})
-                    elif current_section == "stages":
-                        content = line.split(';', 1)[0].strip()
-                        if content: self.extra_stages.append(content)
-                    elif current_section == "post": self.sections["post"].append(line)
-            self.scan_content()
-            self.refresh_grid()
-            self.refresh_extra_stages()
+            self.select_def = SelectDef.load(self.select_def_path)
+            self.history = History(self.select_def)
+            self.validator = None
+            self.reset_thumbnails()
+            self.mark("select.def parsed")
+            self.invalidate(grid=True, stages=True)
+            if self.side_panels_built: self.scan_content()
         except Exception as e: messagebox.showerror("Error", f"Load failed: {e}")
 
+    def page_size(self):
+        return max(1, self.rows * self.cols)
+
+    def page_count(self):
+        # Always leave room for one page past the last full one so new slots can be appended
+        return len(self.slots) // self.page_size() + 1
+
+    def set_grid_page(self, page):
+        page = max(0, min(page, self.page_count() - 1))
+        if page == self.grid_page: return
+        self.grid_page = page
+        self.invalidate(grid=True)
+
+    def update_page_label(self):
+        self.page_label.configure(text=f"Page {self.grid_page + 1}/{self.page_count()}")
+
+    @TRACE.traced(cat="render")
     def refresh_grid(self):
-        for w in self.grid_frame.winfo_children(): w.destroy()
-        for i in range(self.rows * self.cols):
-            r, c = i // self.cols, i % self.cols
-            char = self.slots[i]["char"] if i < len(self.slots) else "Empty"
-            if not char: char = "Empty"
-            fg = "transparent"
-            if char.lower() == "randomselect": fg = "#442244"
-            elif char != "Empty": fg = "#224422"
-            
-            btn = ctk.CTkButton(self.grid_frame, text=char[:8], width=60, height=30, fg_color=fg, border_width=1, border_color="gray", command=lambda idx=i: self.select_slot(idx))
-            btn.grid(row=r, column=c, padx=1, pady=1)
-            btn.bind("<Button-3>", lambda e, idx=i: self.show_context_menu(e, idx))
+        self.grid_page = min(self.grid_page, self.page_count() - 1)
+        self.update_page_label()
+        self.grid_canvas.delete("cell")
+        self.grid_cells = {}
+        self.layout_grid()
+
+    def layout_grid(self):
+        pitch_x, pitch_y = CELL_W + CELL_GAP, CELL_H + CELL_GAP
+        gw, gh = self.cols * pitch_x, self.rows * pitch_y
+        cw, ch = self.grid_canvas.winfo_width(), self.grid_canvas.winfo_height()
+        # Center the grid when it is smaller than the viewport
+        origin = (max(0, (cw - gw) // 2), max(0, (ch - gh) // 2))
+        if origin != self.grid_origin:
+            self.grid_origin = origin
+            self.grid_canvas.delete("cell")
+            self.grid_cells = {}
+        self.grid_canvas.configure(scrollregion=(0, 0, max(cw, gw), max(ch, gh)))
+        self.render_visible_cells()
+
+    @TRACE.traced(cat="render")
+    def render_visible_cells(self):
+        pitch_x, pitch_y = CELL_W + CELL_GAP, CELL_H + CELL_GAP
+        ox, oy = self.grid_origin
+        left = self.grid_canvas.canvasx(0) - ox
+        top = self.grid_canvas.canvasy(0) - oy
+        right = left + self.grid_canvas.winfo_width()
+        bottom = top + self.grid_canvas.winfo_height()
+        c0, c1 = max(0, int(left // pitch_x)), min(self.cols - 1, int(right // pitch_x))
+        r0, r1 = max(0, int(top // pitch_y)), min(self.rows - 1, int(bottom // pitch_y))
+        
+        base = self.grid_page * self.page_size()
+        wanted = set()
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                wanted.add(base + r * self.cols + c)
+        # Portraits still queued for cells that scrolled away are skipped
+        if self.thumb_loader is not None:
+            self.thumb_loader.wanted = {self.slots[i].char.lower() for i in wanted if i < len(self.slots)}
+                
+        for idx in [i for i in self.grid_cells if i not in wanted]:
+            for item in self.grid_cells.pop(idx): self.grid_canvas.delete(item)
+        for idx in wanted:
+            if idx not in self.grid_cells: self.draw_cell(idx)
+
+    def cell_style(self, index):
+        char = self.slots[index].char if index < len(self.slots) else "Empty"
+        if not char or char.lower() == "empty": char = "Empty"
+        fg = "#2B2B2B"
+        if char.lower() == "randomselect": fg = "#442244"
+        elif char != "Empty": fg = "#224422"
+        if index == self.selected_slot_index: outline, width = "#3B8ED0", 3
+        elif index in self.selection: outline, width = "#3B8ED0", 2
+        elif self.slot_problems(index): outline, width = "#D03B3B", 2
+        else: outline, width = "gray", 1
+        return char[:8], fg, outline, width
+
+    def draw_cell(self, index):
+        local = index - self.grid_page * self.page_size()
+        r, c = local // self.cols, local % self.cols
+        x = self.grid_origin[0] + c * (CELL_W + CELL_GAP) + CELL_GAP // 2
+        y = self.grid_origin[1] + r * (CELL_H + CELL_GAP) + CELL_GAP // 2
+        text, fg, outline, width = self.cell_style(index)
+        thumb = self.cell_thumb(index)
+        rect = self.grid_canvas.create_rectangle(x, y, x + CELL_W, y + CELL_H, fill=fg, outline=outline, width=width, tags="cell")
+        image = self.grid_canvas.create_image(x + CELL_W // 2, y + CELL_H // 2, image=thumb or "", tags="cell")
+        label = self.grid_canvas.create_text(x + CELL_W // 2, y + CELL_H // 2, text="" if thumb else text, fill="#DCE4EE", font=("Arial", 10), tags="cell")
+        self.grid_cells[index] = (rect, label, image)
+
+    def redraw_slot(self, index):
+        """Update a single cell in place; cells that are not on screen are skipped."""
+        if index is None or index not in self.grid_cells: return
+        rect, label, image = self.grid_cells[index]
+        text, fg, outline, width = self.cell_style(index)
+        thumb = self.cell_thumb(index)
+        self.grid_canvas.itemconfigure(rect, fill=fg, outline=outline, width=width)
+        self.grid_canvas.itemconfigure(image, image=thumb or "")
+        self.grid_canvas.itemconfigure(label, text="" if thumb else text)
+        if index in self.selection:
+            for item in (rect, image, label): self.grid_canvas.tag_raise(item)
+
+    def redraw_slots(self, indexes):
+        """One pass over the cells on screen, for edits that touch many slots."""
+        if len(indexes) > len(self.grid_cells): indexes = [i for i in self.grid_cells if i in indexes]
+        for index in indexes: self.redraw_slot(index)
+
+    # --- Portraits ---
+    def cell_thumb(self, index):
+        """The cached portrait for a slot, or None; a missing one is queued for loading."""
+        if index >= len(self.slots) or self.slots[index].is_special(): return None
+        char = self.slots[index].char
+        key = char.lower()
+        if self.thumb_loader is None: self.start_thumbnails()
+        if key in self.thumbs: return self.thumbs.get(key)
+        self.thumb_loader.wanted.add(key)
+        self.thumb_loader.request(key, char)
+        if not self.thumb_polling:
+            self.thumb_polling = True
+            self.after(50, self.poll_thumbs)
+        return None
 
+    def start_thumbnails(self):
+        from goselect.thumbs import ThumbnailLoader, LRU, THUMB_DIRNAME
+        # A queue per loader, so portraits still in flight for a previous game folder are dropped
+        q = self.thumb_queue = queue.Queue()
+        chars_dir = self.chars_dir
+        # A profile switched back to brings its decoded portraits along
+        if self.thumbs is None: self.thumbs = LRU(1000)
+        self.thumb_loader = ThumbnailLoader(self.index_path(THUMB_DIRNAME), (CELL_W - 4, CELL_H - 4),
+                                            lambda key, png: q.put((key, png)),
+                                            lambda char: self.char_paths.get(char) or find_char_def(chars_dir, char))
+
+    def poll_thumbs(self):
+        import base64
+        if self.thumb_loader is None:
+            self.thumb_polling = False
+            return
+        done = set()
+        try:
+            while True:
+                key, png = self.thumb_queue.get_nowait()
+                try: photo = tk.PhotoImage(data=base64.b64encode(png).decode("ascii")) if png else None
+                except tk.TclError: photo = None
+                self.thumbs.put(key, photo)
+                done.add(key)
+        except queue.Empty:
+            pass
+        self.invalidate(slots=[i for i in self.grid_cells if i < len(self.slots) and self.slots[i].char.lower() in done])
+        if self.thumb_loader is not None and self.thumb_loader.pending or not self.thumb_queue.empty():
+            self.after(50, self.poll_thumbs)
+        else:
+            self.thumb_polling = False
+
+    def reset_thumbnails(self):
+        if self.thumb_loader is not None: self.thumb_loader.shutdown()
+        self.thumb_loader = self.thumbs = None
+
+    def slot_at(self, x, y):
+        pitch_x, pitch_y = CELL_W + CELL_GAP, CELL_H + CELL_GAP
+        x = self.grid_canvas.canvasx(x) - self.grid_origin[0]
+        y = self.grid_canvas.canvasy(y) - self.grid_origin[1]
+        if x < 0 or y < 0: return None
+        c, r = int(x // pitch_x), int(y // pitch_y)
+        if c >= self.cols or r >= self.rows: return None
+        return self.grid_page * self.page_size() + r * self.cols + c
+
+    def on_grid_click(self, event):
+        idx = self.slot_at(event.x, event.y)
+        self.drag_anchor = idx
+        if idx is not None: self.select_slot(idx)
+
+    def on_grid_drag(self, event):
+        # Dragging from a cell selects the rectangle between it and the cell under the pointer
+        idx = self.slot_at(event.x, event.y)
+        if self.drag_anchor is None or idx is None: return
+        self.set_selection(self.block(self.drag_anchor, idx))
+
+    def on_grid_ctrl_click(self, event):
+        idx = self.slot_at(event.x, event.y)
+        self.drag_anchor = None
+        if idx is None: return
+        selection = set(self.selection)
+        selection ^= {idx}
+        self.set_selection(selection, primary=idx if idx in selection else None)
+
+    def on_grid_shift_click(self, event):
+        idx = self.slot_at(event.x, event.y)
+        self.drag_anchor = None
+        if idx is None: return
+        if self.selected_slot_index is None: self.select_slot(idx)
+        else: self.set_selection(self.block(self.selected_slot_index, idx), primary=self.selected_slot_index)
+
+    def on_grid_right_click(self, event):
+        idx = self.slot_at(event.x, event.y)
+        if idx is not None: self.show_context_menu(event, idx)
+
+    def grid_yview(self, *args):
+        self.grid_canvas.yview(*args)
+        self.invalidate(visible=True)
+
+    def grid_xview(self, *args):
+        self.grid_canvas.xview(*args)
+        self.invalidate(visible=True)
+
+    def on_grid_wheel(self, event, horizontal=False, delta=None):
+        if delta is None: delta = 1 if event.delta > 0 else -1
+        if horizontal: self.grid_xview("scroll", -delta, "units")
+        else: self.grid_yview("scroll", -delta, "units")
+
+    @TRACE.traced(cat="render")
     def refresh_extra_stages(self):
         for w in self.extra_stage_frame.winfo_children(): w.destroy()
+        self.extra_stage_labels = []
+        for i in range(len(self.extra_stages)): self.add_stage_row(i)
+
+    def add_stage_row(self, i):
+        path = self.extra_stages[i].split(',', 1)[0].strip()
         
-        for i, stage_line in enumerate(self.extra_stages):
-            path = stage_line.split(',', 1)[0].strip()
-            
-            # Using grid instead of pack to handle resize/overflow better
-            f = ctk.CTkFrame(self.extra_stage_frame)
-            f.pack(fill="x", pady=1)
-            f.grid_columnconfigure(0, weight=1)
-            
-            lbl = ctk.CTkLabel(f, text=path, anchor="w")
-            lbl.grid(row=0, column=0, sticky="ew", padx=5)
-            
-            btn_frame = ctk.CTkFrame(f, fg_color="transparent")
-            btn_frame.grid(row=0, column=1, sticky="e")
-            
-            ctk.CTkButton(btn_frame, text="⚙", width=30, command=lambda idx=i: self.edit_stage(idx)).pack(side="left", padx=2)
-            ctk.CTkButton(btn_frame, text="X", width=30, fg_color="red", command=lambda idx=i: self.remove_stage(idx)).pack(side="left", padx=2)
+        # Using grid instead of pack to handle resize/overflow better
+        f = ctk.CTkFrame(self.extra_stage_frame)
+        f.pack(fill="x", pady=1)
+        f.grid_columnconfigure(0, weight=1)
+        
+        lbl = ctk.CTkLabel(f, text=path, anchor="w")
+        lbl.grid(row=0, column=0, sticky="ew", padx=5)
+        self.extra_stage_labels.append(lbl)
+        if self.stage_problems(i): lbl.configure(text_color="#D03B3B")
+        
+        btn_frame = ctk.CTkFrame(f, fg_color="transparent")
+        btn_frame.grid(row=0, column=1, sticky="e")
+        
+        ctk.CTkButton(btn_frame, text="⚙", width=30, command=lambda idx=i: self.edit_stage(idx)).pack(side="left", padx=2)
+        ctk.CTkButton(btn_frame, text="X", width=30, fg_color="red", command=lambda idx=i: self.remove_stage(idx)).pack(side="left", padx=2)
 
+    @TRACE.traced(cat="dialog")
     def edit_stage(self, index):
+        from goselect.dialogs import StagePropertiesDialog
         line = self.extra_stages[index]
-        StagePropertiesDialog(self, line, lambda res: self.update_stage(index, res))
+        self.dialog(StagePropertiesDialog).show(line, lambda res: self.update_stage(index, res))
+
+    def redraw_stage_row(self, index):
+        if index < len(self.extra_stage_labels):
+            color = "#D03B3B" if self.stage_problems(index) else ctk.ThemeManager.theme["CTkLabel"]["text_color"]
+            self.extra_stage_labels[index].configure(text=self.extra_stages[index].split(',', 1)[0].strip(), text_color=color)
 
     def update_stage(self, index, new_line):
-        self.extra_stages[index] = new_line
-        self.refresh_extra_stages()
+        with self.history.stages(index): self.select_def.set_stage(index, new_line)
+        self.invalidate(stage_rows=[index])
 
     def remove_stage(self, index):
-        del self.extra_stages[index]
-        self.refresh_extra_stages()
+        with self.history.stages(index): self.select_def.remove_stage(index)
+        self.invalidate(stages=True)
 
-    def select_slot(self, index):
-        self.selected_slot_index = index
-        slot = self.slots[index] if index < len(self.slots) else {"char": "", "params": ""}
-        self.status_bar.configure(text=f"Slot {index}: {slot['char']}")
+    # --- Validation ---
+    @TRACE.traced(cat="io")
+    def validate_references(self):
+        """Check every character, stage and music reference against a fresh index of the game folder."""
+        from goselect.validate import Validator, CASE
+        self.validator = Validator(self.base_path)
+        slots, stages = self.validator.run(self.select_def)
+        self.invalidate(slots=self.grid_cells, stages=True)
+        found = [p for ps in list(slots.values()) + list(stages.values()) for p in ps]
+        if not found:
+            self.status_bar.configure(text="Validation: all references found")
+            return
+        case = sum(1 for status, _ in found if status == CASE)
+        first = min(slots) if slots else None
+        self.status_bar.configure(text=f"Validation: {len(found) - case} missing, {case} with wrong case in {len(slots)} slot(s) and {len(stages)} extra stage(s)"
+                                       + (f"; first broken slot: {first}" if first is not None else ""))
+
+    def slot_problems(self, index):
+        # Checked live against the cached index, so a cell is right again as soon as it is fixed
+        if self.validator is None or index is None or index >= len(self.slots): return []
+        return self.validator.check_slot(self.slots[index])
+
+    def stage_problems(self, index):
+        if self.validator is None or index >= len(self.extra_stages): return []
+        return self.validator.check_stage(self.extra_stages[index])
+
+    # --- Tracing ---
+    def toggle_trace_overlay(self):
+        self.trace_overlay = not self.trace_overlay
+        if self.trace_after: self.after_cancel(self.trace_after)
+        self.trace_after = None
+        if self.trace_overlay:
+            self.trace_label.grid(row=2, column=0, sticky="e", padx=5)
+            self.update_trace_overlay()
+        else:
+            self.trace_label.grid_remove()
+
+    def update_trace_overlay(self):
+        from goselect.trace import describe
+        last = TRACE.last
+        if last is not None:
+            # Copy first: worker threads keep appending while this looks for the slowest span
+            slowest = max(list(TRACE.events), key=lambda e: e[3])
+            self.trace_label.configure(text=f"last {describe(last)}  |  slowest {describe(slowest)}")
+        self.trace_after = self.after(500, self.update_trace_overlay)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(title="Export trace", defaultextension=".json", initialfile="go_select_trace.json",
+                                            filetypes=[("Chrome / Perfetto trace", "*.json")])
+        if not path: return
+        try: n = TRACE.export(path)
+        except OSError as e:
+            messagebox.showerror("Export trace", str(e))
+            return
+        self.status_bar.configure(text=f"Exported {n} spans to {path} (open in ui.perfetto.dev or chrome://tracing)")
+
+    # --- Undo / Redo ---
+    def roster_shortcut(self, action):
+        # Text fields (Quick Params, the searches) keep Ctrl+Z/Ctrl+Y for their own text
+        try: focus = self.focus_get()
+        except KeyError: focus = None  # focus inside a popup menu
+        if isinstance(focus, (tk.Entry, tk.Text)): return
+        action()
+
+    def undo(self): self.show_history_changes(self.history.undo())
+    def redo(self): self.show_history_changes(self.history.redo())
+
+    def show_history_changes(self, changes):
+        """Redraw only what an undo/redo touched."""
+        if not changes: return
+        slots = {index for kind, index in changes if kind == "slot"}
+        self.invalidate(slots=slots, stage_rows=[index for kind, index in changes if kind == "stages"],
+                        current=self.selected_slot_index in slots)
+
+    # --- Render scheduling ---
+    def invalidate(self, grid=False, visible=False, slots=(), page=False, current=False, stages=False, stage_rows=()):
+        """Mark parts of the UI stale; everything marked before the next idle moment is redrawn in one pass."""
+        d = self.dirty
+        d["grid"] |= grid
+        d["visible"] |= visible
+        d["slots"].update(slots)
+        d["page"] |= page or bool(slots)
+        d["current"] |= current
+        d["stages"] |= stages
+        d["stage_rows"].update(stage_rows)
+        if self.render_after is None: self.render_after = self.after_idle(self.flush_render)
+
+    @TRACE.traced(cat="render")
+    def flush_render(self):
+        self.render_after = None
+        d, self.dirty = self.dirty, new_dirty()
+        # Slot edits can change the page count; a page that no longer exists needs a rebuild
+        if d["grid"] or self.grid_page >= self.page_count(): self.refresh_grid()
+        else:
+            if d["visible"]: self.render_visible_cells()
+            if d["slots"]: self.redraw_slots(d["slots"])
+            if d["page"]: self.update_page_label()
+        if self.side_panels_built and (d["stages"] or d["stage_rows"]):
+            # Rows are only rebuilt when entries were removed (their buttons hold indexes); appended ones just get new rows
+            shown = len(self.extra_stage_labels)
+            if d["stages"] or shown > len(self.extra_stages): self.refresh_extra_stages()
+            else:
+                rows = d["stage_rows"]
+                # An insertion shifts every row after it down by one
+                if shown < len(self.extra_stages): rows = range(min(rows, default=shown), shown)
+                for i in rows:
+                    if i < shown: self.redraw_stage_row(i)
+                for i in range(shown, len(self.extra_stages)): self.add_stage_row(i)
+        if d["current"]: self.show_current_slot()
+
+    def show_current_slot(self):
+        index = self.selected_slot_index
+        if index is None: return
+        slot = self.slots[index] if index < len(self.slots) else Slot("")
+        problems = self.slot_problems(index)
+        self.status_bar.configure(text=f"Slot {index}: {slot.char}" + (f" - {problems[0][1]}" if problems else ""))
+        if len(self.selection) > 1: self.status_bar.configure(text=f"{len(self.selection)} slots selected")
         self.param_entry.delete(0, "end")
-        self.param_entry.insert(0, slot["params"])
+        self.param_entry.insert(0, slot.params)
+
+    def select_slot(self, index, keep=False):
+        """Make `index` the current slot; unless `keep`, the rest of the selection is dropped."""
+        if not keep:
+            self.set_selection({index}, primary=index)
+            return
+        self.invalidate(slots={self.selected_slot_index, index} - {None}, current=True)
+        self.selected_slot_index = index
+
+    # --- Multi-selection ---
+    def block(self, a, b):
+        """Indexes in the rectangle spanned by slots a and b."""
+        (r1, c1), (r2, c2) = divmod(a, self.cols), divmod(b, self.cols)
+        return {r * self.cols + c for r in range(min(r1, r2), max(r1, r2) + 1) for c in range(min(c1, c2), max(c1, c2) + 1)}
+
+    def set_selection(self, indexes, primary=None):
+        previous = self.selection
+        self.selection = set(indexes)
+        if primary is None and self.selected_slot_index in self.selection: primary = self.selected_slot_index
+        if primary is None and self.selection: primary = min(self.selection)
+        self.invalidate(slots=(previous ^ self.selection) | ({self.selected_slot_index, primary} - {None}), current=True)
+        self.selected_slot_index = primary
+
+    def selected_indexes(self):
+        return sorted(self.selection) if self.selection else [i for i in (self.selected_slot_index,) if i is not None]
+
+    def bulk_edit(self, name, indexes, edit):
+        """Apply `edit()` to many slots as one undo step; they are redrawn in a single pass."""
+        if not indexes: return
+        with TRACE.span(name, "edit", slots=len(indexes)), self.history.slots(indexes): edit()
+        self.invalidate(slots=indexes, current=True)
+
+    def bulk_assign(self, char_name):
+        indexes = self.selected_indexes()
+        # Emptying cells past the end of the roster would only pad the file
+        if char_name == "empty": indexes = [i for i in indexes if i < len(self.slots)]
+        self.bulk_edit("bulk assign", indexes, lambda: [self.select_def.set_slot(i, char_name, "") for i in indexes])
+
+    def bulk_param(self, remove=False):
+        indexes = [i for i in self.selected_indexes() if i < len(self.slots) and not self.slots[i].is_special()]
+        if not indexes: return
+        prompt = "Param to remove (e.g. order):" if remove else "Param to set (e.g. order=3):"
+        text = ctk.CTkInputDialog(text=f"{prompt}\n{len(indexes)} slots", title="Remove Param" if remove else "Set Param").get_input()
+        if not text: return
+        key, _, value = text.partition("=")
+        key, value = key.strip(), "" if remove else value.strip()
+        if not key or (not remove and not value): return
+        self.bulk_edit("bulk param", indexes, lambda: [self.slots[i].set(key, value) for i in indexes])
+
+    def shift_selection(self, offset):
+        indexes = self.selected_indexes()
+        if not indexes: return
+        # Left/right moves stay within their rows
+        if indexes[0] + offset < 0 or (abs(offset) == 1 and any(i // self.cols != (i + offset) // self.cols for i in indexes)):
+            self.status_bar.configure(text="Cannot move the selection past the edge of the grid")
+            return
+        touched = set(indexes) | {i + offset for i in indexes}
+        self.bulk_edit("shift slots", touched, lambda: self.select_def.shift_slots(indexes, offset))
+        primary = self.selected_slot_index + offset if self.selected_slot_index is not None else None
+        self.set_selection({i + offset for i in indexes}, primary=primary)
 
     def assign_char_to_slot(self, char_name):
         if self.selected_slot_index is None: return
-        while len(self.slots) <= self.selected_slot_index: self.slots.append({"char": "empty", "params": ""})
-        self.slots[self.selected_slot_index]["char"] = char_name
-        self.refresh_grid()
-        self.select_slot(self.selected_slot_index)
+        with self.history.slot(self.selected_slot_index): self.select_def.set_slot(self.selected_slot_index, char_name)
+        self.invalidate(slots=[self.selected_slot_index], current=True)
 
     def update_current_slot_params(self):
         if self.selected_slot_index is None: return
         if self.selected_slot_index < len(self.slots):
-            self.slots[self.selected_slot_index]["params"] = self.param_entry.get()
+            with self.history.slot(self.selected_slot_index): self.slots[self.selected_slot_index].params = self.param_entry.get()
+            self.invalidate(slots=[self.selected_slot_index], current=True)
             messagebox.showinfo("Success", "Updated")
 
     def show_context_menu(self, event, index):
-        self.select_slot(index)
+        if index not in self.selection: self.select_slot(index)
         menu = tk.Menu(self, tearoff=0)
+        if len(self.selection) > 1:
+            n = len(self.selection)
+            menu.add_command(label=f"Set Param on {n} Slots...", command=self.bulk_param)
+            menu.add_command(label="Remove Param...", command=lambda: self.bulk_param(remove=True))
+            menu.add_command(label="Set Random", command=lambda: self.bulk_assign("randomselect"))
+            menu.add_command(label="Set Empty", command=lambda: self.bulk_assign("empty"))
+            menu.add_separator()
+            for label, offset in (("Move Left", -1), ("Move Right", 1), ("Move Up", -self.cols), ("Move Down", self.cols)):
+                menu.add_command(label=label, command=lambda o=offset: self.shift_selection(o))
+            menu.tk_popup(event.x_root, event.y_root)
+            return
         menu.add_command(label="Properties...", command=lambda: self.open_properties(index))
         menu.add_separator()
         menu.add_command(label="Set Random", command=lambda: self.assign_char_to_slot("randomselect"))
@@ -785,55 +1380,207 @@ class GOSelect(ctk.CTk):
         menu.add_command(label="Clear Params", command=lambda: self.update_current_slot_params())
         menu.tk_popup(event.x_root, event.y_root)
 
+    @TRACE.traced(cat="dialog")
     def open_properties(self, index):
         if index >= len(self.slots): return
         slot = self.slots[index]
-        if not slot["char"] or slot["char"].lower() in ["empty", "randomselect"]: return
-        
-        path = os.path.join(self.chars_dir, slot["char"])
-        final = None
-        if os.path.isdir(path):
-            defi = os.path.join(path, os.path.basename(path)+".def")
-            if os.path.exists(defi): final = defi
-        elif os.path.exists(path): final = path
-        elif os.path.exists(path+".def"): final = path+".def"
-        else:
-            std = os.path.join(self.chars_dir, slot["char"], slot["char"]+".def")
-            if os.path.exists(std): final = std
-            
-        CharPropertiesDialog(self, slot["char"], final, slot["params"], lambda res: self.on_prop_save(index, res))
+        if slot.is_special(): return
+        
+        from goselect.dialogs import CharPropertiesDialog, load_char_info
+        char, known, chars_dir, char_info = slot.char, self.char_paths.get(slot.char), self.chars_dir, self.char_info
+
+        def load_info():
+            # On the dialog's worker thread: finding the .def and re-reading a changed one both touch the disk
+            final = known or find_char_def(chars_dir, char)
+            info = char_info.lookup(final) if char_info and final else None
+            return info or load_char_info(final)
+        cached = char_info.get(known) if char_info and known else None
+        self.dialog(CharPropertiesDialog).show(char, dict(slot.items()), list(slot.stages),
+                                               lambda kv, stages, managed: self.on_prop_save(index, kv, stages, managed), load_info, cached)
+
+    def music_library(self):
+        """The music of the current game folder; indexed in the background the first time it is asked for."""
+        from goselect.music import MusicLibrary, MUSIC_FILENAME
+        if self.music is None or self.music.root != self.base_path:
+            self.music = MusicLibrary(self.base_path, self.index_path(MUSIC_FILENAME))
+            self.music.refresh()
+        return self.music
+
+    def dialog(self, cls):
+        """Property dialogs are built once and hidden between uses."""
+        d = self.dialogs.get(cls)
+        if d is None or not d.winfo_exists():
+            d = self.dialogs[cls] = cls(self)
+        return d
 
-    def on_prop_save(self, index, res):
-        self.slots[index]["params"] = res
-        self.select_slot(index)
+    def on_prop_save(self, index, kv, stages, managed):
+        with self.history.slot(index): self.slots[index].set_params(kv, stages, managed)
+        self.invalidate(slots=[index], current=index == self.selected_slot_index)
 
+    @TRACE.traced(cat="io")
     def save_select_def(self):
+        if not self.select_def.changed():
+            messagebox.showinfo("Saved", "No changes to save.")
+            return
         if not os.path.exists(self.data_dir): os.makedirs(self.data_dir)
         
-        if self.config.getboolean("Options", "Backup", fallback=True):
-            ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            bk = os.path.join(self.data_dir, "GoSelect_Backups", f"select_{ts}.def")
-            if not os.path.exists(os.path.dirname(bk)): os.makedirs(os.path.dirname(bk))
-            try: shutil.copy2(self.select_def_path, bk)
-            except: pass
-        
-        with open(self.select_def_path, 'w', encoding='utf-8') as f:
-            for l in self.sections["pre"]: f.write(l)
-            for s in self.slots:
-                c = s["char"] if s["char"] else "empty"
-                line = c
-                if s["params"]: line += f", {s['params']}"
-                f.write(line+"\n")
-            
-            for l in self.sections["mid"]: f.write(l) 
-            for s in self.extra_stages: f.write(s+"\n")
-            for l in self.sections["post"]: f.write(l)
-            
+        if self.config.getboolean("Options", "Backup", fallback=True) and os.path.exists(self.select_def_path):
+            # The file is read here, before it is overwritten; storing it happens on a background thread
+            try:
+                with open(self.select_def_path, 'rb') as f: self.backup_store().submit(f.read())
+            except OSError as e: messagebox.showerror("Backup", f"Could not read select.def for the backup: {e}")
+        
+        with TRACE.span("write select.def", "io"): self.select_def.save(self.select_def_path)
+
         messagebox.showinfo("Saved", "File saved.")
 
+    def backup_store(self):
+        from goselect.backups import store_from_config
+        root = os.path.join(self.data_dir, "GoSelect_Backups")
+        if self.backups is None or self.backups.root != root:
+            self.backups = store_from_config(self.data_dir, self.config)
+        return self.backups
+
+    @TRACE.traced(cat="dialog")
+    def open_history(self):
+        from goselect.dialogs import HistoryDialog
+        store = self.backup_store()
+        if not store.list():
+            messagebox.showinfo("History", "No backups yet. One is made every time select.def is saved.")
+            return
+        self.dialog(HistoryDialog).show(store, self.select_def, self.restore_from_backup)
+
+    def restore_from_backup(self, picks):
+        from goselect.rosterdiff import restore
+        with TRACE.span("restore from backup", "edit", rows=len(picks)):
+            slots, stages = restore(self.select_def, picks, self.history)
+        self.invalidate(slots=slots, stage_rows=stages, current=self.selected_slot_index in slots)
+
+    @TRACE.traced(cat="dialog")
     def open_options(self):
-        OptionsDialog(self, self.config, lambda cfg: self.save_config())
+        from goselect.dialogs import OptionsDialog
+        OptionsDialog(self, self.config, self.on_options_save)
+
+    def on_options_save(self, cfg):
+        self.save_config()
+        if self.config.getboolean("Options", "TraceOverlay", fallback=False) != self.trace_overlay: self.toggle_trace_overlay()
+        # Retention settings may have changed; the store is kept, its worker may still be writing
+        if self.backups is not None:
+            from goselect.backups import retention
+            self.backups.keep_last, self.backups.keep_days, self.backups.keep_weeks = retention(self.config)
+
+    # --- Profiles ---
+    def warm_profiles(self):
+        from goselect.profiles import WarmProfiles
+        if self.warm is None: self.warm = WarmProfiles(lambda state: state["select_def"].changed())
+        return self.warm
+
+    def refresh_profile_menu(self):
+        from goselect.profiles import profile_names
+        dirty = set(self.warm.dirty()) if self.warm else set()
+        # Profiles left with unsaved edits are marked
+        self.profile_labels = {name + (" *" if name in dirty else ""): name for name in profile_names(self.config)}
+        values = list(self.profile_labels) + [NEW_PROFILE] + ([REMOVE_PROFILE] if len(self.profile_labels) > 1 else [])
+        self.profile_menu.configure(values=values)
+        self.profile_menu.set(self.profile_name or "")
+
+    def on_profile_menu(self, label):
+        if label == NEW_PROFILE: self.add_profile()
+        elif label == REMOVE_PROFILE: self.remove_profile()
+        else: self.switch_profile(self.profile_labels[label])
+        self.refresh_profile_menu()
+
+    @TRACE.traced(cat="load")
+    def switch_profile(self, name):
+        """Make another install current; recently used ones come back from memory with their edits."""
+        from goselect.profiles import get_profile
+        if name == self.profile_name: return
+        root, select_def = get_profile(self.config, name)
+        state = self.warm_profiles().take(name)
+        if state is None and not os.path.exists(select_def or os.path.join(root, "data", "select.def")):
+            messagebox.showerror("Profile", f"select.def for '{name}' was not found.")
+            return
+        self.stash_profile()
+        self.profile_name = name
+        if state is not None: self.restore_profile(state)
+        else:
+            self.base_path = root
+            self.update_paths(select_def)
+            self.rows = self.cols = 10
+            self.find_grid_dimensions()
+            self.load_data()
+        self.title(f"GO-Select - {name}")
+        self.save_config()
+
+    def stash_profile(self):
+        # Whatever an unfinished import already extracted is picked up by the next scan of that profile
+        self.cancel_import()
+        if self.import_queue is not None: self.end_import()
+        if self.scan_queue is not None:
+            # An unfinished scan is dropped and run again when the profile comes back
+            self.cancel_scan()
+            self.scan_queue = None
+            self.scan_progress.stop()
+            self.scan_frame.grid_remove()
+            scanned = False
+        else:
+            self.stop_watcher()
+            scanned = self.side_panels_built
+        for d in self.dialogs.values():
+            if d.winfo_exists(): d.hide()
+        state = {f: getattr(self, f) for f in WARM_FIELDS}
+        state["thumbs"], state["scanned"] = self.thumbs, scanned
+        self.reset_thumbnails()
+        self.warm_profiles().put(self.profile_name, state)
+
+    def restore_profile(self, state):
+        for f in WARM_FIELDS: setattr(self, f, state[f])
+        self.thumbs = state["thumbs"]
+        self.invalidate(grid=True, stages=True, current=True)
+        if not self.side_panels_built: return
+        if state["scanned"]:
+            self.update_char_list()
+            self.update_stage_list()
+            # The watcher's first pass re-lists what changed on disk while the profile was away
+            self.start_watcher()
+        else:
+            self.scan_content()
+
+    def add_profile(self):
+        from goselect.profiles import profile_names, set_profile
+        path = filedialog.askopenfilename(title="Select system.def of the install", filetypes=[("Definition", "*.def"), ("All Files", "*.*")])
+        if not path: return
+        base = os.path.dirname(os.path.dirname(path))
+        rel = find_select_def_from_system(path)
+        select_def = os.path.join(base, rel) if rel else os.path.join(base, "data", "select.def")
+        if not os.path.exists(select_def):
+            select_def = filedialog.askopenfilename(title="Select select.def", filetypes=[("Definition", "*.def"), ("All Files", "*.*")])
+            if not select_def: return
+        name = (ctk.CTkInputDialog(text="Profile name:", title="New Profile").get_input() or "").strip() or os.path.basename(base)
+        if name in profile_names(self.config):
+            messagebox.showerror("Profile", f"A profile named '{name}' already exists.")
+            return
+        set_profile(self.config, name, base, select_def)
+        self.switch_profile(name)
+
+    def remove_profile(self):
+        from goselect.profiles import profile_names, remove_profile
+        others = [n for n in profile_names(self.config) if n != self.profile_name]
+        if not others: return
+        if not messagebox.askyesno("Remove Profile", f"Remove the profile '{self.profile_name}'?\nNo game files are deleted."): return
+        if self.select_def.changed() and not messagebox.askyesno("Remove Profile", "Its unsaved edits will be lost. Continue?"): return
+        old = self.profile_name
+        self.switch_profile(others[0])
+        if self.profile_name == old: return
+        self.warm_profiles().discard(old)
+        remove_profile(self.config, old)
+        self.save_config()
+
+    def on_close(self):
+        dirty = self.warm.dirty() if self.warm else []
+        if dirty and not messagebox.askyesno("Quit", "Unsaved edits in other profiles will be lost:\n" + "\n".join(dirty) + "\n\nQuit anyway?"): return
+        self.destroy()
 
 if __name__ == "__main__":
-    app = GOSelect()
+    app = GOSelect(profile=PROFILE)
     app.mainloop()
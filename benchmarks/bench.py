@@ -0,0 +1,328 @@
+"""Benchmarks for GO-Select on synthetic game folders.
+
+    python benchmarks/bench.py --scale medium --json results.json
+    python benchmarks/bench.py --scale medium --compare results.json
+
+Trees are generated from a fixed seed, so every run (and every version)
+measures the same input. Headless paths always run; the GUI paths need a
+display and are skipped without one (--xvfb starts a virtual one).
+"""
+import os
+import sys
+import gc
+import json
+import time
+import queue
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from goselect.params import parse_params_string
+from goselect.selectdef import SelectDef
+from goselect.content import ContentIndex, char_entry, stage_entry
+from goselect.charinfo import CharInfoIndex
+
+# name: (characters, stages, extra stages)
+SCALES = {
+    "small": (100, 200, 20),
+    "medium": (5000, 2000, 200),
+    "large": (50000, 5000, 500),
+}
+TREE_VERSION = 1
+REGRESSION = 0.10  # slower than this fraction counts as a regression in --compare
+NOISE_S = 0.002    # ...unless the difference is below timer/scheduler noise
+
+# --- Synthetic trees ---
+def generate(path, scale, seed=1):
+    """Build (or reuse) a game folder for `scale` under `path`."""
+    chars, stages, extra = SCALES[scale]
+    marker = os.path.join(path, ".bench")
+    stamp = f"{TREE_VERSION} {scale} {seed}"
+    try:
+        with open(marker) as f:
+            if f.read() == stamp: return path
+    except OSError:
+        pass
+    shutil.rmtree(path, ignore_errors=True)
+    rnd = random.Random(seed)
+    for sub in ("chars", "stages", "sound", "data"): os.makedirs(os.path.join(path, sub))
+    names = []
+    for i in range(chars):
+        # A mix of chars/<name>/<name>.def, nested packs and loose .def files
+        kind = rnd.random()
+        if kind < 0.8:
+            name = f"char{i:05d}"
+            folder, defname = os.path.join(path, "chars", name), f"{name}.def"
+        elif kind < 0.95:
+            name = f"pack{i % 40:02d}/char{i:05d}.def"
+            folder, defname = os.path.join(path, "chars", f"pack{i % 40:02d}"), f"char{i:05d}.def"
+        else:
+            name = f"loose{i:05d}.def"
+            folder, defname = os.path.join(path, "chars"), name
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, defname), 'w') as f:
+            f.write(f'[Info]\nname = "Fighter {i}"\ndisplayname = "Fighter {rnd.randint(0, 99999)}"\n'
+                    f'author = "Author {rnd.randint(0, 300)}"\n\n[Files]\nsprite = char.sff\ncns = char.cns\n')
+        names.append(name)
+    for i in range(stages):
+        folder = os.path.join(path, "stages", f"set{i % 20:02d}") if i % 3 else os.path.join(path, "stages")
+        os.makedirs(folder, exist_ok=True)
+        open(os.path.join(folder, f"stage{i:05d}.def"), 'w').close()
+    for i in range(200): open(os.path.join(path, "sound", f"track{i:03d}.mp3"), 'w').close()
+    stage_paths = [f"stages/set{i % 20:02d}/stage{i:05d}.def" if i % 3 else f"stages/stage{i:05d}.def" for i in range(stages)]
+    lines = ["; synthetic select.def", "[Characters]"]
+    for i, name in enumerate(names):
+        if i % 97 == 0: lines.append(f"; --- block {i // 97} ---")
+        if i % 211 == 0: lines.append("randomselect")
+        params = [rnd.choice(stage_paths), f"music=sound/track{rnd.randrange(200):03d}.mp3", f"order={rnd.randint(1, 10)}",
+                  f"includestage={rnd.randint(0, 1)}", f"musicvictory=sound/track{rnd.randrange(200):03d}.mp3",
+                  f"musiclife=sound/track{rnd.randrange(200):03d}.mp3", f"ai={rnd.randint(1, 8)}", "hidden=0",
+                  f'unlock=stats.wins > {rnd.randint(0, 50)}', "arcadepath=arcade.def", "ratiopath=ratio.def"]
+        lines.append(f"{name}, " + ", ".join(params))
+    lines += ["", "[ExtraStages]"] + [f"{rnd.choice(stage_paths)}, music=sound/track{rnd.randrange(200):03d}.mp3" for _ in range(extra)]
+    lines += ["", "[Options]", "arcade.maxmatches = 6,1,1,0,0,0,0,0,0,0", "team.maxmatches = 4,1,1,0,0,0,0,0,0,0"]
+    with open(os.path.join(path, "data", "select.def"), 'w', newline='\r\n') as f: f.write("\n".join(lines) + "\n")
+    with open(os.path.join(path, "data", "system.def"), 'w') as f:
+        f.write("[Files]\nselect = data/select.def\n\n[Select Info]\nrows = 10\ncolumns = 20\n")
+    with open(marker, 'w') as f: f.write(stamp)
+    return path
+
+# --- Measurement ---
+def measure(fn, setup=None, repeat=5):
+    """Time `fn` `repeat` times (each after `setup`), then once more under tracemalloc for peak memory."""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - start)
+    arg = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg) if setup else fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return {"min_s": round(times[0], 6), "median_s": round(times[len(times) // 2], 6), "runs": repeat, "peak_kb": peak // 1024}
+
+def headless(tree, work, repeat):
+    chars_dir, stages_dir = os.path.join(tree, "chars"), os.path.join(tree, "stages")
+    select = os.path.join(tree, "data", "select.def")
+    results = {}
+    doc = SelectDef.load(select)
+    params = [s.params for s in doc.slots]
+
+    def index_path(name):
+        return os.path.join(work, name)
+
+    def fresh_index():
+        try: os.remove(index_path("cold.json"))
+        except OSError: pass
+        return ContentIndex(index_path("cold.json"))
+
+    def scan_chars(index):
+        # Same work as GOSelect.scan_characters, minus the UI queue
+        return [(char_entry(d, f), os.path.join(chars_dir, d, f)) for batch in index.iter_scan(chars_dir) for d, f in batch]
+
+    def scan_stages(index):
+        return [stage_entry(d, f) for batch in index.iter_scan(stages_dir) for d, f in batch]
+
+    results["parse_params_string"] = measure(lambda: [parse_params_string(p) for p in params], repeat=repeat)
+    results["load_select_def"] = measure(lambda: SelectDef.load(select), repeat=repeat)
+    results["scan_characters.cold"] = measure(scan_chars, setup=fresh_index, repeat=repeat)
+    results["scan_stages.cold"] = measure(scan_stages, setup=fresh_index, repeat=repeat)
+    warm = ContentIndex(index_path("warm.json"))
+    chars = scan_chars(warm)
+    scan_stages(warm)
+    warm.save()
+    results["scan_characters.warm"] = measure(lambda: scan_chars(ContentIndex(index_path("warm.json"))), repeat=repeat)
+    results["scan_stages.warm"] = measure(lambda: scan_stages(ContentIndex(index_path("warm.json"))), repeat=repeat)
+
+    def fresh_info():
+        try: os.remove(index_path("info.json"))
+        except OSError: pass
+        return CharInfoIndex(index_path("info.json"))
+    results["charinfo_update.cold"] = measure(lambda info: info.update([p for _, p in chars]), setup=fresh_info, repeat=repeat)
+
+    # Worst case for the sidebar search: short queries that match almost every character
+    from goselect.search import SearchIndex
+    info = fresh_info()
+    info.update([p for _, p in chars])
+    search = SearchIndex()
+    for name, path in chars:
+        i = info.get(path)
+        search.add(name, (name, os.path.splitext(os.path.basename(path))[0], i.get("displayname"), i.get("name")))
+    for q in ("c", "ch", "cha", "fighter"):
+        results[f"search.{q}"] = measure(lambda: search.search(q), repeat=repeat)
+
+    from goselect.validate import Validator
+    results["validate"] = measure(lambda: Validator(tree).run(doc), repeat=repeat)
+
+    from goselect.music import MusicLibrary
+    music = MusicLibrary(tree, index_path("music.json"))
+    music.build()
+    results["music_index.warm"] = measure(lambda: MusicLibrary(tree, index_path("music.json")).build(), repeat=repeat)
+    results["music_complete"] = measure(lambda: [music.complete(q) for q in ("s", "track1", "sound/track05", "trk19")], repeat=repeat)
+
+    from goselect.rosterdiff import diff
+    edited = SelectDef.load(select)
+    for i in range(0, len(edited.slots), 97): edited.slots[i].set("order", "99")
+    edited.remove_slot(len(edited.slots) // 3)
+    results["backup_diff"] = measure(lambda: diff(doc, edited), repeat=repeat)
+
+    copy = os.path.join(work, "select.def")
+    def loaded(edit=False):
+        shutil.copy(select, copy)
+        d = SelectDef.load(copy)
+        if edit: d.slots[len(d.slots) // 2].set("order", "99")
+        return d
+    results["save_select_def.unchanged"] = measure(lambda d: d.save(), setup=loaded, repeat=repeat)
+    results["save_select_def.one_edit"] = measure(lambda d: d.save(), setup=lambda: loaded(True), repeat=repeat)
+    return results
+
+def start_xvfb():
+    """Start Xvfb on a free display; returns the process or None when it is not installed."""
+    exe = shutil.which("Xvfb")
+    if not exe: return None
+    for n in range(90, 110):
+        if os.path.exists(f"/tmp/.X{n}-lock"): continue
+        proc = subprocess.Popen([exe, f":{n}", "-screen", "0", "1600x900x24", "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(0.5)
+        if proc.poll() is None:
+            os.environ["DISPLAY"] = f":{n}"
+            return proc
+    return None
+
+def gui(tree, work, repeat):
+    """Time the Tk paths on a real (or virtual) display."""
+    import GO_Select
+    from GO_Select import GOSelect
+
+    class BenchApp(GOSelect):
+        # Keep the indexes in the work folder instead of next to go_select.ini
+        def index_path(self, filename): return os.path.join(work, filename)
+
+    # save_select_def reports through modal message boxes
+    GO_Select.messagebox.showinfo = lambda *a, **k: None
+    results = {}
+    created = []
+    def startup():
+        app = BenchApp(base_path=tree)
+        created.append(app)
+        app.cancel_scan()
+    results["startup"] = measure(startup, repeat=min(repeat, 3))
+    for app in created: app.destroy()
+    app = BenchApp(base_path=tree)
+    app.cancel_scan()
+    # Saves (and their backups) go to a copy, so the generated tree stays the same between runs
+    os.makedirs(os.path.join(work, "data"), exist_ok=True)
+    app.select_def_path = os.path.join(work, "data", "select.def")
+    app.data_dir = os.path.dirname(app.select_def_path)
+    shutil.copy(os.path.join(tree, "data", "select.def"), app.select_def_path)
+
+    def scan_queue():
+        return ContentIndex(os.path.join(work, "gui_index.json")), threading.Event(), queue.Queue()
+    results["scan_characters"] = measure(lambda a: app.scan_characters(*a), setup=scan_queue, repeat=repeat)
+    results["scan_stages"] = measure(lambda a: app.scan_stages(*a), setup=scan_queue, repeat=repeat)
+    results["load_data"] = measure(lambda: (app.load_data(), app.update_idletasks()), repeat=repeat)
+    results["refresh_grid"] = measure(lambda: (app.refresh_grid(), app.update_idletasks()), repeat=repeat)
+    results["refresh_extra_stages"] = measure(lambda: (app.refresh_extra_stages(), app.update_idletasks()), repeat=repeat)
+
+    def dirty():
+        app.slots[len(app.slots) // 2].set("order", str(random.randint(100, 999)))
+    results["save_select_def"] = measure(lambda _: app.save_select_def(), setup=dirty, repeat=repeat)
+    if app.backups and app.backups.worker: app.backups.worker.join()
+    app.destroy()
+    return results
+
+# --- Reporting ---
+def compare(old, new):
+    """Print old vs new; returns the names that got slower than REGRESSION allows."""
+    worse = []
+    for name, r in new["results"].items():
+        o = old["results"].get(name)
+        if not o: continue
+        ratio = r["min_s"] / o["min_s"] if o["min_s"] else 1.0
+        mark = ""
+        if ratio > 1 + REGRESSION and r["min_s"] - o["min_s"] > NOISE_S:
+            mark = "  REGRESSION"
+            worse.append(name)
+        print(f"{name:36} {o['min_s'] * 1000:10.2f} -> {r['min_s'] * 1000:10.2f} ms  x{ratio:5.2f}   {o['peak_kb']:>8} -> {r['peak_kb']:>8} KB{mark}")
+    return worse
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GO-Select on synthetic rosters")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--work", help="Folder for generated trees (reused between runs); default: a temp folder")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="Compare with an earlier --json file; exit 1 on regressions")
+    parser.add_argument("--no-gui", action="store_true", help="Skip the Tk benchmarks")
+    parser.add_argument("--xvfb", action="store_true", help="Run the Tk benchmarks under Xvfb when there is no display")
+    args = parser.parse_args(argv)
+
+    base = args.work or os.path.join(tempfile.gettempdir(), "go_select_bench")
+    tree = generate(os.path.join(base, f"{args.scale}-{args.seed}"), args.scale, args.seed)
+    work = tempfile.mkdtemp(prefix="run-", dir=base)
+    doc = SelectDef.load(os.path.join(tree, "data", "select.def"))
+    report = {
+        "scale": args.scale, "seed": args.seed,
+        "slots": len(doc.slots), "extra_stages": len(doc.extra_stages), "tree": TREE_VERSION,
+        "python": platform.python_version(), "platform": platform.platform(),
+        "revision": git_revision(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    xvfb = None
+    try:
+        results = {f"headless.{k}": v for k, v in headless(tree, work, args.repeat).items()}
+        if args.no_gui:
+            report["gui"] = "skipped"
+        else:
+            if args.xvfb and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"): xvfb = start_xvfb()
+            if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+                report["gui"] = "skipped: no display (install Xvfb and pass --xvfb)"
+            else:
+                results.update({f"gui.{k}": v for k, v in gui(tree, work, args.repeat).items()})
+                report["gui"] = "ran"
+    finally:
+        if xvfb: xvfb.terminate()
+        shutil.rmtree(work, ignore_errors=True)
+    try:
+        import resource
+        report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+    report["results"] = results
+
+    for name, r in results.items():
+        print(f"{name:36} min {r['min_s'] * 1000:10.2f} ms   median {r['median_s'] * 1000:10.2f} ms   peak {r['peak_kb']:>8} KB")
+    if report["gui"] != "ran": print(f"gui: {report['gui']}")
+    if args.json:
+        with open(args.json, 'w') as f: json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f: old = json.load(f)
+        if (old.get("scale"), old.get("seed"), old.get("tree")) != (args.scale, args.seed, TREE_VERSION):
+            print("warning: comparing runs made on different trees")
+        if compare(old, report): return 1
+    return 0
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "describe", "--always", "--dirty"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+"""GO-Select modules. GO_Select.py is the entry point; everything here except
+dialogs.py can be imported without a display."""
@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from collections import deque
+
+from goselect.trace import TRACE
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "backups.json"
+MANIFEST_VERSION = 1
+LEGACY_RE = re.compile(r"select_(\d{8}_\d{6})\.def$")
+
+# Retention defaults: the last N saves, plus one per day / per week going back this far
+KEEP_LAST = 20
+KEEP_DAYS = 14
+KEEP_WEEKS = 8
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def split_chunks(data, min_lines=8, max_lines=256):
+    """Cut a file into line-aligned chunks whose boundaries depend only on content.
+
+    A boundary falls after any line whose crc has its low 4 bits clear, so an
+    edit only changes the chunk it lands in; the chunks around it keep their
+    hashes and are shared with earlier snapshots.
+    """
+    chunk = []
+    for line in data.splitlines(keepends=True):
+        chunk.append(line)
+        if len(chunk) >= max_lines or (len(chunk) >= min_lines and zlib.crc32(line) & 15 == 0):
+            yield b"".join(chunk)
+            chunk = []
+    if chunk: yield b"".join(chunk)
+
+def retained(snapshots, keep_last=KEEP_LAST, keep_days=KEEP_DAYS, keep_weeks=KEEP_WEEKS, now=None):
+    """Return the ids to keep: the newest `keep_last`, then the newest of each recent day and week."""
+    now = now or time.time()
+    newest = sorted(snapshots, key=lambda s: s["time"], reverse=True)
+    keep = {s["id"] for s in newest[:keep_last]}
+    days, weeks = set(), set()
+    for s in newest:
+        age = now - s["time"]
+        t = time.localtime(s["time"])
+        day = time.strftime("%Y%m%d", t)
+        week = time.strftime("%G%V", t)
+        if age < keep_days * 86400 and day not in days:
+            days.add(day)
+            keep.add(s["id"])
+        if age < keep_weeks * 7 * 86400 and week not in weeks:
+            weeks.add(week)
+            keep.add(s["id"])
+    return keep
+
+_dir_locks = {}
+_dir_locks_lock = threading.Lock()
+
+def dir_lock(root):
+    """The lock for one backup folder, shared by every BackupStore opened on it."""
+    key = os.path.normcase(os.path.abspath(root))
+    with _dir_locks_lock:
+        return _dir_locks.setdefault(key, threading.Lock())
+
+class BackupStore:
+    """Content-addressed store of select.def snapshots.
+
+    Each snapshot is a list of chunk hashes in `backups.json`; chunks are
+    zlib-compressed under objects/ and shared by every snapshot that contains
+    them. A save identical to the newest snapshot is not stored again.
+    `submit()` does the work on a background thread so saving never waits on it.
+    """
+    def __init__(self, root, keep_last=KEEP_LAST, keep_days=KEEP_DAYS, keep_weeks=KEEP_WEEKS):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.path = os.path.join(root, MANIFEST_FILENAME)
+        self.keep_last, self.keep_days, self.keep_weeks = keep_last, keep_days, keep_weeks
+        self.snapshots = []
+        # Another store on the same folder (a second window, an old instance's worker) uses the same lock
+        self.io_lock = dir_lock(root)
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.worker = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION: self.snapshots = data.get("snapshots", [])
+        except (OSError, ValueError):
+            self.snapshots = []
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "snapshots": self.snapshots}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def object_path(self, h):
+        return os.path.join(self.objects, h[:2], h)
+
+    def _put_chunk(self, chunk):
+        h = digest(chunk)
+        p = self.object_path(h)
+        if not os.path.exists(p):
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            tmp = p + ".tmp"
+            with open(tmp, 'wb') as f: f.write(zlib.compress(chunk, 6))
+            os.replace(tmp, p)
+        return h
+
+    # --- Snapshots ---
+    @TRACE.traced("backup add", "backup")
+    def add(self, data, when=None):
+        """Store `data` as a snapshot; returns its id, or None if it matches the newest one."""
+        with self.io_lock:
+            # The manifest may have been written by another store since this one read it
+            self.load()
+            return self._add(data, when)
+
+    def _add(self, data, when=None, save=True):
+        when = when or time.time()
+        d = digest(data)
+        latest = max(self.snapshots, key=lambda s: s["time"], default=None)
+        if latest is not None and latest["digest"] == d: return None
+        chunks = [self._put_chunk(c) for c in split_chunks(data)]
+        sid = base = time.strftime("%Y%m%d_%H%M%S", time.localtime(when))
+        ids = {s["id"] for s in self.snapshots}
+        n = 2
+        while sid in ids:
+            sid = f"{base}_{n}"
+            n += 1
+        self.snapshots.append({"id": sid, "time": when, "digest": d, "size": len(data), "chunks": chunks})
+        if save: self._save()
+        return sid
+
+    def get(self, sid):
+        for s in self.snapshots:
+            if s["id"] == sid: return s
+        return None
+
+    def read(self, sid):
+        s = self.get(sid)
+        if s is None: raise KeyError(sid)
+        parts = []
+        for h in s["chunks"]:
+            with open(self.object_path(h), 'rb') as f: parts.append(zlib.decompress(f.read()))
+        data = b"".join(parts)
+        if digest(data) != s["digest"]: raise ValueError(f"backup {sid} is corrupt")
+        return data
+
+    def list(self):
+        return sorted(self.snapshots, key=lambda s: s["time"], reverse=True)
+
+    # --- Compaction ---
+    def import_legacy(self):
+        """Fold old full-copy backups (select_<timestamp>.def) into the store and delete them."""
+        try: names = sorted(n for n in os.listdir(self.root) if LEGACY_RE.match(n))
+        except OSError: return 0
+        if not names: return 0
+        done = []
+        for name in names:
+            p = os.path.join(self.root, name)
+            try:
+                with open(p, 'rb') as f: data = f.read()
+                when = time.mktime(time.strptime(LEGACY_RE.match(name).group(1), "%Y%m%d_%H%M%S"))
+            except (OSError, ValueError):
+                continue
+            self._add(data, when, save=False)
+            done.append(p)
+        self._save()
+        # Only remove the copies once the manifest that replaces them is on disk
+        for p in done:
+            try: os.remove(p)
+            except OSError: pass
+        return len(done)
+
+    def prune(self):
+        keep = retained(self.snapshots, self.keep_last, self.keep_days, self.keep_weeks)
+        if len(keep) == len(self.snapshots): return 0
+        before = len(self.snapshots)
+        self.snapshots = [s for s in self.snapshots if s["id"] in keep]
+        self._save()
+        return before - len(self.snapshots)
+
+    def collect_garbage(self):
+        """Delete chunk files no snapshot refers to any more."""
+        live = {h for s in self.snapshots for h in s["chunks"]}
+        removed = 0
+        try: buckets = os.listdir(self.objects)
+        except OSError: return 0
+        for b in buckets:
+            d = os.path.join(self.objects, b)
+            try: names = os.listdir(d)
+            except OSError: continue
+            for name in names:
+                if name in live: continue
+                try:
+                    os.remove(os.path.join(d, name))
+                    removed += 1
+                except OSError: pass
+        return removed
+
+    @TRACE.traced("backup compact", "backup")
+    def compact(self):
+        with self.io_lock:
+            self.load()
+            imported = self.import_legacy()
+            if self.prune() or imported: self.collect_garbage()
+
+    # --- Background ---
+    def submit(self, data, when=None):
+        """Queue a snapshot (plus compaction) for the background thread."""
+        with self.lock:
+            self.pending.append((data, when or time.time()))
+            if self.worker is None:
+                # Not a daemon: a backup still being written when the window closes is finished first
+                self.worker = threading.Thread(target=self._work, name="backups")
+                self.worker.start()
+
+    def _work(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.worker = None
+                    return
+                data, when = self.pending.popleft()
+            try:
+                self.add(data, when)
+                self.compact()
+            except Exception as e:
+                # A bad chunk or manifest fails this backup only; the worker carries on with the next one
+                log.error("Backup of select.def failed: %s", e)
+
+def retention(config):
+    """(keep_last, keep_days, keep_weeks) as set in go_select.ini."""
+    def get(key, default):
+        try: return max(0, config.getint("Options", key, fallback=default))
+        except ValueError: return default
+    return get("BackupKeepLast", KEEP_LAST), get("BackupKeepDays", KEEP_DAYS), get("BackupKeepWeeks", KEEP_WEEKS)
+
+def store_from_config(data_dir, config):
+    """Open data/GoSelect_Backups with the retention set in go_select.ini."""
+    return BackupStore(os.path.join(data_dir, "GoSelect_Backups"), *retention(config))
@@ -0,0 +1,95 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from goselect.defreader import read_section
+
+CHARINFO_FILENAME = "go_select_charinfo.json"
+CHARINFO_VERSION = 1
+
+def read_info(path):
+    """Read the [Info] section of a character .def into a dict with lower-case keys."""
+    return read_section(path, "info")
+
+def display_name(info, fallback):
+    return info.get("displayname") or info.get("name") or fallback
+
+class CharInfoIndex:
+    """In-memory table of every character's [Info] section, keyed by .def path.
+
+    Entries remember the mtime of the file they were read from and are re-read
+    only when it changes. The table is persisted next to the content index so a
+    warm start does not have to open any .def file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.table = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CHARINFO_VERSION: self.table = data.get("chars", {})
+        except (OSError, ValueError):
+            self.table = {}
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            data = {"version": CHARINFO_VERSION, "chars": dict(self.table)}
+            self.dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving character info: {e}")
+
+    def get(self, def_path):
+        """Cached info without touching the disk; {} when the file was never read."""
+        entry = self.table.get(def_path)
+        return entry[1] if entry else {}
+
+    def lookup(self, def_path):
+        """Info for one file, re-reading it if it changed since it was indexed."""
+        self.refresh_one(def_path)
+        return self.get(def_path)
+
+    def refresh_one(self, def_path):
+        try:
+            mtime = os.stat(def_path).st_mtime_ns
+            entry = self.table.get(def_path)
+            if entry and entry[0] == mtime: return False
+            info = read_info(def_path)
+        except OSError:
+            return False
+        with self.lock:
+            self.table[def_path] = [mtime, info]
+            self.dirty = True
+        return True
+
+    def update(self, def_paths, cancel=None, workers=8):
+        """Re-read every stale file in `def_paths` on a thread pool.
+
+        Returns the number of entries that changed. Entries for files that are no
+        longer in `def_paths` are dropped unless the run was cancelled.
+        """
+        def job(p):
+            if cancel is not None and cancel.is_set(): return False
+            return self.refresh_one(p)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            changed = sum(pool.map(job, def_paths))
+        if cancel is None or not cancel.is_set():
+            keep = set(def_paths)
+            with self.lock:
+                for p in [p for p in self.table if p not in keep]:
+                    del self.table[p]
+                    self.dirty = True
+        return changed
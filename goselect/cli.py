@@ -0,0 +1,297 @@
+"""Headless command-line interface: python GO_Select.py --headless <command> ..."""
+import os
+import sys
+import json
+import time
+import shlex
+import argparse
+
+from goselect.selectdef import SelectDef
+from goselect.game import find_select_def
+from goselect.config import read_config
+from goselect.trace import TRACE
+
+class CommandError(Exception):
+    pass
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="GO_Select.py --headless", description="Edit select.def without the GUI.")
+    parser.add_argument("--root", help="Game root folder (defaults to the saved MugenRoot, then the current folder)")
+    parser.add_argument("--profile", help="Use the paths of a profile saved in go_select.ini")
+    parser.add_argument("--select", help="select.def to edit (defaults to the one referenced by data/system.def)")
+    parser.add_argument("--dry-run", action="store_true", help="Apply the edits but do not write select.def")
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome/Perfetto trace of the run to FILE")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add_commands(sub)
+    
+    p = sub.add_parser("batch", help="Run one command per line from a file ('-' for stdin) and save once")
+    p.add_argument("file")
+    return parser
+
+def add_commands(sub):
+    p = sub.add_parser("list", help="Print the roster")
+    p.add_argument("--stages", action="store_true", help="List [ExtraStages] instead of characters")
+    p.add_argument("--json", action="store_true")
+    
+    p = sub.add_parser("add", help="Add a character (appended unless --slot is given)")
+    p.add_argument("char")
+    p.add_argument("--params", default=None)
+    p.add_argument("--slot", type=int)
+    
+    p = sub.add_parser("remove", help="Remove a character's slot(s)")
+    p.add_argument("target", help="Slot index or character name")
+    p.add_argument("--all", action="store_true", help="Remove every slot with this character")
+    p.add_argument("--keep-slot", action="store_true", help="Leave an empty slot instead of shifting the rest up")
+    
+    p = sub.add_parser("set-param", help="Set params on a slot or on every slot of a character; KEY= removes KEY")
+    p.add_argument("target", help="Slot index or character name")
+    p.add_argument("assignments", nargs="+", metavar="KEY=VALUE")
+    
+    p = sub.add_parser("add-stage", help="Append an [ExtraStages] entry (path plus optional params)")
+    p.add_argument("stage", nargs="+", metavar="PATH [KEY=VALUE ...]")
+    
+    p = sub.add_parser("remove-stage", help="Remove [ExtraStages] entries with this path")
+    p.add_argument("stage")
+    
+    sub.add_parser("validate", help="Report characters, stages and music that do not exist or differ in case")
+    
+    p = sub.add_parser("import", help="Install character and stage packs from .zip/.tar archives into chars/ and stages/")
+    p.add_argument("archives", nargs="+")
+    p.add_argument("--on-collision", choices=("skip", "rename", "overwrite"), default="skip",
+                   help="What to do when a character folder or stage file already exists (default: skip)")
+    p.add_argument("--place", action="store_true", help="Put the new characters into empty slots")
+    p.add_argument("--add-stages", action="store_true", help="Add the new stages to [ExtraStages]")
+    p.add_argument("--jobs", type=int, default=4, help="Archives extracted in parallel")
+    
+    sub.add_parser("backups", help="List the select.def backups, newest first")
+    
+    p = sub.add_parser("diff", help="Show slot, param and extra stage changes between a backup and select.def")
+    p.add_argument("backup", help="Backup id from `backups`, or 'latest'")
+    p.add_argument("--this-save", action="store_true", help="Show what the save that made this backup changed instead")
+    
+    p = sub.add_parser("restore", help="Put changes listed by `diff` back the way they were in the backup")
+    p.add_argument("backup", help="Backup id from `backups`, or 'latest'")
+    p.add_argument("changes", nargs="*", type=int, metavar="N", help="Numbers shown by `diff`")
+    p.add_argument("--all", action="store_true", help="Restore every change")
+
+def target_slots(doc, target):
+    if target.isdigit():
+        index = int(target)
+        if index >= len(doc.slots): raise CommandError(f"slot {index} does not exist ({len(doc.slots)} slots)")
+        return [index]
+    found = doc.find_slots(target)
+    if not found: raise CommandError(f"character not in roster: {target}")
+    return found
+
+def stage_path(line):
+    return line.split(',', 1)[0].strip()
+
+def cmd_list(doc, args, ctx):
+    if args.stages:
+        rows = [{"index": i, "stage": line} for i, line in enumerate(doc.extra_stages)]
+        if args.json: print(json.dumps(rows, indent=1))
+        else:
+            for r in rows: print(f"{r['index']}\t{r['stage']}")
+        return False
+    rows = [{"index": i, "char": s.char, "params": s.params} for i, s in enumerate(doc.slots)]
+    if args.json: print(json.dumps(rows, indent=1))
+    else:
+        for r in rows: print(f"{r['index']}\t{r['char']}\t{r['params']}")
+    return False
+
+def cmd_add(doc, args, ctx):
+    index = args.slot if args.slot is not None else len(doc.slots)
+    doc.set_slot(index, args.char, args.params if args.params is not None else ("" if args.slot is None else None))
+    return True
+
+def cmd_remove(doc, args, ctx):
+    indexes = target_slots(doc, args.target)
+    if not args.all: indexes = indexes[:1]
+    for i in sorted(indexes, reverse=True):
+        if args.keep_slot: doc.set_slot(i, "empty", "")
+        else: doc.remove_slot(i)
+    return True
+
+def cmd_set_param(doc, args, ctx):
+    updates = []
+    for a in args.assignments:
+        if '=' not in a: raise CommandError(f"expected KEY=VALUE, got {a!r}")
+        k, v = a.split('=', 1)
+        updates.append((k.strip().lower(), v.strip()))
+    for i in target_slots(doc, args.target):
+        slot = doc.slots[i]
+        for k, v in updates:
+            if k == "stage": slot.stages = (v,) if v else ()
+            else: slot.set(k, v)
+    return True
+
+def cmd_add_stage(doc, args, ctx):
+    # `add-stage stages/b.def music=x.mp3` and `add-stage "stages/b.def, music=x.mp3"` write the same line
+    parts = [p.strip().strip(",").strip() for p in args.stage]
+    doc.extra_stages.append(", ".join(p for p in parts if p))
+    return True
+
+def cmd_remove_stage(doc, args, ctx):
+    indexes = [i for i, l in enumerate(doc.extra_stages) if stage_path(l).lower() == args.stage.lower()]
+    for i in reversed(indexes): doc.remove_stage(i)
+    if not indexes: raise CommandError(f"stage not in [ExtraStages]: {args.stage}")
+    return True
+
+def cmd_validate(doc, args, ctx):
+    from goselect.validate import Validator
+    slots, stages = Validator(ctx["root"]).run(doc)
+    problems = [f"slot {i}: {msg}" for i, ps in slots.items() for _, msg in ps]
+    problems += [f"extra stage {i}: {msg}" for i, ps in stages.items() for _, msg in ps]
+    for p in problems: print(p)
+    print(f"{len(problems)} problem(s) in {len(doc.slots)} slots and {len(doc.extra_stages)} extra stages")
+    ctx["failed"] = bool(problems)
+    return False
+
+def cmd_import(doc, args, ctx):
+    from goselect import importer
+    chars_dir, stages_dir = os.path.join(ctx["root"], "chars"), os.path.join(ctx["root"], "stages")
+    packs = []
+    for path in args.archives:
+        try: packs.append(importer.inspect(path))
+        except importer.ArchiveError as e: raise CommandError(str(e))
+    for msg in importer.plan(packs, chars_dir, stages_dir, args.on_collision): print(msg)
+    for pack in packs:
+        msg = importer.ignored_message(pack)
+        if msg: print(f"warning: {msg}", file=sys.stderr)
+    if ctx.get("dry_run"):
+        items = [i for p in packs for i in p.items if not i.skip]
+        chars = [n for i in items if i.kind == "char" for n in i.entries()]
+        stages = [e[0] for i in items if i.kind == "stage" for e in i.entries()]
+    else:
+        importer.clean_staging(chars_dir)
+        result = importer.install(packs, chars_dir, stages_dir, workers=args.jobs)
+        for e in result.errors: print(f"error: {e}", file=sys.stderr)
+        if result.errors: ctx["failed"] = True
+        chars, stages = [n for n, _ in result.chars], [st for st, _ in result.stages]
+    print(f"{len(chars)} character(s) and {len(stages)} stage(s) from {len(packs)} archive(s)")
+    if args.place: doc.place_chars(chars)
+    if args.add_stages: doc.extra_stages.extend(stages)
+    return bool(args.place and chars or args.add_stages and stages)
+
+def backup_store(doc):
+    from goselect.backups import store_from_config
+    return store_from_config(os.path.dirname(doc.path), read_config())
+
+def backup_id(store, name):
+    snaps = store.list()
+    if not snaps: raise CommandError("there are no backups yet")
+    if name == "latest": return snaps[0]["id"]
+    if store.get(name) is None: raise CommandError(f"no backup {name!r}; see the `backups` command")
+    return name
+
+def cmd_backups(doc, args, ctx):
+    for s in backup_store(doc).list():
+        print(f"{s['id']}\t{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s['time']))}\t{s['size']} bytes")
+    return False
+
+def cmd_diff(doc, args, ctx):
+    from goselect.rosterdiff import BackupDiffs, rows
+    store = backup_store(doc)
+    sid = backup_id(store, args.backup)
+    diffs = BackupDiffs(store)
+    changes = diffs.introduced(sid, doc.path) if args.this_save else diffs.against_current(sid, doc)
+    for n, (text, _, _) in enumerate(rows(changes), 1): print(f"{n}\t{text}")
+    if not changes: print("no differences")
+    return False
+
+def cmd_restore(doc, args, ctx):
+    from goselect.rosterdiff import BackupDiffs, rows, restore
+    store = backup_store(doc)
+    found = rows(BackupDiffs(store).against_current(backup_id(store, args.backup), doc))
+    if args.all: picks = found
+    else:
+        if not args.changes: raise CommandError("give the change numbers shown by `diff`, or --all")
+        bad = [n for n in args.changes if not 1 <= n <= len(found)]
+        if bad: raise CommandError(f"no change {bad[0]} (diff lists {len(found)})")
+        picks = [found[n - 1] for n in sorted(set(args.changes))]
+    restore(doc, [(c, f) for _, c, f in picks])
+    print(f"restored {len(picks)} change(s)")
+    return bool(picks)
+
+COMMANDS = {
+    "list": cmd_list,
+    "add": cmd_add,
+    "remove": cmd_remove,
+    "set-param": cmd_set_param,
+    "add-stage": cmd_add_stage,
+    "remove-stage": cmd_remove_stage,
+    "validate": cmd_validate,
+    "import": cmd_import,
+    "backups": cmd_backups,
+    "diff": cmd_diff,
+    "restore": cmd_restore,
+}
+
+def run_batch(doc, path, ctx):
+    """Apply every command in the file to the same document; returns True if anything changed."""
+    sub_parser = argparse.ArgumentParser(prog="batch", add_help=False)
+    add_commands(sub_parser.add_subparsers(dest="command", required=True))
+    f = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    changed = False
+    try:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            try:
+                args = sub_parser.parse_args(shlex.split(line))
+                changed = COMMANDS[args.command](doc, args, ctx) or changed
+            except CommandError as e:
+                raise CommandError(f"line {n}: {e}")
+            except SystemExit:
+                raise CommandError(f"line {n}: invalid command: {line}")
+    finally:
+        if f is not sys.stdin: f.close()
+    return changed
+
+def resolve_paths(args):
+    root, select = args.root, args.select
+    if args.profile:
+        from goselect.profiles import profile_names, get_profile
+        config = read_config()
+        if args.profile not in profile_names(config): raise CommandError(f"no profile named {args.profile!r}")
+        saved_root, saved_select = get_profile(config, args.profile)
+        root = root or saved_root
+        select = select or saved_select or None
+    if not root:
+        config = read_config()
+        saved = config.get("Paths", "MugenRoot", fallback="")
+        root = saved if saved and os.path.exists(saved) else os.getcwd()
+    select = select or find_select_def(root)
+    return root, select
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try: return run(args)
+    finally:
+        if args.trace: TRACE.export(args.trace)
+
+def run(args):
+    try: root, select = resolve_paths(args)
+    except CommandError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not os.path.exists(select):
+        print(f"select.def not found: {select}", file=sys.stderr)
+        return 2
+    
+    with TRACE.span("load select.def", "load"): doc = SelectDef.load(select)
+    ctx = {"root": root, "failed": False, "dry_run": args.dry_run}
+    try:
+        with TRACE.span(args.command, "command"):
+            if args.command == "batch": changed = run_batch(doc, args.file, ctx)
+            else: changed = COMMANDS[args.command](doc, args, ctx)
+    except CommandError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+        
+    if changed and not args.dry_run:
+        with TRACE.span("write select.def", "io"): doc.save()
+    return 1 if ctx["failed"] else 0
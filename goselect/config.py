@@ -0,0 +1,16 @@
+import os
+import configparser
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCAL_CFG = os.path.join(APP_DIR, "go_select.ini")
+GLOBAL_DIR = os.path.join(os.getenv('APPDATA'), "GO-Select") if os.getenv('APPDATA') else os.path.expanduser("~/.config/GO-Select")
+GLOBAL_CFG = os.path.join(GLOBAL_DIR, "go_select.ini")
+
+def read_config(config=None):
+    """Read go_select.ini, preferring the local (portable) file over the global one."""
+    if config is None: config = configparser.ConfigParser()
+    if os.path.exists(LOCAL_CFG):
+        config.read(LOCAL_CFG)
+    elif os.path.exists(GLOBAL_CFG):
+        config.read(GLOBAL_CFG)
+    return config
@@ -0,0 +1,159 @@
+import os
+import json
+import threading
+
+INDEX_FILENAME = "go_select_index.json"
+INDEX_VERSION = 1
+
+def char_entry(rel_dir, file):
+    """Name a character the way select.def refers to it (`kfm` for chars/kfm/kfm.def)."""
+    rel = f"{rel_dir}/{file}" if rel_dir else file
+    folder = rel_dir.rsplit("/", 1)[-1]
+    fname = os.path.splitext(file)[0]
+    if rel_dir and "/" not in rel_dir and folder.lower() == fname.lower(): return folder
+    return rel
+
+def stage_entry(rel_dir, file):
+    """Return (select.def path, display name) for a stage .def."""
+    rel = f"{rel_dir}/{file}" if rel_dir else file
+    return f"stages/{rel}", os.path.splitext(file)[0]
+
+class ContentIndex:
+    """Persistent record of the .def files found under chars/ and stages/.
+
+    Every directory is stored with its mtime, the .def files directly inside it
+    and its subdirectories. Adding or removing an entry changes the mtime of the
+    directory that holds it, so a directory whose mtime is unchanged is reused
+    from the index instead of being listed again.
+    """
+    EXTENSIONS = (".def",)
+
+    def __init__(self, path):
+        self.path = path
+        self.roots = {}
+        self.dirty = False
+        # A cancelled scan may still be unwinding on its thread when the next one starts
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION: self.roots = data.get("roots", {})
+        except (OSError, ValueError):
+            self.roots = {}
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        if not self.dirty: return
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"version": INDEX_VERSION, "roots": self.roots}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Error saving content index: {e}")
+
+    @classmethod
+    def list_dir(cls, path, mtime):
+        defs, dirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        # Same as os.walk: symlinked directories are not followed
+                        if not entry.is_symlink(): dirs.append(entry.name)
+                    elif entry.name.lower().endswith(cls.EXTENSIONS):
+                        defs.append(entry.name)
+                except OSError:
+                    continue
+        return {"mtime": mtime, "defs": defs, "dirs": dirs}
+
+    def scan(self, top):
+        """Return [(rel_dir, def_file), ...] for every .def under `top`.
+
+        `rel_dir` uses '/' separators and is "" for files directly in `top`.
+        """
+        return [e for batch in self.iter_scan(top) for e in batch]
+
+    def iter_scan(self, top, cancel=None, batch_size=256):
+        """Like scan() but yields the results in batches as they are found.
+
+        Setting the `cancel` event stops the walk; the index for `top` is then
+        left as it was.
+        """
+        with self.lock:
+            key = os.path.normcase(os.path.abspath(top))
+            old = self.roots.get(key, {})
+            new = {}
+            batch = []
+            changed = False
+            stack = [""]
+            while stack:
+                if cancel is not None and cancel.is_set(): return
+                rel = stack.pop()
+                full = os.path.join(top, rel) if rel else top
+                try:
+                    mtime = os.stat(full).st_mtime_ns
+                    entry = old.get(rel)
+                    if entry is None or entry["mtime"] != mtime:
+                        entry = self.list_dir(full, mtime)
+                        changed = True
+                except OSError:
+                    continue
+                new[rel] = entry
+                for d in entry["defs"]: batch.append((rel, d))
+                for sub in entry["dirs"]: stack.append(f"{rel}/{sub}" if rel else sub)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch: yield batch
+            # Directories that disappeared also change the index
+            if changed or len(new) != len(old): self.dirty = True
+            self.roots[key] = new
+
+    def dirs(self, top):
+        """Return {rel_dir: mtime} for every directory indexed under `top`."""
+        with self.lock:
+            tree = self.roots.get(os.path.normcase(os.path.abspath(top)), {})
+            return {rel: e["mtime"] for rel, e in tree.items()}
+
+    def update_dirs(self, top, rels):
+        """Re-list only the directories in `rels`; returns (added, removed) as (rel_dir, def_file) lists.
+
+        New subdirectories are listed in full and vanished ones are dropped
+        with everything under them, so a renamed folder shows up as one
+        removal plus one addition.
+        """
+        added, removed = [], []
+        with self.lock:
+            tree = self.roots.setdefault(os.path.normcase(os.path.abspath(top)), {})
+            stack, seen = list(rels), set()
+            while stack:
+                rel = stack.pop()
+                if rel in seen: continue
+                seen.add(rel)
+                full = os.path.join(top, rel) if rel else top
+                old = tree.get(rel)
+                try: entry = self.list_dir(full, os.stat(full).st_mtime_ns)
+                except OSError: entry = None
+                if entry is None:
+                    prefix = rel + "/"
+                    for r in [r for r in tree if r == rel or r.startswith(prefix)]:
+                        removed.extend((r, d) for d in tree.pop(r)["defs"])
+                    continue
+                old_defs = set(old["defs"]) if old else set()
+                old_dirs = set(old["dirs"]) if old else set()
+                added.extend((rel, d) for d in entry["defs"] if d not in old_defs)
+                removed.extend((rel, d) for d in old_defs.difference(entry["defs"]))
+                tree[rel] = entry
+                for sub in old_dirs.symmetric_difference(entry["dirs"]):
+                    stack.append(f"{rel}/{sub}" if rel else sub)
+            self.dirty = True
+        return added, removed
@@ -0,0 +1,117 @@
+"""Section reader for MUGEN .def/.cfg files.
+
+Files are memory-mapped and searched for headers only as far as the wanted
+section: reading [Files] from a multi-megabyte motif stops at the next
+header. Every header passed on the way is recorded with
+its byte offsets, so a later lookup in the same file seeks straight to it
+(or carries on from where the last scan stopped). The encoding is guessed
+once per file from its first 64 KB - UTF-8, else Shift-JIS (cp932, common
+in MUGEN content), else Latin-1 - and only the section's own bytes are
+decoded. Decoding is strict: a section the guess cannot read moves the
+file on to the next encoding that can.
+
+Per-file state is cached until the file's size or mtime changes.
+"""
+import os
+import re
+import mmap
+import codecs
+import threading
+from collections import OrderedDict
+
+CACHE_LIMIT = 512
+SAMPLE_SIZE = 65536
+ENCODINGS = ("utf-8", "cp932", "latin-1")
+HEADER = re.compile(rb"^(?:\xef\xbb\xbf)?[ \t]*\[([^\]\r\n]*)", re.M)
+
+class DefFile:
+    def __init__(self, path, stamp):
+        self.path = path
+        self.stamp = stamp
+        self.encoding = None
+        self.sections = {}  # lower-case name -> [body start, body end or None while unknown]
+        self.scanned = 0  # headers before this offset are in `sections`
+        self.current = None  # the section `scanned` is inside of
+        self.lock = threading.Lock()
+
+    def detect(self, f):
+        sample = f.read(SAMPLE_SIZE)
+        if sample.startswith(codecs.BOM_UTF8): return "utf-8-sig"
+        for enc in ENCODINGS:
+            try:
+                # final=False: the sample may end in the middle of a character
+                codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+                return enc
+            except UnicodeDecodeError:
+                continue
+        return "latin-1"
+
+    def scan(self, data, want):
+        """Index headers from where the last scan stopped until `want` is complete (or EOF)."""
+        for m in HEADER.finditer(data, self.scanned):
+            eol = data.find(b"\n", m.end())
+            pos = len(data) if eol < 0 else eol + 1
+            name = m.group(1).decode("latin-1").strip().lower()
+            done = self.current == want
+            if self.current is not None: self.sections[self.current][1] = m.start()
+            # The first of two sections with the same name wins
+            if name in self.sections: self.current = None
+            else:
+                self.sections[name] = [pos, None]
+                self.current = name
+            self.scanned = pos
+            if done: return
+        if self.current is not None: self.sections[self.current][1] = len(data)
+        self.current = None
+        self.scanned = len(data)
+
+    def section_text(self, name):
+        name = name.lower()
+        with self.lock, open(self.path, "rb") as f:
+            if self.encoding is None: self.encoding = self.detect(f)
+            span = self.sections.get(name)
+            if span is None or span[1] is None:
+                if not self.stamp[0]: return None
+                # The header search runs over the mapped file; nothing is read that is not looked at
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data: self.scan(data, name)
+                span = self.sections.get(name)
+            if span is None: return None
+            f.seek(span[0])
+            return self.decode(f.read(span[1] - span[0]))
+
+    def decode(self, data):
+        # Non-ASCII text past the sample can prove the guess wrong; Latin-1 always decodes
+        later = ENCODINGS[ENCODINGS.index(self.encoding) + 1:] if self.encoding in ENCODINGS else ENCODINGS[1:]
+        for enc in (self.encoding, *later):
+            try: text = data.decode(enc)
+            except UnicodeDecodeError: continue
+            self.encoding = enc
+            return text
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def def_file(path):
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is None or entry.stamp != stamp:
+            entry = _cache[path] = DefFile(path, stamp)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_LIMIT: _cache.popitem(last=False)
+    return entry
+
+def parse_section(text):
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if '=' not in line or line.startswith(';'): continue
+        k, v = line.split('=', 1)
+        values[k.strip().lower()] = v.split(';', 1)[0].strip().strip('"')
+    return values
+
+def read_section(path, section):
+    """Read one [section] of a .def file into a dict with lower-case keys ({} if it has none)."""
+    text = def_file(path).section_text(section)
+    return parse_section(text) if text else {}
@@ -0,0 +1,594 @@
+import os
+import time
+import queue
+import threading
+import tkinter as tk
+import customtkinter as ctk
+from tkinter import messagebox
+from goselect.params import parse_params_string, build_params_string
+from goselect.charinfo import read_info
+from goselect.validate import OK, CASE, MISSING, is_music_key, music_path
+
+WARN_COLORS = {MISSING: "#d9534f", CASE: "#e0a030"}
+
+class ReusableDialog(ctk.CTkToplevel):
+    """A properties window that is built once and then hidden instead of destroyed.
+
+    `show()` rebinds it to the next item, so opening properties again only
+    refills the fields that exist.
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.withdraw()
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.hide)
+        self.on_save = None
+
+    def present(self):
+        self.deiconify()
+        self.lift()
+        self.focus_force()
+        self.grab_set()
+
+    def hide(self):
+        self.grab_release()
+        self.withdraw()
+
+class MusicCompleter:
+    """Track suggestions under the music entries of a dialog, and a warning for files that are not there.
+
+    The library comes from the main window's music_library(); until it has
+    finished indexing, entries get no suggestions and no warnings.
+    """
+    LIMIT = 12
+
+    def __init__(self, dialog, note):
+        self.dialog = dialog
+        self.note = note
+        self.entries = {}  # entry -> param key
+        self.status = {}  # entry -> OK/CASE/MISSING of its value
+        self.border = None
+        self.entry = None
+        self.matches = []
+        self.popup = None
+        self.waiting = False
+
+    def library(self):
+        get = getattr(self.dialog.master, "music_library", None)
+        return get() if get else None
+
+    def attach(self, entry, key):
+        self.entries[entry] = key
+        if self.border is None: self.border = entry.cget("border_color")
+        entry.bind("<KeyRelease>", lambda e: self.on_key(entry, e), add=True)
+        entry.bind("<Down>", lambda e: self.move(entry, 1), add=True)
+        entry.bind("<Up>", lambda e: self.move(entry, -1), add=True)
+        entry.bind("<Return>", lambda e: self.accept(), add=True)
+        entry.bind("<Escape>", lambda e: self.close(), add=True)
+        entry.bind("<FocusOut>", lambda e: self.dialog.after(100, self.on_blur), add=True)
+
+    # --- Suggestions ---
+    def on_key(self, entry, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"): return
+        self.check(entry)
+        self.refresh_note()
+        lib = self.library()
+        self.entry = entry
+        self.matches = lib.complete(entry.get(), self.LIMIT) if lib else []
+        if not self.matches or self.matches == [music_path(entry.get())]:
+            self.close()
+            return
+        self.show_popup(entry)
+
+    def show_popup(self, entry):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.dialog)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, activestyle="none", exportselection=False, takefocus=0)
+            self.listbox.pack(fill="both", expand=True)
+            self.info = tk.Label(self.popup, anchor="w", fg="gray40")
+            self.info.pack(fill="x")
+            self.listbox.bind("<<ListboxSelect>>", lambda e: self.show_info())
+            self.listbox.bind("<ButtonRelease-1>", lambda e: self.accept())
+        self.listbox.delete(0, "end")
+        for t in self.matches: self.listbox.insert("end", t)
+        self.listbox.configure(height=len(self.matches), width=max(40, max(len(t) for t in self.matches)))
+        self.listbox.selection_set(0)
+        self.show_info()
+        self.popup.geometry(f"+{entry.winfo_rootx()}+{entry.winfo_rooty() + entry.winfo_height()}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def show_info(self):
+        # Headers are only read for the track that is highlighted
+        from goselect.music import describe
+        sel = self.listbox.curselection()
+        lib = self.library()
+        self.info.configure(text=describe(lib.track_info(self.matches[sel[0]])) if sel and lib else "")
+
+    def move(self, entry, step):
+        if self.popup is None or not self.popup.winfo_viewable() or self.entry is not entry: return
+        sel = self.listbox.curselection()
+        i = max(0, min(len(self.matches) - 1, (sel[0] if sel else -1) + step))
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(i)
+        self.listbox.see(i)
+        self.show_info()
+        return "break"
+
+    def accept(self):
+        if self.popup is None or not self.popup.winfo_viewable() or self.entry is None: return
+        sel = self.listbox.curselection()
+        if sel:
+            # Volume/loop numbers typed after the path are kept
+            value = self.entry.get()
+            extra = value.split()[len(music_path(value).split()):]
+            set_entry(self.entry, " ".join([self.matches[sel[0]], *extra]))
+            self.entry.icursor("end")
+            self.check(self.entry)
+            self.refresh_note()
+        self.close()
+        return "break"
+
+    def close(self):
+        if self.popup is not None: self.popup.withdraw()
+
+    def on_blur(self):
+        focus = self.dialog.focus_get()
+        if self.popup is not None and focus is self.listbox: return
+        self.close()
+
+    # --- Warnings ---
+    def check(self, entry):
+        lib = self.library()
+        value = entry.get().strip()
+        status = self.status[entry] = lib.status(value) if lib and value else OK
+        entry.configure(border_color=WARN_COLORS.get(status, self.border))
+
+    def refresh_note(self):
+        problems = []
+        for entry, key in self.entries.items():
+            status, path = self.status.get(entry), music_path(entry.get().strip())
+            if status == MISSING: problems.append(f"{key}: {path} not found")
+            elif status == CASE: problems.append(f"{key}: {path} differs in case from the file on disk")
+        self.note.configure(text=problems[0] + (f" (+{len(problems) - 1} more)" if len(problems) > 1 else "") if problems else "")
+
+    def check_all(self):
+        """Mark every attached entry; retried until the library has been indexed."""
+        self.close()
+        lib = self.library()
+        for entry in self.entries: self.check(entry)
+        self.refresh_note()
+        if lib and lib.search is None and not self.waiting:
+            self.waiting = True
+            self.dialog.after(300, self.retry)
+
+    def retry(self):
+        self.waiting = False
+        if self.dialog.winfo_viewable(): self.check_all()
+
+def set_entry(entry, value):
+    entry.delete(0, "end")
+    if value: entry.insert(0, value)
+
+def load_char_info(full_path):
+    info = {}
+    if not full_path or not os.path.exists(full_path):
+        info["Status"] = "Definition file not found"
+        return info
+    if os.path.isdir(full_path):
+        info["Status"] = "Error: Path is a directory"
+        return info
+    try:
+        info.update(read_info(full_path))
+    except Exception as e:
+        info["Error"] = str(e)
+    return info
+
+class StagePropertiesDialog(ReusableDialog):
+    FIELDS = [
+        ("music", "Music", "sound/music.mp3"),
+        ("final.music", "Final Round Music", "sound/final.mp3"),
+        ("round1.music", "Round 1 Music", ""),
+        ("round2.music", "Round 2 Music", ""),
+        ("round3.music", "Round 3 Music", ""),
+        ("victory.music", "Victory Music", "sound/win.mp3"),
+        ("round.music", "Round Music (Generic)", ""),
+        ("life.music", "Low Life Music", ""),
+        ("order", "Order", "1"),
+        ("unlock", "Unlock (Lua)", "return true")
+    ]
+    MANAGED = ["music", "final.music", "victory.music", "life.music", "order", "unlock",
+               "round1.music", "round2.music", "round3.music"]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Stage Properties")
+        self.geometry("500x600")
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.main_frame = ctk.CTkScrollableFrame(self)
+        self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.entries = {}
+        
+        # Main Stage Path
+        lbl = ctk.CTkLabel(self.main_frame, text="Stage Path")
+        lbl.pack(pady=(5,0))
+        entry_path = ctk.CTkEntry(self.main_frame, width=300)
+        entry_path.pack(pady=5)
+        self.entries["path"] = entry_path
+        
+        self.note = ctk.CTkLabel(self, text="", text_color=WARN_COLORS[MISSING], wraplength=450)
+        self.music = MusicCompleter(self, self.note)
+        for key, label, example in self.FIELDS:
+            lbl = ctk.CTkLabel(self.main_frame, text=label)
+            lbl.pack(pady=(5,0))
+            entry = ctk.CTkEntry(self.main_frame, width=300, placeholder_text=example)
+            entry.pack(pady=2)
+            self.entries[key] = entry
+            if is_music_key(key): self.music.attach(entry, key)
+            
+        self.note.pack()
+        btn = ctk.CTkButton(self, text="Save", command=self.save)
+        btn.pack(pady=10)
+
+    def show(self, stage_line, on_save):
+        self.on_save = on_save
+        self.params_dict, self.positional = parse_params_string(stage_line)
+        set_entry(self.entries["path"], self.positional[0] if self.positional else "")
+        for key, _, _ in self.FIELDS: set_entry(self.entries[key], self.params_dict.get(key))
+        self.music.check_all()
+        self.present()
+
+    def save(self):
+        new_path = self.entries["path"].get().strip()
+        if not new_path:
+            messagebox.showerror("Error", "Stage path cannot be empty")
+            return
+            
+        new_positional = [new_path]
+        new_dict = self.params_dict.copy()
+        
+        for k in self.MANAGED:
+            if k in self.entries:
+                val = self.entries[k].get().strip()
+                if val: new_dict[k] = val
+                elif k in new_dict: del new_dict[k]
+                
+        result = build_params_string(new_dict, new_positional, self.MANAGED)
+        self.hide()
+        self.on_save(result)
+
+class CharPropertiesDialog(ReusableDialog):
+    """Slot properties. The Configure tab is built up front; Details and Music on first view.
+
+    [Info] details are looked up by the caller's `load_info` on a worker
+    thread and the Details tab fills in when they arrive; until then it
+    shows what the caller already had cached, or "Loading...".
+    """
+    STD_FIELDS = [
+        ("stage", "Stage Path", "stages/kfm.def"),
+        ("music", "Music Path", "sound/bgm.mp3"),
+        ("order", "Order", "1"),
+        ("ai", "AI Level", "1-8"),
+        ("vsscreen", "VS Screen (0/1)", "1"),
+        ("victoryscreen", "Victory Screen (0/1)", "1"),
+        ("rounds", "Rounds", "2"),
+        ("time", "Time (Seconds)", "-1"),
+        ("includestage", "Include Stage (0/1/-1)", "1")
+    ]
+    IKEMEN_FIELDS = [
+        ("single", "Single Mode (0/1)", "0"),
+        ("bonus", "Bonus Game (0/1)", "0"),
+        ("exclude", "Exclude (0/1)", "0"),
+        ("hidden", "Hidden (0/1/2/3)", "0"),
+        ("ordersurvival", "Survival Order", "1"),
+        ("arcadepath", "Arcade Path (Lua)", "data/arcade.lua"),
+        ("ratiopath", "Ratio Path (Lua)", "data/ratio.lua"),
+        ("unlock", "Unlock (Lua)", "true"),
+    ]
+    SLOT_FIELDS = [
+        ("select", "Select Command", "/s+a"),
+        ("next", "Next Command", "w"),
+        ("previous", "Previous Command", "d")
+    ]
+    MUSIC_FIELDS = [(f"round{i}.music", f"Round {i} Music") for i in range(1, 10)] + [
+        ("final.music", "Final Round Music"),
+        ("victory.music", "Victory Music"),
+        ("life.music", "Low Life Music"),
+        ("round.music", "Round Music (Generic)")
+    ]
+    MANAGED = ["music", "order", "ai", "rounds", "time", "vsscreen", "victoryscreen", "exclude", 
+               "single", "bonus", "includestage",
+               "hidden", "unlock", "arcadepath", "ratiopath", "ordersurvival",
+               "select", "next", "previous",
+               "final.music", "victory.music", "life.music", "round.music"] + [f"round{i}.music" for i in range(1, 10)]
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.geometry("650x700")
+        self.params_dict, self.stages_list = {}, []
+        self.char_info = {}
+        self.info_queue = queue.Queue()
+        self.info_token = 0
+        self.info_loading = False
+        self.details_rows = []
+        self.details_frame = None
+        self.music_built = False
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.tabview = ctk.CTkTabview(self, command=self.on_tab)
+        self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tab_config = self.tabview.add("Configure")
+        self.tab_details = self.tabview.add("Details")
+        self.tab_music = self.tabview.add("Music")
+        self.tabview.set("Configure")
+            
+        # Configure
+        config_frame = ctk.CTkScrollableFrame(self.tab_config)
+        config_frame.pack(fill="both", expand=True)
+        self.entries = {}
+        self.exclude_var = ctk.BooleanVar(value=False)
+        self.note = ctk.CTkLabel(self, text="", text_color=WARN_COLORS[MISSING], wraplength=450)
+        self.music = MusicCompleter(self, self.note)
+        
+        r=0
+        for title, fields in (("--- Standard Params ---", self.STD_FIELDS), ("--- Ikemen Params ---", self.IKEMEN_FIELDS),
+                              ("--- Slot Params (Inside 'slot={}') ---", self.SLOT_FIELDS)):
+            ctk.CTkLabel(config_frame, text=title, text_color="gray").grid(row=r,column=0,columnspan=2,pady=(5 if r == 0 else 10,5))
+            r+=1
+            for key, label, example in fields:
+                ctk.CTkLabel(config_frame, text=label).grid(row=r, column=0, sticky="w", padx=10, pady=2)
+                if key == "exclude":
+                    entry = ctk.CTkCheckBox(config_frame, text="Exclude", variable=self.exclude_var)
+                else:
+                    entry = ctk.CTkEntry(config_frame, width=250, placeholder_text=example)
+                    if is_music_key(key): self.music.attach(entry, key)
+                entry.grid(row=r, column=1, sticky="w", padx=10)
+                self.entries[key] = entry
+                r+=1
+
+        self.note.pack()
+        ctk.CTkButton(self, text="OK", command=self.save).pack(pady=10)
+
+    def on_tab(self):
+        tab = self.tabview.get()
+        if tab == "Details" and self.details_frame is None:
+            self.details_frame = ctk.CTkScrollableFrame(self.tab_details)
+            self.details_frame.pack(fill="both", expand=True)
+            self.fill_details()
+        elif tab == "Music" and not self.music_built:
+            self.build_music()
+
+    def build_music(self):
+        music_frame = ctk.CTkScrollableFrame(self.tab_music)
+        music_frame.pack(fill="both", expand=True)
+        for r, (key, label) in enumerate(self.MUSIC_FIELDS):
+            ctk.CTkLabel(music_frame, text=label).grid(row=r,column=0,sticky="w",padx=10,pady=5)
+            entry = ctk.CTkEntry(music_frame, width=300)
+            set_entry(entry, self.params_dict.get(key))
+            entry.grid(row=r,column=1,sticky="w",padx=10)
+            self.entries[key] = entry
+            self.music.attach(entry, key)
+        self.music_built = True
+        self.music.check_all()
+
+    def fill_details(self):
+        """Reuse the existing label pairs; only a longer [Info] section adds rows."""
+        if self.details_frame is None: return
+        items = list(self.char_info.items())
+        while len(self.details_rows) < len(items):
+            r = len(self.details_rows)
+            key = ctk.CTkLabel(self.details_frame, text="", font=("Arial",12,"bold"))
+            value = ctk.CTkLabel(self.details_frame, text="")
+            self.details_rows.append((key, value))
+            key.grid(row=r,column=0,sticky="w",padx=10)
+            value.grid(row=r,column=1,sticky="w",padx=10)
+        for r, (key, value) in enumerate(self.details_rows):
+            if r < len(items):
+                key.configure(text=items[r][0].capitalize())
+                value.configure(text=items[r][1])
+                key.grid()
+                value.grid()
+            else:
+                key.grid_remove()
+                value.grid_remove()
+
+    def show(self, char_name, params_dict, stages_list, on_save, load_info, cached=None):
+        self.title(f"Properties: {char_name}")
+        self.on_save = on_save
+        self.params_dict, self.stages_list = params_dict, stages_list
+        for key, entry in self.entries.items():
+            if key == "stage": set_entry(entry, ", ".join(self.stages_list))
+            elif key != "exclude": set_entry(entry, self.params_dict.get(key))
+        self.exclude_var.set(self.params_dict.get("exclude") == "1")
+        self.music.check_all()
+        # Results for a slot shown earlier are dropped by the token check
+        self.info_token += 1
+        self.char_info = cached or {"Status": "Loading..."}
+        threading.Thread(target=self.read_info, args=(self.info_token, load_info), daemon=True).start()
+        if not self.info_loading: self.after(30, self.poll_info)
+        self.info_loading = True
+        self.fill_details()
+        self.present()
+
+    def read_info(self, token, load_info):
+        # Always answer, or the poll loop would wait on "Loading..." forever
+        try: info = load_info()
+        except Exception as e: info = {"Error": str(e)}
+        self.info_queue.put((token, info))
+
+    def poll_info(self):
+        try:
+            while True:
+                token, info = self.info_queue.get_nowait()
+                if token != self.info_token or not self.info_loading: continue
+                self.char_info = info
+                self.info_loading = False
+                self.fill_details()
+        except queue.Empty:
+            pass
+        if self.info_loading: self.after(30, self.poll_info)
+
+    def save(self):
+        new_dict = self.params_dict.copy()
+        
+        if self.exclude_var.get():
+            new_dict["exclude"] = "1"
+        elif "exclude" in new_dict:
+            del new_dict["exclude"]
+            
+        for k in self.MANAGED:
+            if k == "exclude": continue
+            if k in self.entries:
+                val = self.entries[k].get().strip()
+                if val: new_dict[k] = val
+                elif k in new_dict: del new_dict[k]
+            
+        new_stages = []
+        stage_val = self.entries["stage"].get().strip()
+        if stage_val: new_stages.append(stage_val)
+        
+        self.hide()
+        self.on_save(new_dict, new_stages, self.MANAGED)
+
+class HistoryDialog(ReusableDialog):
+    """select.def backups, compared slot by slot with the roster being edited.
+
+    Picked rows are restored to the backup's version through `on_restore`;
+    everything else in the roster stays as it is.
+    """
+    MODES = ("Backup vs. now", "Changes made by this save")
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Backup History")
+        self.geometry("900x520")
+        self.diffs = None
+        self.doc = None
+        self.snaps = []
+        self.rows = []
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.mode = ctk.CTkSegmentedButton(self, values=list(self.MODES), command=lambda v: self.refresh())
+        self.mode.set(self.MODES[0])
+        self.mode.pack(pady=(10,5))
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=10)
+        # Plain listboxes: a diff of a large roster can run to thousands of rows
+        self.snap_list = tk.Listbox(body, width=24, exportselection=False, activestyle="none")
+        self.snap_list.pack(side="left", fill="y", padx=(0,5))
+        self.snap_list.bind("<<ListboxSelect>>", lambda e: self.refresh())
+        scroll = tk.Scrollbar(body)
+        scroll.pack(side="right", fill="y")
+        self.change_list = tk.Listbox(body, selectmode="extended", exportselection=False, activestyle="none", yscrollcommand=scroll.set)
+        self.change_list.pack(side="left", fill="both", expand=True)
+        scroll.configure(command=self.change_list.yview)
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=10, pady=10)
+        self.note = ctk.CTkLabel(bar, text="", anchor="w")
+        self.note.pack(side="left", fill="x", expand=True)
+        self.restore_button = ctk.CTkButton(bar, text="Restore Selected", command=self.restore)
+        self.restore_button.pack(side="right")
+
+    def show(self, store, doc, on_restore):
+        from goselect.rosterdiff import BackupDiffs
+        # Parsed backups and adjacent diffs are kept for as long as the store is the same
+        if self.diffs is None or self.diffs.store is not store: self.diffs = BackupDiffs(store)
+        self.doc, self.on_restore = doc, on_restore
+        self.snaps = store.list()
+        self.snap_list.delete(0, "end")
+        for snap in self.snaps:
+            self.snap_list.insert("end", time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snap["time"])))
+        if self.snaps: self.snap_list.selection_set(0)
+        self.refresh()
+        self.present()
+
+    def refresh(self):
+        from goselect.rosterdiff import rows
+        sel = self.snap_list.curselection()
+        self.change_list.delete(0, "end")
+        self.rows = []
+        if not sel: return
+        sid = self.snaps[sel[0]]["id"]
+        compare_now = self.mode.get() == self.MODES[0]
+        try:
+            changes = self.diffs.against_current(sid, self.doc) if compare_now else self.diffs.introduced(sid, self.doc.path)
+        except (OSError, ValueError) as e:
+            self.note.configure(text=f"Cannot read backup: {e}")
+            return
+        self.rows = rows(changes)
+        self.change_list.insert("end", *(text for text, _, _ in self.rows))
+        if compare_now: self.note.configure(text=f"{len(self.rows)} difference(s): backup -> now. Select rows to put the backup's version back.")
+        else: self.note.configure(text=f"{len(self.rows)} change(s) made by this save")
+        self.restore_button.configure(state="normal" if compare_now and self.rows else "disabled")
+
+    def restore(self):
+        picks = [self.rows[i][1:] for i in self.change_list.curselection()]
+        if not picks: return
+        self.on_restore(picks)
+        self.refresh()
+
+class OptionsDialog(ctk.CTkToplevel):
+    def __init__(self, parent, current_config, on_save):
+        super().__init__(parent)
+        self.title("Options")
+        self.geometry("400x470")
+        self.config = current_config
+        self.on_save = on_save
+        self.create_widgets()
+        self.transient(parent)
+        self.lift()
+        self.focus_force()
+        self.grab_set()
+        
+    def create_widgets(self):
+        self.tabview = ctk.CTkTabview(self)
+        self.tabview.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tab_adv = self.tabview.add("Advanced")
+        
+        # Options File
+        adv_frame = ctk.CTkFrame(self.tab_adv, fg_color="transparent")
+        adv_frame.pack(fill="x", padx=5, pady=5)
+        ctk.CTkLabel(adv_frame, text="Options file", font=("Arial", 12, "bold")).pack(anchor="w")
+        
+        val_local = self.config.getboolean("Options", "UseLocal", fallback=True)
+        self.var_local = ctk.BooleanVar(value=val_local)
+        ctk.CTkCheckBox(adv_frame, text="Use local options file", variable=self.var_local).pack(anchor="w", padx=10, pady=5)
+        
+        # Backups
+        ctk.CTkLabel(adv_frame, text="Backups", font=("Arial", 12, "bold")).pack(anchor="w", pady=(10,0))
+        val_bk = self.config.getboolean("Options", "Backup", fallback=True)
+        self.var_backup = ctk.BooleanVar(value=val_bk)
+        ctk.CTkCheckBox(adv_frame, text="Make a backup before every save", variable=self.var_backup).pack(anchor="w", padx=10, pady=5)
+        self.keep_vars = {}
+        for key, label, default in (("BackupKeepLast", "Keep last saves", 20), ("BackupKeepDays", "Keep one per day for (days)", 14), ("BackupKeepWeeks", "Keep one per week for (weeks)", 8)):
+            row = ctk.CTkFrame(adv_frame, fg_color="transparent")
+            row.pack(fill="x", padx=10, pady=2)
+            ctk.CTkLabel(row, text=label).pack(side="left")
+            var = ctk.StringVar(value=self.config.get("Options", key, fallback=str(default)))
+            ctk.CTkEntry(row, textvariable=var, width=60).pack(side="right")
+            self.keep_vars[key] = var
+
+        # Diagnostics
+        ctk.CTkLabel(adv_frame, text="Diagnostics", font=("Arial", 12, "bold")).pack(anchor="w", pady=(10,0))
+        self.var_trace = ctk.BooleanVar(value=self.config.getboolean("Options", "TraceOverlay", fallback=False))
+        ctk.CTkCheckBox(adv_frame, text="Show timing overlay in the status bar (F12)", variable=self.var_trace).pack(anchor="w", padx=10, pady=5)
+        if hasattr(self.master, "export_trace"):
+            ctk.CTkButton(adv_frame, text="Export trace...", width=120, command=self.master.export_trace).pack(anchor="w", padx=10, pady=2)
+
+        ctk.CTkButton(self, text="OK", command=self.save).pack(pady=10)
+        
+    def save(self):
+        if "Options" not in self.config: self.config["Options"] = {}
+        self.config["Options"]["UseLocal"] = str(self.var_local.get())
+        self.config["Options"]["Backup"] = str(self.var_backup.get())
+        self.config["Options"]["TraceOverlay"] = str(self.var_trace.get())
+        for key, var in self.keep_vars.items():
+            if var.get().strip().isdigit(): self.config["Options"][key] = var.get().strip()
+        self.on_save(self.config)
+        self.destroy()
@@ -0,0 +1,50 @@
+import os
+
+from goselect.defreader import read_section
+
+def find_select_def_from_system(system_def_path):
+    """Parse system.def to find the actual select.def path."""
+    try:
+        # Path is relative to game root, not system.def location
+        return read_section(system_def_path, "files").get("select") or None
+    except Exception as e:
+        print(f"Error parsing system.def: {e}")
+    return None
+
+def find_select_def(base_path):
+    """Locate select.def for a game root, honouring the select= entry of data/system.def."""
+    system_def = os.path.join(base_path, "data", "system.def")
+    if os.path.exists(system_def):
+        rel = find_select_def_from_system(system_def)
+        if rel and os.path.exists(os.path.join(base_path, rel)): return os.path.join(base_path, rel)
+    return os.path.join(base_path, "data", "select.def")
+
+def find_grid_dimensions(base_path, data_dir, rows=10, cols=10):
+    """Return (rows, columns) from the motif's [Select Info], or the given defaults."""
+    cfg_path = os.path.join(data_dir, "mugen.cfg")
+    motif_path = os.path.join(data_dir, "system.def")
+    if os.path.exists(cfg_path):
+        try:
+            p = read_section(cfg_path, "options").get("motif")
+            if p and os.path.exists(os.path.join(base_path, p)): motif_path = os.path.join(base_path, p)
+        except OSError: pass
+    if os.path.exists(motif_path):
+        try:
+            info = read_section(motif_path, "select info")
+            if "rows" in info: rows = int(info["rows"].split(",")[0].strip())
+            if "columns" in info: cols = int(info["columns"].split(",")[0].strip())
+        except (OSError, ValueError): pass
+    return rows, cols
+
+def find_char_def(chars_dir, char):
+    """Resolve a select.def character entry to its .def file, or None."""
+    path = os.path.join(chars_dir, char)
+    if os.path.isdir(path):
+        defi = os.path.join(path, os.path.basename(path)+".def")
+        if os.path.exists(defi): return defi
+    elif os.path.exists(path): return path
+    elif os.path.exists(path+".def"): return path+".def"
+    else:
+        std = os.path.join(chars_dir, char, char+".def")
+        if os.path.exists(std): return std
+    return None
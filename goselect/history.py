@@ -0,0 +1,139 @@
+from collections import deque
+from contextlib import contextmanager
+
+UNDO_LIMIT = 10000
+
+def slot_state(slot):
+    # Everything here is an interned string or a tuple shared with the slot, so a record is a few pointers
+    return (slot.char, slot.stages, slot.kv, slot.raw)
+
+def restore_slot(slot, state):
+    slot.char, slot.stages, slot.kv = state[0], state[1], state[2]
+    # Restoring the original text too keeps an undone line byte-identical (and the file unchanged)
+    slot.raw = state[3]
+
+def stage_state(entry):
+    return (entry, getattr(entry, "trivia", None))
+
+def restore_stage(state):
+    entry, trivia = state
+    if getattr(entry, "trivia", None) is not trivia: entry.trivia = trivia
+    return entry
+
+class History:
+    """Undo/redo journal for a SelectDef.
+
+    Edits are wrapped in `slot()`, `slots()` or `stages()`; each records only
+    the state of the slots, or the few [ExtraStages] entries, it touched,
+    before and after. Records made inside `transaction()` form a single undo
+    step. Undoing a step puts the "before" side back and reports what
+    changed as ("slot", index) / ("stages", index) so the caller can redraw
+    just that.
+    """
+    def __init__(self, doc, limit=UNDO_LIMIT):
+        self.doc = doc
+        self.undo_steps = deque(maxlen=limit)
+        self.redo_steps = []
+        self.open_step = None
+
+    def can_undo(self): return bool(self.undo_steps)
+    def can_redo(self): return bool(self.redo_steps)
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+
+    def push(self, record):
+        if self.open_step is not None:
+            self.open_step.append(record)
+            return
+        self.undo_steps.append((record,))
+        self.redo_steps.clear()
+
+    @contextmanager
+    def transaction(self):
+        """Group every record made inside the block into one undo step."""
+        if self.open_step is not None:
+            yield
+            return
+        self.open_step = []
+        try:
+            yield
+        finally:
+            step, self.open_step = tuple(self.open_step), None
+            if step:
+                self.undo_steps.append(step)
+                self.redo_steps.clear()
+
+    @contextmanager
+    def slots(self, indexes):
+        """Record a bulk edit of the given slots as one step."""
+        slots = self.doc.slots
+        length = len(slots)
+        indexes = sorted(set(indexes))
+        before = [slot_state(slots[i]) if i < length else None for i in indexes]
+        yield
+        with self.transaction():
+            for i, b in zip(indexes, before):
+                after = slot_state(slots[i]) if i < len(slots) else None
+                if b != after: self.push(("slot", i, b, after, length))
+
+    @contextmanager
+    def slot(self, index):
+        """Record the edit made to slot `index` inside the block (padding slots included)."""
+        slots = self.doc.slots
+        length = len(slots)
+        before = slot_state(slots[index]) if index < length else None
+        yield
+        after = slot_state(slots[index]) if index < len(slots) else None
+        if before != after: self.push(("slot", index, before, after, length))
+
+    @contextmanager
+    def stages(self, index):
+        """Record an [ExtraStages] edit at `index`: a set, an insert or a removal.
+
+        The entry after `index` is captured too, since a removal hands its
+        comments to the next entry (or to the section's tail).
+        """
+        stages, tails = self.doc.extra_stages, self.doc.tails
+        length = len(stages)
+        before = tuple(stage_state(e) for e in stages[index:index + 2])
+        tail = tuple(tails["stages"])
+        yield
+        n = len(before) + len(stages) - length
+        after = tuple(stage_state(e) for e in stages[index:index + n])
+        new_tail = tuple(tails["stages"])
+        if before != after or tail != new_tail:
+            # The tail is only kept when it changed
+            self.push(("stages", index, before, after, (tail, new_tail) if tail != new_tail else None))
+
+    def apply(self, record, undo):
+        kind, index = record[0], record[1]
+        if kind == "slot":
+            before, after, length = record[2], record[3], record[4]
+            slots = self.doc.slots
+            state = before if undo else after
+            # None on one side means the slot did not exist: the roster grew (padding) or shrank
+            if state is None: del slots[length if undo else index:]
+            else:
+                self.doc.set_slot(index, state[0])
+                restore_slot(slots[index], state)
+        else:
+            before, after, tail = record[2], record[3], record[4]
+            current, target = (after, before) if undo else (before, after)
+            self.doc.extra_stages[index:index + len(current)] = [restore_stage(s) for s in target]
+            if tail: self.doc.tails["stages"][:] = tail[0] if undo else tail[1]
+        return (kind, index)
+
+    def undo(self):
+        """Undo the last step; returns the places it touched (empty if there was nothing to undo)."""
+        if not self.undo_steps: return []
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return [self.apply(r, True) for r in reversed(step)]
+
+    def redo(self):
+        if not self.redo_steps: return []
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return [self.apply(r, False) for r in step]
@@ -0,0 +1,336 @@
+"""Install character and stage packs from .zip and .tar(.gz/.bz2/.xz) archives.
+
+`inspect()` works from the archive listing alone: a folder holding a .def
+next to .cmd/.cns/.air files is a character (with everything below it),
+any other folder with .def files is a stage (with the subfolders that hold
+no .def of their own), and an archive laid out like a game tree
+(chars/..., stages/...) installs its chars/ and stages/ parts. Files that
+fit none of these are listed in `Pack.ignored` so they can be reported.
+`install()` then streams the members straight to their destination on a
+thread pool, one archive per worker. A character folder is extracted into
+a staging folder next to chars/ and renamed into place once complete, so
+nothing half-written shows up in chars/. Stage files are written as .part
+files and renamed once the whole archive is out, so a cancelled or failed
+archive leaves nothing in stages/ either.
+"""
+import os
+import shutil
+import tarfile
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from goselect.content import char_entry, stage_entry
+
+COPY_CHUNK = 1 << 20
+CHAR_MARKERS = (".cmd", ".cns", ".air")
+STAGING_DIRNAME = ".go_select_import"
+ARCHIVE_TYPES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+COLLISION_POLICIES = ("skip", "rename", "overwrite")
+
+class ArchiveError(Exception):
+    pass
+
+class Item:
+    """One character folder, or the stage files of one folder, to install from an archive.
+
+    `files` maps archive member names to paths relative to the destination
+    folder (chars/<dest> for a character, stages/ for stages).
+    """
+    __slots__ = ("kind", "dest", "files", "defs", "size", "skip")
+
+    def __init__(self, kind, dest):
+        self.kind = kind
+        self.dest = dest
+        self.files = {}
+        self.defs = []
+        self.size = 0
+        self.skip = None
+
+    def entries(self):
+        """The select.def / [ExtraStages] names this item adds."""
+        if self.kind == "char":
+            # A folder with a .def named after it is picked by the folder name alone
+            named = [d for d in self.defs if "/" not in d and os.path.splitext(d)[0].lower() == self.dest.lower()]
+            return [char_entry(self.dest, d) for d in named or self.defs]
+        return [stage_entry(*d.rpartition("/")[::2]) for d in self.defs]
+
+class Pack:
+    def __init__(self, path, items, ignored=()):
+        self.path = path
+        self.items = items
+        self.ignored = list(ignored)  # member names that no item installs
+
+    @property
+    def size(self):
+        return sum(i.size for i in self.items if not i.skip)
+
+def ignored_message(pack, limit=3):
+    """One line naming the files of `pack` that will not be installed, or None."""
+    if not pack.ignored: return None
+    shown = ", ".join(pack.ignored[:limit])
+    more = f" and {len(pack.ignored) - limit} more" if len(pack.ignored) > limit else ""
+    return f"{os.path.basename(pack.path)}: not installed (outside any character or stage folder): {shown}{more}"
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_TYPES)
+
+def archive_stem(path):
+    name = os.path.basename(path)
+    for ext in sorted(ARCHIVE_TYPES, key=len, reverse=True):
+        if name.lower().endswith(ext): return name[:-len(ext)]
+    return os.path.splitext(name)[0]
+
+def clean_name(name):
+    """Archive member name with '/' separators, or None when it would land outside the target folder."""
+    name = name.replace("\\", "/")
+    while name.startswith("./"): name = name[2:]
+    parts = name.split("/")
+    if name.startswith("/") or ":" in parts[0] or ".." in parts: return None
+    return "/".join(p for p in parts if p)
+
+def listing(path):
+    """[(member name, size)] for the regular files in an archive."""
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                return [(i.filename, i.file_size) for i in zf.infolist() if not i.is_dir()]
+        with tarfile.open(path) as tf:
+            return [(m.name, m.size) for m in tf.getmembers() if m.isfile()]
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ArchiveError(f"{os.path.basename(path)}: {e}")
+
+def inspect(path):
+    """Work out what an archive installs without extracting anything."""
+    files = {}
+    for member, size in listing(path):
+        name = clean_name(member)
+        if name: files[name] = (member, size)
+    # A game-tree layout: everything under .../chars/<folder>/ and .../stages/
+    if any("chars" in p[:-2] or "stages" in p[:-1] for p in (n.lower().split("/") for n in files)):
+        items = tree_items(files)
+    else:
+        items = folder_items(files, path)
+    claimed = set(m for item in items for m in item.files)
+    return Pack(path, items, sorted(n for n, (member, _) in files.items() if member not in claimed))
+
+def folder_items(files, path):
+    by_dir = {}
+    for name in files:
+        folder, _, base = name.rpartition("/")
+        by_dir.setdefault(folder, []).append(base)
+    def_dirs = set(f for f, names in by_dir.items() if any(n.lower().endswith(".def") for n in names))
+    char_dirs = set(f for f in def_dirs if any(n.lower().endswith(CHAR_MARKERS) for n in by_dir[f]))
+    items = {}
+    for name, (member, size) in files.items():
+        parts = name.split("/")[:-1]
+        ancestors = ["/".join(parts[:k]) for k in range(len(parts) + 1)]
+        # The outermost character folder takes everything below it; other files
+        # belong to the nearest folder with a .def (a stage and its bg/, sound/...)
+        owner = next((a for a in ancestors if a in char_dirs), None)
+        if owner is None: owner = next((a for a in reversed(ancestors) if a in def_dirs), None)
+        if owner is None: continue
+        item = items.get(owner)
+        if item is None:
+            if owner in char_dirs:
+                item = items[owner] = Item("char", owner.rsplit("/", 1)[-1] if owner else archive_stem(path))
+            else:
+                # Stage files go straight into stages/, which is where their .def expects them
+                item = items[owner] = Item("stage", "")
+            item.defs = sorted(n for n in by_dir[owner] if n.lower().endswith(".def"))
+        add_file(item, member, name[len(owner) + 1:] if owner else name, size)
+    return [items[f] for f in sorted(items, key=lambda d: (d.count("/") if d else -1, d))]
+
+def tree_items(files):
+    chars, stage = {}, Item("stage", "")
+    for name, (member, size) in files.items():
+        parts = name.split("/")
+        lower = [p.lower() for p in parts]
+        if "chars" in lower[:-2]:
+            i = lower.index("chars")
+            folder = parts[i + 1]
+            item = chars.setdefault(folder, Item("char", folder))
+            rel = "/".join(parts[i + 2:])
+            add_file(item, member, rel, size)
+            if "/" not in rel and rel.lower().endswith(".def"): item.defs.append(rel)
+        elif "stages" in lower[:-1]:
+            rel = "/".join(parts[lower.index("stages") + 1:])
+            add_file(stage, member, rel, size)
+            if rel.lower().endswith(".def"): stage.defs.append(rel)
+    items = [i for i in chars.values() if i.defs]
+    if stage.defs: items.append(stage)
+    return items
+
+def add_file(item, member, rel, size):
+    item.files[member] = rel
+    item.size += size
+
+# --- Planning ---
+def plan(packs, chars_dir, stages_dir, on_collision="skip"):
+    """Decide where every item goes; returns a list of collision messages.
+
+    A character whose folder already exists (case-insensitively, since packs
+    are made on Windows) or is taken by an earlier pack in the same batch is
+    skipped, renamed to <name>_2, <name>_3, ... or overwritten. Stage items
+    collide on individual files. Planning again with another policy is fine.
+    """
+    existing = set(n.lower() for n in listdir(chars_dir))
+    batch = set()
+    stage_files = set()
+    existing_stages = {}
+    messages = []
+    for pack in packs:
+        for item in pack.items:
+            item.skip = None
+            if item.kind == "char":
+                name = item.dest.lower()
+                if name not in existing and name not in batch:
+                    batch.add(name)
+                    continue
+                if on_collision == "rename":
+                    n = 2
+                    while f"{name}_{n}" in existing or f"{name}_{n}" in batch: n += 1
+                    messages.append(f"{os.path.basename(pack.path)}: chars/{item.dest} exists, installing as chars/{item.dest}_{n}")
+                    item.dest = f"{item.dest}_{n}"
+                    batch.add(item.dest.lower())
+                elif on_collision == "overwrite" and name not in batch:
+                    # Only what was there before the import is replaced, never another pack of the same batch
+                    batch.add(name)
+                    messages.append(f"{os.path.basename(pack.path)}: replacing chars/{item.dest}")
+                else:
+                    item.skip = f"chars/{item.dest} already exists"
+                    messages.append(f"{os.path.basename(pack.path)}: skipped, {item.skip}")
+            else:
+                clash = []
+                for rel in item.files.values():
+                    folder, _, base = rel.rpartition("/")
+                    if folder not in existing_stages: existing_stages[folder] = set(n.lower() for n in listdir(os.path.join(stages_dir, folder)))
+                    if rel.lower() in stage_files or base.lower() in existing_stages[folder]: clash.append(rel)
+                if clash and on_collision != "overwrite":
+                    item.skip = f"stages/{clash[0]} already exists"
+                    messages.append(f"{os.path.basename(pack.path)}: skipped, {item.skip}")
+                    continue
+                if clash: messages.append(f"{os.path.basename(pack.path)}: replacing {len(clash)} file(s) in stages/")
+                stage_files.update(rel.lower() for rel in item.files.values())
+    return messages
+
+def listdir(path):
+    try: return os.listdir(path)
+    except OSError: return []
+
+# --- Extraction ---
+class ImportResult:
+    def __init__(self):
+        self.chars = []  # (select.def name, .def path)
+        self.stages = []  # (select.def path, display name)
+        self.char_dirs = []  # folders created under chars/
+        self.stage_dirs = set()  # folders under stages/ that received files
+        self.errors = []
+
+    def merge(self, other):
+        self.chars += other.chars
+        self.stages += other.stages
+        self.char_dirs += other.char_dirs
+        self.stage_dirs |= other.stage_dirs
+        self.errors += other.errors
+
+def install(packs, chars_dir, stages_dir, workers=4, progress=None, cancel=None):
+    """Extract every planned item; `progress(nbytes)` is called from the worker threads."""
+    def job(pack):
+        part = ImportResult()
+        try:
+            extract_pack(pack, chars_dir, stages_dir, part, progress, cancel)
+        except (OSError, zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            part.errors.append(f"{os.path.basename(pack.path)}: {e}")
+        return part
+    result = ImportResult()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(packs)))) as pool:
+        # Results are merged in archive order, whatever order the workers finish in
+        for part in pool.map(job, packs): result.merge(part)
+    return result
+
+def open_members(path):
+    """Yield (member name, file object) for the regular files, in archive order (sequential reads suit tar streams)."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if info.is_dir(): continue
+                with zf.open(info) as f: yield info.filename, f
+    else:
+        with tarfile.open(path) as tf:
+            for m in tf:
+                if not m.isfile(): continue
+                f = tf.extractfile(m)
+                if f is None: continue
+                with f: yield m.name, f
+
+def staging_dir(chars_dir):
+    # Next to chars/ rather than inside it, so neither the scan nor the watcher sees a half-written character,
+    # and on the same volume, so the final rename is a move and not a copy
+    return os.path.join(os.path.dirname(os.path.abspath(chars_dir)), STAGING_DIRNAME)
+
+def clean_staging(chars_dir):
+    """Remove what an import that crashed or was killed left behind."""
+    shutil.rmtree(staging_dir(chars_dir), ignore_errors=True)
+    # Older versions staged inside chars/ itself
+    for name in listdir(chars_dir):
+        if name.startswith(".") and ".importing-" in name:
+            shutil.rmtree(os.path.join(chars_dir, name), ignore_errors=True)
+
+def extract_pack(pack, chars_dir, stages_dir, result, progress, cancel):
+    targets = {}  # member -> (item, absolute destination)
+    staging = {}  # char item -> temporary folder
+    for item in pack.items:
+        if item.skip: continue
+        if item.kind == "char":
+            root = staging[item] = os.path.join(staging_dir(chars_dir), f"{item.dest}-{os.getpid()}-{threading.get_ident()}")
+        else:
+            root = stages_dir
+        for member, rel in item.files.items(): targets[member] = (item, os.path.join(root, *rel.split("/")))
+    if not targets: return
+    parts = {}  # stage file .part -> destination, renamed in only once the whole pack is out
+    try:
+        for member, src in open_members(pack.path):
+            if cancel is not None and cancel.is_set(): return
+            if member not in targets: continue
+            item, dest = targets[member]
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp = dest
+            if item.kind == "stage":
+                tmp = dest + ".part"
+                parts[tmp] = dest
+            with open(tmp, 'wb') as out:
+                while True:
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk: break
+                    out.write(chunk)
+                    if progress: progress(len(chunk))
+        if cancel is not None and cancel.is_set(): return
+        while parts:
+            tmp, dest = parts.popitem()
+            os.replace(tmp, dest)
+        for item in pack.items:
+            if item.skip: continue
+            if item.kind == "char":
+                final = os.path.join(chars_dir, item.dest)
+                if os.path.exists(final): shutil.rmtree(final)
+                os.replace(staging.pop(item), final)
+                result.char_dirs.append(item.dest)
+                result.chars.extend((name, char_def_path(final, item, name)) for name in item.entries())
+            else:
+                result.stages.extend(item.entries())
+                result.stage_dirs.update(rel.rpartition("/")[0] for rel in item.files.values())
+    finally:
+        # A cancelled or failed pack leaves nothing behind in stages/ either
+        for tmp in parts:
+            try: os.remove(tmp)
+            except OSError: pass
+        for tmp in staging.values(): shutil.rmtree(tmp, ignore_errors=True)
+        # Left in place while another worker still uses it
+        try: os.rmdir(staging_dir(chars_dir))
+        except OSError: pass
+
+def char_def_path(folder, item, name):
+    for d in item.defs:
+        if char_entry(item.dest, d) == name: return os.path.join(folder, *d.split("/"))
+    return os.path.join(folder, item.defs[0])
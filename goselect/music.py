@@ -0,0 +1,231 @@
+"""Index of the game's music for the music fields of the properties dialogs.
+
+The audio files under sound/ and stages/ are listed through a ContentIndex,
+so a refresh only re-lists folders whose mtime changed, and put in a
+SearchIndex for prefix and fuzzy completion. Codec, sample rate and
+duration are read from a file's first and last few KB the first time a
+track is looked at, and kept until the file changes.
+"""
+import os
+import struct
+import logging
+import threading
+
+from goselect.content import ContentIndex
+from goselect.search import SearchIndex
+from goselect.validate import OK, CASE, MISSING, music_path
+
+log = logging.getLogger(__name__)
+
+MUSIC_FILENAME = "go_select_music.json"
+AUDIO_TYPES = (".ogg", ".mp3", ".wav")
+MUSIC_DIRS = ("sound", "stages")
+HEAD_SIZE = 65536
+TAIL_SIZE = 65536
+
+class MusicIndex(ContentIndex):
+    EXTENSIONS = AUDIO_TYPES
+
+# --- Headers ---
+def wav_info(f):
+    head = f.read(12)
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE": return {}
+    info = {"codec": "WAV"}
+    byte_rate = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8: break
+        cid, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if cid == b"fmt ":
+            fmt = f.read(min(size, 16))
+            if len(fmt) < 16: break
+            tag, channels, rate, byte_rate = struct.unpack("<HHII", fmt[:12])
+            info.update(codec="WAV" if tag in (1, 0xFFFE) else f"WAV (format {tag})", channels=channels, rate=rate)
+            f.seek(size - 16 + (size & 1), 1)
+        elif cid == b"data":
+            if byte_rate: info["duration"] = size / byte_rate
+            break
+        else:
+            f.seek(size + (size & 1), 1)
+    return info
+
+def ogg_info(f, size):
+    head = f.read(HEAD_SIZE)
+    info, rate, skip = {}, 0, 0
+    if b"\x01vorbis" in head:
+        p = head.index(b"\x01vorbis") + 7
+        channels, rate = struct.unpack_from("<xxxxBI", head, p)
+        info = {"codec": "Vorbis", "channels": channels, "rate": rate}
+    elif b"OpusHead" in head:
+        p = head.index(b"OpusHead") + 8
+        channels, skip, input_rate = struct.unpack_from("<xBHI", head, p)
+        # Opus granule positions always count 48 kHz samples
+        rate = 48000
+        info = {"codec": "Opus", "channels": channels, "rate": input_rate or rate}
+    else:
+        return {}
+    f.seek(max(0, size - TAIL_SIZE))
+    tail = f.read(TAIL_SIZE)
+    p = tail.rfind(b"OggS")
+    if p >= 0 and p + 14 <= len(tail):
+        granule = struct.unpack_from("<q", tail, p + 6)[0]
+        if granule > 0: info["duration"] = max(0, granule - skip) / rate
+    return info
+
+MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_BITRATES[2, 3] = MP3_BITRATES[2, 2]
+MP3_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+def mp3_frame(head, p):
+    """(version, layer, bitrate kbps, sample rate, channels) of the frame header at `p`, or None."""
+    b1, b2, b3 = head[p + 1], head[p + 2], head[p + 3]
+    if head[p] != 0xFF or b1 & 0xE0 != 0xE0: return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((b1 >> 3) & 3)
+    layer = 4 - ((b1 >> 1) & 3)
+    br, sr = b2 >> 4, (b2 >> 2) & 3
+    if version is None or layer == 4 or br in (0, 15) or sr == 3: return None
+    bitrate = MP3_BITRATES[1 if version == 1 else 2, layer][br]
+    return version, layer, bitrate, MP3_RATES[version][sr], 1 if b3 >> 6 == 3 else 2
+
+def mp3_info(f, size):
+    head = f.read(HEAD_SIZE)
+    start = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        # Tag size is a 28-bit "syncsafe" integer
+        start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+        if start + 4 > len(head):
+            f.seek(start)
+            head, start = f.read(HEAD_SIZE), 0
+    p = start
+    while p + 4 <= len(head):
+        p = head.find(b"\xff", p)
+        if p < 0 or p + 4 > len(head): return {}
+        frame = mp3_frame(head, p)
+        if frame: break
+        p += 1
+    else:
+        return {}
+    version, layer, bitrate, rate, channels = frame
+    info = {"codec": f"MP{layer}", "channels": channels, "rate": rate, "bitrate": bitrate}
+    per_frame = 384 if layer == 1 else 1152 if layer == 2 or version == 1 else 576
+    # A VBR file says how many frames it has in a Xing/Info or VBRI header inside its first frame
+    frames = None
+    for tag in (b"Xing", b"Info"):
+        x = head.find(tag, p, p + 64)
+        if x >= 0 and x + 12 <= len(head) and head[x + 7] & 1:
+            frames = struct.unpack_from(">I", head, x + 8)[0]
+            break
+    x = head.find(b"VBRI", p, p + 64)
+    if frames is None and x >= 0 and x + 18 <= len(head):
+        frames = struct.unpack_from(">I", head, x + 14)[0]
+    if frames: info["duration"] = frames * per_frame / rate
+    elif bitrate: info["duration"] = (size - (f.tell() - len(head) + p)) * 8 / (bitrate * 1000)
+    return info
+
+def read_audio_info(path):
+    """{"codec", "rate", "channels", "duration"} read from the file's headers; {} when unknown."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if ext == ".wav": return wav_info(f)
+            if ext == ".ogg": return ogg_info(f, size)
+            if ext == ".mp3": return mp3_info(f, size)
+    except (OSError, struct.error, IndexError):
+        pass
+    return {}
+
+def describe(info):
+    parts = [info["codec"]] if info.get("codec") else []
+    if info.get("bitrate"): parts.append(f"{info['bitrate']} kbps")
+    if info.get("rate"): parts.append(f"{info['rate'] / 1000:g} kHz")
+    if info.get("channels"): parts.append({1: "mono", 2: "stereo"}.get(info["channels"], f"{info['channels']} ch"))
+    if info.get("duration") is not None:
+        secs = int(round(info["duration"]))
+        parts.append(f"{secs // 60}:{secs % 60:02d}")
+    return ", ".join(parts)
+
+# --- Library ---
+def track_keys(track):
+    # The file name is a key of its own so "bgm" ranks stages/x/bgm.ogg as a prefix match
+    return track, track.rsplit("/", 1)[-1]
+
+class MusicLibrary:
+    """The music of one game folder, as paths relative to it ("sound/bgm.mp3").
+
+    `complete()` and `status()` return nothing useful until the first
+    refresh() has finished; callers treat that as "don't know yet".
+    """
+    def __init__(self, root, index_path):
+        self.root = root
+        self.index = MusicIndex(index_path)
+        self.search = None
+        self.paths = {}  # lower-case path -> path as on disk
+        self.info = {}  # path -> ((size, mtime), header info)
+        self.thread = None
+
+    def refresh(self):
+        """Re-list the music folders on a worker thread; only folders that changed are read again."""
+        if self.thread is not None and self.thread.is_alive(): return
+        self.thread = threading.Thread(target=self.run, name="music-index", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            self.build()
+        except Exception as e:
+            # Completion and the music checks keep treating the library as "don't know yet"
+            log.error("Cannot list the music in sound/ and stages/: %s", e)
+
+    def build(self):
+        tracks = []
+        for top in MUSIC_DIRS:
+            full = os.path.join(self.root, top)
+            if not os.path.isdir(full): continue
+            for d, f in self.index.scan(full): tracks.append(f"{top}/{d}/{f}" if d else f"{top}/{f}")
+        self.index.save()
+        tracks.sort(key=str.lower)
+        search = SearchIndex()
+        for t in tracks: search.add(t, track_keys(t))
+        # Swapped in one go, so readers never see a half-built index
+        self.search, self.paths = search, {t.lower(): t for t in tracks}
+
+    def complete(self, text, limit=12):
+        """Tracks for a partly typed path: exact, prefix and substring matches first, then fuzzy ones."""
+        search = self.search
+        q = music_path(text).replace("\\", "/")
+        if search is None or not q: return []
+        hits = search.search(q)[:limit]
+        if len(hits) < limit:
+            seen = set(hits)
+            hits += [t for t in search.fuzzy(q, limit) if t not in seen][:limit - len(hits)]
+        return hits
+
+    def status(self, value):
+        """OK, CASE or MISSING for a music field's value (None while the library is loading)."""
+        if self.search is None: return None
+        path = music_path(value).replace("\\", "/")
+        while path.startswith("./"): path = path[2:]
+        # Bare file names are looked up in sound/, like the validator does
+        for candidate in (path,) if "/" in path else (path, "sound/" + path):
+            found = self.paths.get(candidate.lower())
+            if found: return OK if found == candidate else CASE
+        # Music outside sound/ and stages/ is not indexed
+        return OK if os.path.isfile(os.path.join(self.root, path)) else MISSING
+
+    def track_info(self, track):
+        full = os.path.join(self.root, *track.split("/"))
+        try: st = os.stat(full)
+        except OSError: return {}
+        stamp = (st.st_size, st.st_mtime_ns)
+        cached = self.info.get(track)
+        if cached and cached[0] == stamp: return cached[1]
+        info = read_audio_info(full)
+        self.info[track] = (stamp, info)
+        return info
@@ -0,0 +1,26 @@
+def parse_params_string(params_str):
+    d = {}
+    positional = []
+    if not params_str: return d, positional
+    
+    parts = params_str.split(',')
+    for p in parts:
+        p = p.strip()
+        if not p: continue
+        if '=' in p:
+            k, v = p.split('=', 1)
+            d[k.strip().lower()] = v.strip()
+        else:
+            positional.append(p)
+    return d, positional
+
+def ordered_params(kv_dict, managed_keys=()):
+    """(key, value) pairs in the order build_params_string writes them, without empty values."""
+    pairs = [(k, kv_dict[k]) for k in managed_keys if k in kv_dict and kv_dict[k]]
+    pairs.extend((k, v) for k, v in kv_dict.items() if k not in managed_keys and v)
+    return pairs
+
+def build_params_string(kv_dict, positional_list, managed_keys=[]):
+    parts = list(positional_list)
+    parts.extend(f"{k}={v}" for k, v in ordered_params(kv_dict, managed_keys))
+    return ", ".join(parts)
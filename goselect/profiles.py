@@ -0,0 +1,76 @@
+"""Named game installs ("profiles") kept in go_select.ini.
+
+Each profile is a [Profile <name>] section holding MugenRoot and SelectDef.
+[Paths] names the active profile and still carries its paths, so an ini
+written before profiles existed becomes a single "Default" profile.
+"""
+from collections import OrderedDict
+
+SECTION_PREFIX = "Profile "
+DEFAULT_PROFILE = "Default"
+WARM_PROFILES = 4
+
+def profile_names(config):
+    return [s[len(SECTION_PREFIX):] for s in config.sections() if s.startswith(SECTION_PREFIX)]
+
+def get_profile(config, name):
+    """(MugenRoot, SelectDef) of a profile; either may be empty."""
+    section = config[SECTION_PREFIX + name] if config.has_section(SECTION_PREFIX + name) else {}
+    return section.get("MugenRoot", ""), section.get("SelectDef", "")
+
+def set_profile(config, name, root, select_def):
+    section = SECTION_PREFIX + name
+    if not config.has_section(section): config.add_section(section)
+    config[section]["MugenRoot"] = root or ""
+    config[section]["SelectDef"] = select_def or ""
+
+def remove_profile(config, name):
+    config.remove_section(SECTION_PREFIX + name)
+
+def active_profile(config):
+    """The profile [Paths] points at, creating "Default" from the plain [Paths] entries when needed."""
+    paths = config["Paths"] if config.has_section("Paths") else {}
+    name = paths.get("Profile", "")
+    if name and config.has_section(SECTION_PREFIX + name): return name
+    names = profile_names(config)
+    if names and not paths.get("MugenRoot"): return names[0]
+    name = name or DEFAULT_PROFILE
+    set_profile(config, name, paths.get("MugenRoot", ""), paths.get("SelectDef", ""))
+    return name
+
+class WarmProfiles:
+    """In-memory state of recently used profiles, least recently used first.
+
+    Beyond `limit` the oldest entries are dropped, except those `is_dirty`
+    reports unsaved edits for: those stay until they are switched back to.
+    A stored state is not edited until it is taken back, so `is_dirty` is
+    asked once, when it is put.
+    """
+    def __init__(self, is_dirty, limit=WARM_PROFILES):
+        self.is_dirty = is_dirty
+        self.limit = limit
+        self.states = OrderedDict()
+        self.unsaved = set()
+
+    def __contains__(self, name):
+        return name in self.states
+
+    def put(self, name, state):
+        self.states[name] = state
+        self.states.move_to_end(name)
+        if self.is_dirty(state): self.unsaved.add(name)
+        else: self.unsaved.discard(name)
+        for old in list(self.states):
+            if len(self.states) <= self.limit: break
+            if old not in self.unsaved: del self.states[old]
+
+    def take(self, name):
+        self.unsaved.discard(name)
+        return self.states.pop(name, None)
+
+    def discard(self, name):
+        self.unsaved.discard(name)
+        self.states.pop(name, None)
+
+    def dirty(self):
+        return [name for name in self.states if name in self.unsaved]
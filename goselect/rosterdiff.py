@@ -0,0 +1,264 @@
+"""Slot- and param-level comparison of a roster with its backups.
+
+Slots and [ExtraStages] entries are aligned by key (the character name,
+the stage path), not by raw line: a common prefix and suffix are cut
+first, then entries whose key is unique on both sides anchor the match
+(the longest run of them in the same order), and what lies between two
+anchors is trimmed again and paired up by position. Every step is linear
+except the ordering of the anchors (n log n), so even 50k-line files
+compare in a fraction of a second.
+
+Pairs whose content differs become "changed" with a list of the fields
+(char, stage, params) that differ; the rest are "added" (only in the
+newer roster) or "removed" (only in the older one). restore() puts the
+older side of chosen changes back into a document without touching
+anything else.
+"""
+import os
+from bisect import bisect_left
+from contextlib import nullcontext
+from collections import OrderedDict
+
+from goselect.selectdef import SelectDef, Slot, slot_content
+
+DOC_CACHE = 8
+DIFF_CACHE = 64
+
+# --- Alignment ---
+def align(a, b):
+    """Pair up two key lists; returns [(i, j)] in order, with None for an unmatched side."""
+    n, m = len(a), len(b)
+    lo = 0
+    while lo < n and lo < m and a[lo] == b[lo]: lo += 1
+    hi_a, hi_b = n, m
+    while hi_a > lo and hi_b > lo and a[hi_a - 1] == b[hi_b - 1]:
+        hi_a -= 1
+        hi_b -= 1
+    pairs = [(i, i) for i in range(lo)]
+    anchors = unique_anchors(a, lo, hi_a, b, lo, hi_b)
+    i0, j0 = lo, lo
+    for i, j in anchors + [(hi_a, hi_b)]:
+        if i > i0 or j > j0: pair_gap(a, i0, i, b, j0, j, pairs)
+        if i < hi_a: pairs.append((i, j))
+        i0, j0 = i + 1, j + 1
+    pairs.extend((hi_a + k, hi_b + k) for k in range(n - hi_a))
+    return pairs
+
+def unique_anchors(a, a0, a1, b, b0, b1):
+    """(i, j) for keys found exactly once on each side, reduced to the longest increasing run."""
+    count_a, count_b = {}, {}
+    for i in range(a0, a1): count_a[a[i]] = i if a[i] not in count_a else None
+    for j in range(b0, b1): count_b[b[j]] = j if b[j] not in count_b else None
+    candidates = [(i, count_b[k]) for k, i in count_a.items()
+                  if i is not None and count_b.get(k) is not None]
+    candidates.sort()
+    # Longest increasing subsequence of the j's (patience sorting)
+    tails, tail_at, prev = [], [], [None] * len(candidates)
+    for n, (_, j) in enumerate(candidates):
+        k = bisect_left(tails, j)
+        if k: prev[n] = tail_at[k - 1]
+        if k == len(tails):
+            tails.append(j)
+            tail_at.append(n)
+        else:
+            tails[k], tail_at[k] = j, n
+    out, n = [], tail_at[-1] if tail_at else None
+    while n is not None:
+        out.append(candidates[n])
+        n = prev[n]
+    out.reverse()
+    return out
+
+def pair_gap(a, i0, i1, b, j0, j1, pairs):
+    """Align the entries between two anchors: equal ends first, then by position."""
+    while i0 < i1 and j0 < j1 and a[i0] == b[j0]:
+        pairs.append((i0, j0))
+        i0, j0 = i0 + 1, j0 + 1
+    tail = []
+    while i1 > i0 and j1 > j0 and a[i1 - 1] == b[j1 - 1]:
+        i1, j1 = i1 - 1, j1 - 1
+        tail.append((i1, j1))
+    common = min(i1 - i0, j1 - j0)
+    pairs.extend((i0 + k, j0 + k) for k in range(common))
+    pairs.extend((i, None) for i in range(i0 + common, i1))
+    pairs.extend((None, j) for j in range(j0 + common, j1))
+    pairs.extend(reversed(tail))
+
+# --- Changes ---
+class Change:
+    """One difference. `old`/`new` are indexes in the older/newer roster; `pos` is where
+    the entry sits (or would go back) in the newer one. `fields` lists (field, old, new)."""
+    __slots__ = ("section", "kind", "old", "new", "pos", "before", "after", "fields")
+
+    def __init__(self, section, kind, old, new, pos, before, after, fields=()):
+        self.section, self.kind = section, kind
+        self.old, self.new, self.pos = old, new, pos
+        self.before, self.after = before, after
+        self.fields = fields
+
+def slot_fields(a, b):
+    fields = []
+    if a.char != b.char: fields.append(("char", a.char, b.char))
+    if a.stages != b.stages: fields.append(("stage", ", ".join(a.stages), ", ".join(b.stages)))
+    old, new = dict(a.items()), dict(b.items())
+    for k in sorted(old.keys() | new.keys()):
+        if old.get(k) != new.get(k): fields.append((k, old.get(k, ""), new.get(k, "")))
+    return fields
+
+def stage_key(line):
+    return line.split(",", 1)[0].strip().lower()
+
+def diff_sections(old_items, new_items, key, section):
+    changes = []
+    pos = 0
+    for i, j in align([key(x) for x in old_items], [key(x) for x in new_items]):
+        if j is not None: pos = j + 1
+        if i is None:
+            changes.append(Change(section, "added", None, j, j, None, new_items[j]))
+        elif j is None:
+            changes.append(Change(section, "removed", i, None, pos, old_items[i], None))
+        elif section == "slot":
+            old_slot, new_slot = old_items[i], new_items[j]
+            # Lines read from the same text are the same slot; most of a roster is skipped here
+            if old_slot.raw is not None and old_slot.raw == new_slot.raw: continue
+            if slot_content(old_slot) == slot_content(new_slot): continue
+            fields = slot_fields(old_items[i], new_items[j])
+            if fields: changes.append(Change(section, "changed", i, j, j, old_items[i], new_items[j], fields))
+        elif str(old_items[i]) != str(new_items[j]):
+            changes.append(Change(section, "changed", i, j, j, old_items[i], new_items[j]))
+    return changes
+
+def diff(old, new):
+    """Changes that lead from SelectDef `old` to SelectDef `new`."""
+    return (diff_sections(old.slots, new.slots, lambda s: s.char.lower(), "slot")
+            + diff_sections(old.extra_stages, new.extra_stages, stage_key, "stage"))
+
+def rows(changes):
+    """[(text, change, field)] one line per restorable unit: a field of a changed slot, or a whole entry."""
+    out = []
+    for c in changes:
+        if c.section == "stage":
+            if c.kind == "added": out.append((f"extra stage {c.new}: + {c.after}", c, None))
+            elif c.kind == "removed": out.append((f"extra stage {c.pos}: - {c.before}", c, None))
+            else: out.append((f"extra stage {c.new}: {c.before} -> {c.after}", c, None))
+        elif c.kind == "added":
+            out.append((f"slot {c.new}: + {c.after.line()}", c, None))
+        elif c.kind == "removed":
+            out.append((f"slot {c.pos}: - {c.before.line()}", c, None))
+        else:
+            for field in c.fields:
+                name, a, b = field
+                out.append((f"slot {c.new} {c.after.char}: {name} {a or '(none)'} -> {b or '(none)'}", c, field))
+    return out
+
+# --- Restore ---
+def restore(doc, picks, history=None):
+    """Put the older side of the picked (change, field) rows back into `doc`.
+
+    Changes must come from diff(backup, doc). Slots are rebuilt in one pass
+    and written back with assign_slots(); stage lines are edited one by
+    one from the end so the earlier positions stay valid. With a History,
+    everything is one undo step. Returns the slot indexes and stage
+    positions touched.
+    """
+    contents = [slot_content(s) for s in doc.slots]
+    slot_picks = [(c, f) for c, f in picks if c.section == "slot"]
+    stage_picks = [c for c, _ in picks if c.section == "stage"]
+    # Field edits first: they do not move anything
+    for c, field in slot_picks:
+        if c.kind != "changed": continue
+        if field is None: contents[c.new] = slot_content(c.before)
+        else: contents[c.new] = restore_field(contents[c.new], c.before, field[0])
+    for c, _ in sorted(slot_picks, key=order, reverse=True):
+        if c.kind == "removed": contents.insert(c.pos, slot_content(c.before))
+        elif c.kind == "added": del contents[c.new]
+    touched = [i for i in range(max(len(contents), len(doc.slots)))
+               if i >= len(contents) or i >= len(doc.slots) or contents[i] != slot_content(doc.slots[i])]
+    stage_touched = []
+    with history.transaction() if history else nullcontext():
+        if touched:
+            with history.slots(touched) if history else nullcontext(): doc.assign_slots(contents)
+        for c in sorted(set(stage_picks), key=lambda c: order((c, None)), reverse=True):
+            index = c.new if c.kind != "removed" else c.pos
+            with history.stages(index) if history else nullcontext():
+                if c.kind == "changed": doc.set_stage(index, str(c.before))
+                elif c.kind == "added": doc.remove_stage(index)
+                else: doc.extra_stages.insert(index, str(c.before))
+            stage_touched.append(index)
+    return touched, stage_touched
+
+def order(pick):
+    # From the end backwards; at one position, the entry there goes before what is put back in front of it
+    c = pick[0]
+    return (c.pos, c.kind != "removed", c.old if c.old is not None else -1)
+
+def restore_field(content, before, name):
+    slot = Slot()
+    slot.char, slot.stages = content[:2]
+    slot.kv = content[2]
+    if name == "char": slot.char = before.char
+    elif name == "stage": slot.stages = before.stages
+    else: slot.set(name, before.get(name, ""))
+    return slot_content(slot)
+
+# --- Backups ---
+class BackupDiffs:
+    """Parsed backups and the diffs between adjacent ones, made on first use.
+
+    A snapshot is select.def as it was just before a save (the old file is
+    stored, then the new one written), so what a save wrote is the next
+    newer snapshot, or for the newest one the file on disk. Snapshots never
+    change once written, so results are cached by digest and stay valid
+    however the store is pruned.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.docs = OrderedDict()
+        self.diffs = OrderedDict()
+        self.saved_doc = None  # ((path, size, mtime), SelectDef)
+
+    def doc(self, sid):
+        d = self.store.get(sid)["digest"]
+        doc = self.docs.get(d)
+        if doc is None:
+            doc = self.docs[d] = SelectDef.from_bytes(self.store.read(sid))
+            while len(self.docs) > DOC_CACHE: self.docs.popitem(last=False)
+        self.docs.move_to_end(d)
+        return doc
+
+    def saved(self, path):
+        """select.def as on disk, parsed again only when the file changes."""
+        st = os.stat(path)
+        stamp = (path, st.st_size, st.st_mtime_ns)
+        if self.saved_doc is None or self.saved_doc[0] != stamp: self.saved_doc = (stamp, SelectDef.load(path))
+        return self.saved_doc
+
+    def newer(self, sid):
+        """The snapshot saved just after `sid`, or None for the newest."""
+        ids = [s["id"] for s in self.store.list()]
+        i = ids.index(sid)
+        return ids[i - 1] if i else None
+
+    def against_current(self, sid, doc):
+        """What changed from backup `sid` to the roster in memory (not cached: the roster moves)."""
+        return diff(self.doc(sid), doc)
+
+    def introduced(self, sid, path):
+        """What the save that made `sid` wrote to select.def at `path`.
+
+        When backups in between were pruned, that includes the saves made
+        since then as well.
+        """
+        newer = self.newer(sid)
+        if newer is None:
+            stamp, after = self.saved(path)
+            key = (self.store.get(sid)["digest"], stamp)
+        else:
+            after = None
+            key = (self.store.get(sid)["digest"], self.store.get(newer)["digest"])
+        changes = self.diffs.get(key)
+        if changes is None:
+            changes = self.diffs[key] = diff(self.doc(sid), after or self.doc(newer))
+            while len(self.diffs) > DIFF_CACHE: self.diffs.popitem(last=False)
+        self.diffs.move_to_end(key)
+        return changes
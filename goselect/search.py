@@ -0,0 +1,103 @@
+def ngrams(s, n):
+    return {s[i:i+n] for i in range(len(s) - n + 1)}
+
+def key_grams(keys):
+    grams = set()
+    for k in keys:
+        grams.update(k)
+        grams.update(ngrams(k, 2))
+        grams.update(ngrams(k, 3))
+    return grams
+
+def is_subsequence(q, key):
+    it = iter(key)
+    return all(c in it for c in q)
+
+class SearchIndex:
+    """N-gram index over the search keys of a list of items.
+
+    Every item has one or more keys (folder name, def name, display name...),
+    also kept joined into one string with a separator around each key. A
+    query walks the shortest posting list of its one-, two- or three-letter
+    grams and checks each item with plain substring tests on that string:
+    "\0q\0" is an exact match, "\0q" a prefix match, "q" a substring match.
+    Posting lists are kept in the order the items were added, so results
+    come out ranked exact, prefix, substring and, within each rank, in that
+    order without sorting; adding the items pre-sorted gives sorted results.
+    """
+    def __init__(self):
+        self.items = []
+        self.keys = []
+        self.joined = []
+        self.grams = {}
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, item, keys):
+        idx = len(self.items)
+        keys = tuple({k.lower() for k in keys if k})
+        self.items.append(item)
+        self.keys.append(keys)
+        self.joined.append("\0" + "\0".join(keys) + "\0")
+        self.positions[item] = idx
+        for g in key_grams(keys):
+            self.grams.setdefault(g, []).append(idx)
+
+    def remove(self, item):
+        """Drop an item from every posting list; its slot stays behind as an unused hole."""
+        idx = self.positions.pop(item, None)
+        if idx is None: return
+        keys = self.keys[idx]
+        for g in key_grams(keys): self.grams[g].remove(idx)
+        self.keys[idx] = ()
+        self.joined[idx] = ""
+
+    def candidates(self, q):
+        if len(q) <= 3: return self.grams.get(q, ())
+        shortest = None
+        for g in ngrams(q, 3):
+            lst = self.grams.get(g)
+            if not lst: return ()
+            if shortest is None or len(lst) < len(shortest): shortest = lst
+        return shortest
+
+    def search(self, query):
+        q = query.strip().lower()
+        if not q: return [self.items[i] for i in sorted(self.positions.values())]
+        if "\0" in q: return []
+        joined = self.joined
+        prefix, exact = "\0" + q, "\0" + q + "\0"
+        first, second, third = [], [], []
+        for i in self.candidates(q):
+            s = joined[i]
+            if prefix in s: (first if exact in s else second).append(i)
+            elif q in s: third.append(i)
+        items = self.items
+        return [items[i] for i in first] + [items[i] for i in second] + [items[i] for i in third]
+
+    def fuzzy(self, query, limit=None):
+        """Items with a key holding the query's characters in order ("kfmth" finds "kfm_theme").
+
+        Only items containing every character of the query are checked;
+        shorter matching keys rank first.
+        """
+        q = query.strip().lower()
+        if not q: return []
+        lists = []
+        for c in set(q):
+            lst = self.grams.get(c)
+            if not lst: return []
+            lists.append(lst)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for lst in lists[1:]:
+            candidates.intersection_update(lst)
+            if not candidates: return []
+        ranked = []
+        for i in candidates:
+            best = min((len(k) for k in self.keys[i] if is_subsequence(q, k)), default=None)
+            if best is not None: ranked.append((best, i))
+        ranked.sort()
+        return [self.items[i] for _, i in ranked[:limit]]
@@ -0,0 +1,343 @@
+import os
+import sys
+import hashlib
+from goselect.params import parse_params_string, ordered_params
+
+SPECIAL_CHARS = ("", "empty", "randomselect")
+
+# Placeholders in SelectDef.layout for where the entries of each section go
+CHARS = object()
+STAGES = object()
+
+def split_comment(line):
+    """Return the trailing '; comment' of a raw line without its line ending, or None."""
+    if ';' not in line: return None
+    return line[line.index(';'):].rstrip("\r\n")
+
+class Slot:
+    """One [Characters] entry.
+
+    Params are kept pre-parsed: `stages` holds the positional entries and `kv`
+    the key=value pairs as a flat (key, value, key, value, ...) tuple. Keys and
+    values are interned, since the same few repeat across a whole roster. The
+    params string is only built when something asks for it.
+
+    `raw` is the line exactly as it was read (or last written) and is dropped
+    as soon as the slot changes, which is what marks the line dirty. `trivia`
+    is None or (comment/blank lines above the entry, trailing comment).
+    """
+    __slots__ = ("_char", "_stages", "kv", "raw", "trivia")
+
+    def __init__(self, char="empty", params=""):
+        self._char = sys.intern(char)
+        self._stages = ()
+        self.kv = ()
+        self.raw = None
+        self.trivia = None
+        if params: self.params = params
+
+    @property
+    def char(self): return self._char
+
+    @char.setter
+    def char(self, value):
+        self._char = sys.intern(value)
+        self.raw = None
+
+    @property
+    def stages(self): return self._stages
+
+    @stages.setter
+    def stages(self, value):
+        self._stages = tuple(sys.intern(s) for s in value)
+        self.raw = None
+
+    @property
+    def params(self):
+        parts = list(self._stages)
+        parts.extend(f"{k}={v}" for k, v in self.items())
+        return ", ".join(parts)
+
+    @params.setter
+    def params(self, text):
+        kv, positional = parse_params_string(text)
+        self.set_params(kv, positional)
+
+    def set_params(self, kv_dict, stages, managed_keys=()):
+        self.stages = stages
+        self.kv = tuple(sys.intern(x) for pair in ordered_params(kv_dict, managed_keys) for x in pair)
+
+    def items(self):
+        return zip(self.kv[::2], self.kv[1::2])
+
+    def get(self, key, default=None):
+        for k, v in self.items():
+            if k == key: return v
+        return default
+
+    def set(self, key, value):
+        """Set one param in place; an empty value removes it."""
+        kv = dict(self.items())
+        key = key.lower()
+        if value: kv[key] = value
+        else: kv.pop(key, None)
+        self.set_params(kv, self._stages)
+
+    def is_special(self):
+        return self._char.lower() in SPECIAL_CHARS
+
+    def line(self):
+        c = self._char if self._char else "empty"
+        params = self.params
+        return f"{c}, {params}" if params else c
+
+    def render(self, newline):
+        if self.trivia: yield from self.trivia[0]
+        if self.raw is None:
+            # Dirty line: rebuild it, keeping any trailing comment
+            comment = self.trivia[1] if self.trivia else None
+            self.raw = (f"{self.line()} {comment}" if comment else self.line()) + newline
+        yield self.raw
+
+def slot_content(slot):
+    return (slot.char, slot.stages, slot.kv)
+
+class StageEntry(str):
+    """An [ExtraStages] line as read from the file.
+
+    It compares and behaves as its content (comment stripped), and remembers
+    the original text and surrounding comments so an untouched entry is
+    written back exactly. Replacing it with a plain string marks it dirty.
+    """
+    raw = None
+    trivia = None
+
+def render_stage(entry, newline):
+    trivia = getattr(entry, "trivia", None)
+    if trivia: yield from trivia[0]
+    raw = getattr(entry, "raw", None)
+    if raw is not None: yield raw
+    else:
+        comment = trivia[1] if trivia else None
+        yield (f"{entry} {comment}" if comment else entry) + newline
+
+class SelectDef:
+    """A parsed select.def.
+
+    The file is kept line for line: `layout` holds every line outside the
+    [Characters] and [ExtraStages] entries verbatim, with CHARS and STAGES
+    marking where those entries go. `slots` holds the characters as Slot
+    records and `extra_stages` the stage lines. Comment and blank lines inside
+    those sections travel with the entry below them.
+
+    Saving only rebuilds lines that changed, writes through a temporary file
+    and os.replace, and does nothing if the result matches what is on disk.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.slots = []
+        self.extra_stages = []
+        self.layout = []
+        self.tails = {"chars": [], "stages": []}
+        self.newline = "\n"
+        self.saved_digest = None
+
+    @classmethod
+    def load(cls, path):
+        doc = cls(path)
+        # newline='' keeps CRLF/LF as they are; surrogateescape round-trips any bytes
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            doc.parse(f)
+        doc.saved_digest = doc.digest(doc.render())
+        return doc
+
+    @classmethod
+    def from_bytes(cls, data, path=None):
+        """Parse a select.def held in memory (a backup, say); it is not tied to a file unless `path` is given."""
+        doc = cls(path)
+        doc.parse(data.decode('utf-8', 'surrogateescape').splitlines(keepends=True))
+        return doc
+
+    def parse(self, lines):
+        current = None
+        pending = []
+        for line in lines:
+            if not self.layout and line.endswith("\r\n"): self.newline = "\r\n"
+            clean = line.strip().lower()
+            if clean.startswith("["):
+                if current: self.tails[current].extend(pending)
+                pending = []
+                self.layout.append(line)
+                if clean.startswith("[characters]"):
+                    current = "chars"
+                    if CHARS not in self.layout: self.layout.append(CHARS)
+                elif clean.startswith("[extrastages]"):
+                    current = "stages"
+                    if STAGES not in self.layout: self.layout.append(STAGES)
+                else:
+                    current = None
+                continue
+            if current is None:
+                self.layout.append(line)
+                continue
+                
+            content = line.split(';', 1)[0].strip()
+            if not content:
+                pending.append(line)
+                continue
+            comment = split_comment(line)
+            trivia = (tuple(pending), comment) if pending or comment else None
+            pending = []
+            if current == "chars":
+                parts = content.split(',', 1)
+                slot = Slot(parts[0].strip(), parts[1].strip() if len(parts)>1 else "")
+                slot.raw = line
+                slot.trivia = trivia
+                self.slots.append(slot)
+            else:
+                entry = StageEntry(content)
+                entry.raw = line
+                entry.trivia = trivia
+                self.extra_stages.append(entry)
+        if current: self.tails[current].extend(pending)
+
+    def lines(self):
+        nl = self.newline
+        layout = self.layout
+        # Sections that did not exist in the file are added at the end when needed
+        if CHARS not in layout and self.slots: layout = layout + ["[Characters]" + nl, CHARS]
+        if STAGES not in layout and self.extra_stages: layout = layout + ["[ExtraStages]" + nl, STAGES]
+        out = []
+        for item in layout:
+            if item is CHARS:
+                for s in self.slots:
+                    # Fast path for untouched lines: reuse the text as read
+                    if s.raw is not None and s.trivia is None: out.append(s.raw)
+                    else: out.extend(s.render(nl))
+                out.extend(self.tails["chars"])
+            elif item is STAGES:
+                for e in self.extra_stages: out.extend(render_stage(e, nl))
+                out.extend(self.tails["stages"])
+            else:
+                out.append(item)
+        # Only the file's last line can lack a line ending; it needs one if anything follows it
+        for i in range(len(out) - 1):
+            if not out[i].endswith("\n"): out[i] += nl
+        return out
+
+    def render(self):
+        return "".join(self.lines())
+
+    @staticmethod
+    def digest(text):
+        return hashlib.blake2b(text.encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+
+    def changed(self):
+        return self.digest(self.render()) != self.saved_digest
+
+    def save(self, path=None):
+        """Write the file if it changed; returns True when something was written."""
+        path = path or self.path
+        text = self.render()
+        digest = self.digest(text)
+        if digest == self.saved_digest and path == self.path and os.path.exists(path): return False
+        
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder): os.makedirs(folder)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp): os.remove(tmp)
+        if path == self.path: self.saved_digest = digest
+        return True
+
+    def set_slot(self, index, char, params=None):
+        """Put `char` in slot `index`, padding with empty slots as needed."""
+        while len(self.slots) <= index: self.slots.append(Slot())
+        self.slots[index].char = char
+        if params is not None: self.slots[index].params = params
+
+    def remove_slot(self, index):
+        """Delete a slot; comments above it move to the entry that takes its place."""
+        removed = self.slots.pop(index)
+        self._pass_trivia(removed, self.slots[index] if index < len(self.slots) else None, "chars")
+
+    def shift_slots(self, indexes, offset):
+        """Move the slots at `indexes` by `offset` positions as a block.
+
+        The slots the block lands on fill the positions it left, in order, so
+        nothing is lost and a move onto a separate block of the same shape is
+        a swap. Comments stay where they are. Returns the touched indexes, or
+        [] if the block would move past the start.
+        """
+        sources = sorted(set(indexes))
+        if not sources or not offset or sources[0] + offset < 0: return []
+        targets = [i + offset for i in sources]
+        moves = dict(zip(sources, targets))
+        moves.update(zip(sorted(set(targets) - moves.keys()), sorted(moves.keys() - set(targets))))
+        while len(self.slots) <= max(sources[-1], targets[-1]): self.slots.append(Slot())
+        content = {i: slot_content(self.slots[i]) for i in moves}
+        for i, j in moves.items():
+            slot = self.slots[j]
+            if content[i] == slot_content(slot): continue
+            slot.char, slot.stages = content[i][:2]
+            slot.kv = content[i][2]
+        return sorted(moves)
+
+    def assign_slots(self, contents):
+        """Make the roster hold `contents`, a list of (char, stages, kv) as in slot_content().
+
+        Only slots whose content differs are rewritten. Slots keep their
+        place, and so do the comments above them, as with shift_slots;
+        comments above slots cut off the end move to the section's tail.
+        """
+        while len(self.slots) < len(contents): self.slots.append(Slot())
+        for slot, content in zip(self.slots, contents):
+            if slot_content(slot) == content: continue
+            slot.char, slot.stages = content[:2]
+            slot.kv = content[2]
+        for slot in reversed(self.slots[len(contents):]):
+            if slot.trivia and slot.trivia[0]: self.tails["chars"][:0] = slot.trivia[0]
+        del self.slots[len(contents):]
+
+    def free_slots(self, count):
+        """The `count` indexes place_chars would fill: empty slots first, then new ones at the end."""
+        free = [i for i, s in enumerate(self.slots) if not s.char or s.char.lower() == "empty"][:count]
+        return free + list(range(len(self.slots), len(self.slots) + count - len(free)))
+
+    def place_chars(self, chars):
+        """Put characters into the empty slots in order, appending the rest; returns the indexes used."""
+        used = self.free_slots(len(chars))
+        for index, char in zip(used, chars): self.set_slot(index, char, "")
+        return used
+
+    def set_stage(self, index, text):
+        old = self.extra_stages[index]
+        entry = StageEntry(text)
+        if getattr(old, "trivia", None): entry.trivia = old.trivia
+        self.extra_stages[index] = entry
+
+    def remove_stage(self, index):
+        removed = self.extra_stages.pop(index)
+        nxt = self.extra_stages[index] if index < len(self.extra_stages) else None
+        if nxt is not None and not isinstance(nxt, StageEntry):
+            nxt = self.extra_stages[index] = StageEntry(nxt)
+        self._pass_trivia(removed, nxt, "stages")
+
+    def _pass_trivia(self, removed, nxt, section):
+        pre = removed.trivia[0] if getattr(removed, "trivia", None) else ()
+        if not pre: return
+        if nxt is None:
+            self.tails[section][:0] = pre
+            return
+        old_pre, comment = nxt.trivia if nxt.trivia else ((), None)
+        nxt.trivia = (tuple(pre) + tuple(old_pre), comment)
+
+    def find_slots(self, char):
+        char = char.lower()
+        return [i for i, s in enumerate(self.slots) if s.char.lower() == char]
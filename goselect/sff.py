@@ -0,0 +1,268 @@
+import struct
+import zlib
+
+PORTRAIT = (9000, 0)
+
+class SffError(Exception):
+    pass
+
+# --- Pixel decoders (SFF v2) ---
+def rle8(src, size):
+    out = bytearray()
+    i, n = 0, len(src)
+    while i < n and len(out) < size:
+        ch = src[i]
+        i += 1
+        if ch & 0xC0 == 0x40 and i < n:
+            out += bytes((src[i],)) * (ch & 0x3F)
+            i += 1
+        else:
+            out.append(ch)
+    return out
+
+def rle5(src, size):
+    out = bytearray(size)
+    i, j, last = 0, 0, len(src) - 1
+    if last < 0: return out
+    while j < size:
+        rl = src[i]
+        if i < last: i += 1
+        dl = src[i] & 0x7F
+        c = 0
+        if src[i] >> 7:
+            if i < last: i += 1
+            c = src[i]
+        if i < last: i += 1
+        while True:
+            if j < size:
+                out[j] = c
+                j += 1
+            rl -= 1
+            if rl < 0:
+                dl -= 1
+                if dl < 0: break
+                c = src[i] & 0x1F
+                rl = src[i] >> 5
+                if i < last: i += 1
+    return out
+
+def lz5(src, size):
+    out = bytearray(size)
+    if not src: return out
+    i, j, last = 0, 0, len(src) - 1
+    ct, cts, rb, rbc = src[0], 0, 0, 0
+    if i < last: i += 1
+    while j < size:
+        d = src[i]
+        if i < last: i += 1
+        if ct & (1 << cts):
+            # Back-reference: copy n+1 bytes from d bytes back
+            if d & 0x3F == 0:
+                d = ((d << 2) | src[i]) + 1
+                if i < last: i += 1
+                n = src[i] + 2
+                if i < last: i += 1
+            else:
+                rb |= (d & 0xC0) >> rbc
+                rbc += 2
+                n = d & 0x3F
+                if rbc < 8:
+                    d = src[i] + 1
+                    if i < last: i += 1
+                else:
+                    d = rb + 1
+                    rb = rbc = 0
+            while n >= 0:
+                if j < size:
+                    out[j] = out[j - d] if j >= d else 0
+                    j += 1
+                n -= 1
+        else:
+            # Run of one colour
+            if d & 0xE0 == 0:
+                n = src[i] + 8
+                if i < last: i += 1
+            else:
+                n = d >> 5
+                d &= 0x1F
+            while n > 0 and j < size:
+                out[j] = d
+                j += 1
+                n -= 1
+        cts += 1
+        if cts >= 8:
+            ct, cts = src[i], 0
+            if i < last: i += 1
+    return out
+
+def pcx(data):
+    """Decode an 8-bit PCX into (width, height, indices, palette or None)."""
+    if len(data) < 128 or data[3] != 8 or data[65] != 1: raise SffError("unsupported PCX")
+    xmin, ymin, xmax, ymax = struct.unpack_from("<HHHH", data, 4)
+    bpl = struct.unpack_from("<H", data, 66)[0]
+    w, h = xmax - xmin + 1, ymax - ymin + 1
+    raw = bytearray()
+    i, n, need = 128, len(data), bpl * h
+    while i < n and len(raw) < need:
+        b = data[i]
+        i += 1
+        if b >= 0xC0 and i < n:
+            raw += bytes((data[i],)) * (b & 0x3F)
+            i += 1
+        else:
+            raw.append(b)
+    pixels = bytearray()
+    for y in range(h): pixels += raw[y * bpl:y * bpl + w]
+    palette = data[-768:] if len(data) >= 128 + 769 and data[-769] == 0x0C else None
+    return w, h, pixels, palette
+
+# --- PNG ---
+def png_read(data):
+    """Decode a non-interlaced 8-bit PNG into (width, height, channels, rows bytes, PLTE or None)."""
+    if data[:8] != b"\x89PNG\r\n\x1a\n": raise SffError("not a PNG")
+    pos, idat, plte, trns = 8, [], None, None
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR": w, h, depth, ctype, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE": plte = body
+        elif kind == b"tRNS": trns = body
+        elif kind == b"IDAT": idat.append(body)
+        elif kind == b"IEND": break
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(ctype)
+    if depth != 8 or interlace or channels is None: raise SffError("unsupported PNG")
+    raw = zlib.decompress(b"".join(idat))
+    stride = w * channels
+    out = bytearray(stride * h)
+    prev = bytearray(stride)
+    for y in range(h):
+        ft = raw[y * (stride + 1)]
+        line = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        for x in range(stride):
+            a = line[x - channels] if x >= channels else 0
+            b = prev[x]
+            if ft == 1: line[x] = (line[x] + a) & 0xFF
+            elif ft == 2: line[x] = (line[x] + b) & 0xFF
+            elif ft == 3: line[x] = (line[x] + ((a + b) >> 1)) & 0xFF
+            elif ft == 4:
+                c = prev[x - channels] if x >= channels else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                line[x] = (line[x] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return w, h, ctype, out, plte, trns
+
+def png_write(w, h, rgba):
+    """Encode RGBA pixels as a PNG (no filtering; the images are tiny)."""
+    stride = w * 4
+    raw = b"".join(b"\x00" + bytes(rgba[y * stride:(y + 1) * stride]) for y in range(h))
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 9)) + chunk(b"IEND", b""))
+
+# --- Colour conversion ---
+def indexed_to_rgba(pixels, palette, step):
+    """Palette entries are `step` bytes apart (3 for PCX/PLTE, 4 for SFF v2); index 0 is transparent."""
+    colours = [bytes((0, 0, 0, 0))]
+    for i in range(1, 256):
+        o = i * step
+        colours.append(bytes((palette[o], palette[o + 1], palette[o + 2], 255)) if o + 2 < len(palette) else b"\0\0\0\0")
+    return b"".join(colours[p] for p in pixels)
+
+def png_to_rgba(data, palette):
+    w, h, ctype, px, plte, trns = png_read(data)
+    if ctype == 3:
+        # Paletted PNGs in an SFF use the SFF palette; their own PLTE is the fallback
+        return w, h, indexed_to_rgba(px, palette, 4) if palette else indexed_to_rgba(px, plte or b"", 3)
+    if ctype == 6: return w, h, bytes(px)
+    if ctype == 2: return w, h, b"".join(bytes(px[i:i + 3]) + b"\xff" for i in range(0, len(px), 3))
+    if ctype == 4: return w, h, b"".join(bytes((px[i], px[i], px[i], px[i + 1])) for i in range(0, len(px), 2))
+    return w, h, b"".join(bytes((v, v, v, 255)) for v in px)
+
+# --- SFF ---
+def read_sprite(path, group=PORTRAIT[0], item=PORTRAIT[1]):
+    """Return (width, height, RGBA bytes) for one sprite of an SFF v1 or v2 file, or None if it has none."""
+    with open(path, 'rb') as f:
+        head = f.read(512)
+        if head[:12] != b"ElecbyteSpr\0": raise SffError("not an SFF file")
+        if head[15] == 1: return _read_v1(f, head, group, item)
+        if head[15] == 2: return _read_v2(f, head, group, item)
+        raise SffError(f"unsupported SFF version {head[15]}")
+
+def _read_v1(f, head, group, item):
+    count, first = struct.unpack_from("<II", head, 20)
+    sprites = []  # (data offset, length, same palette) per sprite number, for links
+    offset, owner = first, None
+    for _ in range(count):
+        f.seek(offset)
+        sub = f.read(32)
+        if len(sub) < 32: break
+        nxt, length, _, _, g, i, link, samepal = struct.unpack_from("<IIhhHHHB", sub)
+        if length == 0 and link < len(sprites): entry = sprites[link]
+        else: entry = (offset + 32, length, samepal)
+        sprites.append(entry)
+        if not samepal and length: owner = entry
+        if (g, i) == (group, item):
+            f.seek(entry[0])
+            w, h, px, palette = pcx(f.read(entry[1]))
+            if entry[2] and owner is not None and owner is not entry:
+                # Shared palette: it lives at the end of the last sprite that had its own. The flag decides,
+                # not the 0x0C marker, which a shared-palette sprite's pixel data can end in by chance
+                f.seek(owner[0] + owner[1] - 768)
+                palette = f.read(768)
+            if palette is None: raise SffError("sprite has no palette")
+            return w, h, indexed_to_rgba(px, palette, 3)
+        if not nxt: break
+        offset = nxt
+    return None
+
+def _read_v2(f, head, group, item):
+    spr_off, spr_count, pal_off, pal_count, ldata, _, tdata = struct.unpack_from("<IIIIIII", head, 36)
+    f.seek(spr_off)
+    nodes = f.read(28 * spr_count)
+    for n in range(spr_count):
+        g, i = struct.unpack_from("<HH", nodes, n * 28)
+        if (g, i) != (group, item): continue
+        node = struct.unpack_from("<HHHHhhHBBIIHH", nodes, n * 28)
+        # A zero-length sprite is a link to an earlier one
+        for _ in range(spr_count):
+            if node[10] or node[6] >= spr_count: break
+            node = struct.unpack_from("<HHHHhhHBBIIHH", nodes, node[6] * 28)
+        _, _, w, h, _, _, _, fmt, _, offset, length, pal_index, flags = node
+        f.seek((tdata if flags & 1 else ldata) + offset)
+        data = f.read(length)
+        palette = _palette_v2(f, pal_off, pal_count, ldata, pal_index)
+        size = w * h
+        if fmt == 0: return w, h, indexed_to_rgba(data[:size], palette, 4)
+        if fmt == 2: return w, h, indexed_to_rgba(rle8(data[4:], size), palette, 4)
+        if fmt == 3: return w, h, indexed_to_rgba(rle5(data[4:], size), palette, 4)
+        if fmt == 4: return w, h, indexed_to_rgba(lz5(data[4:], size), palette, 4)
+        if fmt in (10, 11, 12): return png_to_rgba(data[4:], palette)
+        raise SffError(f"unsupported sprite format {fmt}")
+    return None
+
+def _palette_v2(f, pal_off, pal_count, ldata, index):
+    for _ in range(pal_count):
+        if index >= pal_count: return b""
+        f.seek(pal_off + 16 * index)
+        _, _, cols, link, offset, length = struct.unpack("<HHHHII", f.read(16))
+        if length:
+            f.seek(ldata + offset)
+            return f.read(cols * 4)
+        index = link
+    return b""
+
+def scale_rgba(w, h, rgba, max_w, max_h):
+    """Nearest-neighbour resize to fit max_w x max_h, keeping the aspect ratio."""
+    s = min(max_w / w, max_h / h)
+    nw, nh = max(1, int(w * s)), max(1, int(h * s))
+    if (nw, nh) == (w, h): return w, h, rgba
+    cols = [min(w - 1, int(x / s)) * 4 for x in range(nw)]
+    out = bytearray()
+    for y in range(nh):
+        row = min(h - 1, int(y / s)) * w * 4
+        for c in cols: out += rgba[row + c:row + c + 4]
+    return nw, nh, bytes(out)
@@ -0,0 +1,93 @@
+"""--startup-profile support: startup milestones and an import-time breakdown."""
+import os
+import sys
+import time
+import threading
+
+# Time-to-first-paint above this is reported as a regression
+STARTUP_BUDGET_MS = 1500
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module; everything else is delegated."""
+    def __init__(self, loader, name, timer):
+        self._loader = loader
+        self._name = name
+        self._timer = timer
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = self._timer.stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack: stack[-1] += elapsed
+            self._timer.imports.append((self._name, elapsed, elapsed - nested))
+
+class _ImportTimer:
+    """Meta path finder that times every module imported on the main thread."""
+    def __init__(self):
+        self.stack = []
+        self.imports = []
+        self.thread = threading.get_ident()
+
+    def find_spec(self, name, path=None, target=None):
+        if threading.get_ident() != self.thread: return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"): continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None: break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name, self)
+        return spec
+
+class StartupProfile:
+    def __init__(self, started):
+        self.started = started
+        self.marks = []
+        self.timer = None
+
+    def track_imports(self):
+        self.timer = _ImportTimer()
+        sys.meta_path.insert(0, self.timer)
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter()))
+
+    def report(self, top=15):
+        if self.timer in sys.meta_path: sys.meta_path.remove(self.timer)
+        lines = ["GO-Select startup profile", ""]
+        prev = self.started
+        first_paint = None
+        for label, t in self.marks:
+            lines.append(f"{(t - self.started) * 1000:9.1f} ms  (+{(t - prev) * 1000:7.1f})  {label}")
+            if label == "first paint": first_paint = (t - self.started) * 1000
+            prev = t
+        if first_paint is not None:
+            verdict = "OK" if first_paint <= STARTUP_BUDGET_MS else "OVER BUDGET"
+            lines += ["", f"Time to first paint: {first_paint:.1f} ms (budget {STARTUP_BUDGET_MS} ms) {verdict}"]
+            
+        if self.timer and self.timer.imports:
+            total = sum(self_t for _, _, self_t in self.timer.imports)
+            lines += ["", f"Imports: {len(self.timer.imports)} modules, {total * 1000:.1f} ms", "    self ms   cumul ms  module"]
+            for name, cumul, self_t in sorted(self.timer.imports, key=lambda x: -x[2])[:top]:
+                lines.append(f"{self_t * 1000:11.1f} {cumul * 1000:10.1f}  {name}")
+                
+        text = "\n".join(lines)
+        if sys.stdout is not None:
+            print(text)
+        else:
+            # Windowed (frozen) builds have no console
+            path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "go_select_startup.txt")
+            with open(path, 'w', encoding='utf-8') as f: f.write(text + "\n")
+        return text
@@ -0,0 +1,124 @@
+import os
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from goselect.defreader import read_section
+from goselect.trace import TRACE
+
+log = logging.getLogger(__name__)
+
+THUMB_DIRNAME = "go_select_thumbs"
+
+class LRU:
+    """Size-bounded mapping that forgets the least recently used entry first."""
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        if key not in self.data: return default
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.limit: self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+def sprite_file(def_path):
+    """The SFF named by a character .def's [Files] sprite= entry, or None."""
+    rel = read_section(def_path, "files").get("sprite")
+    if not rel: return None
+    folder = os.path.dirname(def_path)
+    path = os.path.join(folder, rel.replace("\\", "/"))
+    if os.path.exists(path): return path
+    # Windows-made characters often get the case of the file name wrong
+    head, name = os.path.split(path)
+    try:
+        for n in os.listdir(head):
+            if n.lower() == name.lower(): return os.path.join(head, n)
+    except OSError:
+        pass
+    return None
+
+class ThumbnailLoader:
+    """Decodes portraits (sprite 9000,0) into small PNGs on a thread pool.
+
+    `resolve(char)` maps a select.def entry to its .def file. Results are cached on disk under a name derived from the SFF path, size,
+    mtime and the thumbnail size, so a changed SFF is decoded again. A
+    character without a usable portrait is cached as an empty file. Finished
+    requests are reported through `on_done(key, png bytes or None)` from a
+    worker thread; requests that are no longer `wanted` by then are skipped.
+    """
+    def __init__(self, cache_dir, size, on_done, resolve, workers=2):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.on_done = on_done
+        self.resolve = resolve
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self.pending = set()
+        self.wanted = set()
+        self.lock = threading.Lock()
+
+    def request(self, key, char):
+        with self.lock:
+            if key in self.pending: return
+            self.pending.add(key)
+        self.pool.submit(self.load, key, char)
+
+    def load(self, key, char):
+        png = None
+        try:
+            if key in self.wanted:
+                def_path = self.resolve(char)
+                if def_path: png = self.thumbnail(def_path)
+        except Exception as e:
+            log.warning("Cannot read the portrait of %s: %s", key, e)
+        finally:
+            with self.lock: self.pending.discard(key)
+        if key in self.wanted: self.on_done(key, png)
+
+    def cache_path(self, sff):
+        st = os.stat(sff)
+        ident = f"{os.path.abspath(sff)}|{st.st_size}|{st.st_mtime_ns}|{self.size[0]}x{self.size[1]}"
+        return os.path.join(self.cache_dir, hashlib.blake2b(ident.encode("utf-8", "surrogateescape"), digest_size=16).hexdigest() + ".png")
+
+    @TRACE.traced("portrait", "thumbs")
+    def thumbnail(self, def_path):
+        from goselect import sff as sfflib
+        sff = sprite_file(def_path)
+        if sff is None: return None
+        cached = self.cache_path(sff)
+        try:
+            with open(cached, 'rb') as f: return f.read() or None
+        except OSError:
+            pass
+        try:
+            sprite = sfflib.read_sprite(sff)
+        except (sfflib.SffError, struct.error, zlib.error, ValueError, IndexError) as e:
+            log.warning("Cannot decode portrait in %s: %s", sff, e)
+            sprite = None
+        png = sfflib.png_write(*sfflib.scale_rgba(*sprite, *self.size)) if sprite and sprite[0] and sprite[1] else b""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{cached}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f: f.write(png)
+            os.replace(tmp, cached)
+        except OSError as e:
+            log.warning("Cannot write the portrait cache: %s", e)
+        return png or None
+
+    def shutdown(self):
+        self.wanted = set()
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,82 @@
+"""Timing spans for the hot paths, kept in a ring buffer and exportable as a Chrome trace."""
+import os
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_CAPACITY = 10000
+
+class Tracer:
+    """Records (name, category, start, duration, thread, args) for every span.
+
+    Only the last `capacity` spans are kept, so tracing can stay on for a
+    whole session. Appending to a deque is thread-safe, so worker threads
+    record into the same buffer.
+    """
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.events = deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.thread_names = {}
+        self.last = None
+
+    @contextmanager
+    def span(self, name, cat="app", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, cat, start, time.perf_counter() - start, args)
+
+    def add(self, name, cat, start, duration, args=None):
+        tid = threading.get_ident()
+        if tid not in self.thread_names: self.thread_names[tid] = threading.current_thread().name
+        event = (name, cat, start, duration, tid, args or None)
+        self.events.append(event)
+        self.last = event
+
+    def traced(self, name=None, cat="app"):
+        """Decorator form of span(); the name defaults to the function's."""
+        def wrap(fn):
+            label = name or fn.__name__
+            @functools.wraps(fn)
+            def inner(*a, **k):
+                start = time.perf_counter()
+                try:
+                    return fn(*a, **k)
+                finally:
+                    self.add(label, cat, start, time.perf_counter() - start)
+            return inner
+        return wrap
+
+    def clear(self):
+        self.events.clear()
+        self.last = None
+
+    def to_chrome(self):
+        """The buffer as Chrome / Perfetto trace-event JSON (complete "X" events, microseconds)."""
+        pid = os.getpid()
+        out = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "GO-Select"}}]
+        for tid, tname in list(self.thread_names.items()):
+            out.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+        for name, cat, start, duration, tid, args in list(self.events):
+            ev = {"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                  "ts": round((start - self.origin) * 1e6, 1), "dur": round(duration * 1e6, 1)}
+            if args: ev["args"] = {k: str(v) for k, v in args.items()}
+            out.append(ev)
+        return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        import json
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f: json.dump(self.to_chrome(), f)
+        os.replace(tmp, path)
+        return len(self.events)
+
+def describe(event):
+    name, _, _, duration, _, _ = event
+    return f"{name}: {duration * 1000:.1f} ms"
+
+# One buffer for the whole process
+TRACE = Tracer()
@@ -0,0 +1,146 @@
+import os
+
+from goselect.params import parse_params_string
+
+OK, CASE, MISSING = "ok", "case", "missing"
+
+def is_music_key(key):
+    return key.startswith("music") or key.endswith(".music")
+
+def music_path(value):
+    """Drop the volume/loop numbers Ikemen allows after a music path."""
+    parts = value.split()
+    while len(parts) > 1 and parts[-1].lstrip("-").isdigit(): parts.pop()
+    return " ".join(parts)
+
+class FileIndex:
+    """Case-aware, in-memory view of the game folder.
+
+    Each directory is listed at most once, the first time a lookup passes
+    through it; after that every lookup is a couple of dict hits. A name
+    that only matches with different case resolves as CASE: it works on
+    Windows but not on Linux.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.dirs = {}
+        self.resolved = {}
+
+    def listing(self, rel):
+        if rel in self.dirs: return self.dirs[rel]
+        names = {}
+        try:
+            with os.scandir(os.path.join(self.root, rel) if rel else self.root) as it:
+                for e in it:
+                    try: names[e.name] = e.is_dir()
+                    except OSError: names[e.name] = False
+            lower = {}
+            for n in names: lower.setdefault(n.lower(), n)
+            listing = (names, lower)
+        except OSError:
+            listing = None
+        self.dirs[rel] = listing
+        return listing
+
+    def resolve(self, path):
+        """Return (status, actual relative path or None) for a path relative to the game root."""
+        key = path.replace("\\", "/")
+        if key in self.resolved: return self.resolved[key]
+        cur, status = "", OK
+        for part in key.split("/"):
+            if part in ("", "."): continue
+            if part == "..":
+                cur = cur.rsplit("/", 1)[0] if "/" in cur else ""
+                continue
+            listing = self.listing(cur)
+            if listing is None:
+                cur = None
+                break
+            names, lower = listing
+            if part not in names:
+                part = lower.get(part.lower())
+                if part is None:
+                    cur = None
+                    break
+                status = CASE
+            cur = f"{cur}/{part}" if cur else part
+        result = (MISSING, None) if cur is None else (status, cur)
+        self.resolved[key] = result
+        return result
+
+    def is_dir(self, rel):
+        parent, _, name = rel.rpartition("/")
+        listing = self.listing(parent)
+        return bool(listing and listing[0].get(name))
+
+    def resolve_char(self, char):
+        """Resolve a [Characters] entry the way find_char_def does, without touching the disk twice."""
+        base = "chars/" + char.replace("\\", "/")
+        status, path = self.resolve(base)
+        if path is not None:
+            if not self.is_dir(path): return status, path
+            st2, defi = self.resolve(f"{path}/{path.rsplit('/', 1)[-1]}.def")
+            return (worst(status, st2), defi) if defi else (MISSING, None)
+        for candidate in (base + ".def", f"{base}/{char.rsplit('/', 1)[-1]}.def"):
+            status, path = self.resolve(candidate)
+            if path is not None: return status, path
+        return MISSING, None
+
+    def resolve_music(self, value):
+        path = music_path(value)
+        status, found = self.resolve(path)
+        if found is None and "/" not in path.replace("\\", "/"):
+            # Bare file names are looked up in sound/
+            status, found = self.resolve("sound/" + path)
+        return status, found
+
+def worst(a, b):
+    order = (OK, CASE, MISSING)
+    return max(a, b, key=order.index)
+
+def problem(status, what, ref, found):
+    if status == MISSING: return (MISSING, f"{what} not found: {ref}")
+    return (CASE, f"{what} case differs: {ref} (on disk: {found})")
+
+class Validator:
+    """Checks every reference in a SelectDef against a FileIndex."""
+    def __init__(self, root):
+        self.index = FileIndex(root)
+
+    def check_slot(self, slot):
+        """Return [(status, message)] for one slot; empty when everything resolves exactly."""
+        if slot.is_special(): return []
+        idx, out = self.index, []
+        status, found = idx.resolve_char(slot.char)
+        if status != OK: out.append(problem(status, "character", slot.char, found))
+        for st in slot.stages:
+            status, found = idx.resolve(st)
+            if status != OK: out.append(problem(status, "stage", st, found))
+        return out + self.check_music(slot.items())
+
+    def check_music(self, items):
+        out = []
+        for k, v in items:
+            if not v or not is_music_key(k): continue
+            status, found = self.index.resolve_music(v)
+            if status != OK: out.append(problem(status, k, music_path(v), found))
+        return out
+
+    def check_stage(self, line):
+        """Return [(status, message)] for one [ExtraStages] line: the stage and its music params."""
+        path, _, params = line.partition(",")
+        path = path.strip()
+        status, found = self.index.resolve(path)
+        out = [] if status == OK else [problem(status, "stage", path, found)]
+        return out + self.check_music(parse_params_string(params)[0].items())
+
+    def run(self, doc):
+        """One pass over the document; returns ({slot index: problems}, {extra stage index: problems})."""
+        slots, stages = {}, {}
+        for i, s in enumerate(doc.slots):
+            p = self.check_slot(s)
+            if p: slots[i] = p
+        for i, line in enumerate(doc.extra_stages):
+            p = self.check_stage(line)
+            if p: stages[i] = p
+        return slots, stages
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import struct
+import select
+import logging
+import threading
+
+from goselect.trace import TRACE
+
+log = logging.getLogger(__name__)
+
+# inotify(7) flags
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal ctypes binding: one watch per directory, events read as raw structs."""
+    def __init__(self):
+        import ctypes, ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.ctypes = ctypes
+
+    def add(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = self.ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove(self, wd):
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """Yield (wd, mask) for the events available within `timeout` seconds."""
+        if not select.select([self.fd], [], [], timeout)[0]: return
+        try: data = os.read(self.fd, 65536)
+        except BlockingIOError: return
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, size = EVENT.unpack_from(data, pos)
+            pos += EVENT.size + size
+            yield wd, mask
+
+    def close(self):
+        os.close(self.fd)
+
+class ContentWatcher:
+    """Keeps a ContentIndex in step with chars/ and stages/ while the app runs.
+
+    Uses inotify where available and falls back to polling the indexed
+    directories' mtimes. Changes are coalesced: after the first event it waits
+    for `settle` seconds of quiet (at most `max_delay` in total), then re-lists
+    just the directories that changed and calls `on_change(top, added, removed)`
+    from the watcher thread.
+    """
+    def __init__(self, index, tops, on_change, settle=0.2, max_delay=0.8, poll_interval=1.0):
+        self.index = index
+        self.tops = [t for t in tops if os.path.isdir(t)]
+        self.on_change = on_change
+        self.settle, self.max_delay, self.poll_interval = settle, max_delay, poll_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="content-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            self.watch()
+        except Exception as e:
+            # The lists stop following the disk until the next rescan; say so instead of dying silently
+            log.error("Watching chars/ and stages/ stopped: %s", e)
+
+    def watch(self):
+        if sys.platform.startswith("linux"):
+            try:
+                inotify = Inotify()
+            except (OSError, AttributeError):
+                inotify = None
+            if inotify is not None:
+                try:
+                    self.mode = "inotify"
+                    if self.run_inotify(inotify): return
+                finally:
+                    inotify.close()
+        self.mode = "polling"
+        self.run_polling()
+
+    @TRACE.traced("watch apply", "scan")
+    def apply(self, dirty):
+        for top, rels in dirty.items():
+            added, removed = self.index.update_dirs(top, rels)
+            if added or removed: self.on_change(top, added, removed)
+
+    # --- inotify ---
+    def sync_watches(self, inotify, watches, paths):
+        """Watch every indexed directory; returns the newly watched ones (they need one more listing)."""
+        new = {}
+        for top in self.tops:
+            current = self.index.dirs(top)
+            for rel in current:
+                if (top, rel) in paths: continue
+                full = os.path.join(top, rel) if rel else top
+                try: wd = inotify.add(full)
+                except OSError as e:
+                    if e.errno == 28: raise  # ENOSPC: out of watches, let polling take over
+                    continue
+                watches[wd] = (top, rel)
+                paths[(top, rel)] = wd
+                new.setdefault(top, set()).add(rel)
+            for key in [k for k in paths if k[0] == top and k[1] not in current]:
+                wd = paths.pop(key)
+                inotify.remove(wd)
+                watches.pop(wd, None)
+        return new
+
+    def run_inotify(self, inotify):
+        """Returns False when inotify cannot cover the tree and polling should be used instead."""
+        watches, paths = {}, {}
+        try: pending = self.sync_watches(inotify, watches, paths)
+        except OSError: return False
+        # Anything created while the watches were being added is picked up by one extra pass
+        self.apply(pending)
+        dirty, first, last = {}, None, None
+        while not self.stop_event.is_set():
+            timeout = 0.5 if first is None else self.settle
+            for wd, mask in inotify.read(timeout):
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped: re-list everything that is watched
+                    for top, rel in paths: dirty.setdefault(top, set()).add(rel)
+                elif wd in watches and not mask & IN_IGNORED:
+                    top, rel = watches[wd]
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and rel:
+                        rel = rel.rsplit("/", 1)[0] if "/" in rel else ""
+                    dirty.setdefault(top, set()).add(rel)
+                now = time.monotonic()
+                if first is None: first = now
+                last = now
+            if first is None: continue
+            now = time.monotonic()
+            if now - last < self.settle and now - first < self.max_delay: continue
+            self.apply(dirty)
+            dirty, first, last = {}, None, None
+            try: dirty = self.sync_watches(inotify, watches, paths)
+            except OSError: return False
+            if dirty: first = last = time.monotonic()
+        return True
+
+    # --- Polling ---
+    def run_polling(self):
+        while not self.stop_event.wait(self.poll_interval):
+            dirty = {}
+            for top in self.tops:
+                for rel, mtime in self.index.dirs(top).items():
+                    full = os.path.join(top, rel) if rel else top
+                    try: changed = os.stat(full).st_mtime_ns != mtime
+                    except OSError: changed = True
+                    if changed: dirty.setdefault(top, set()).add(rel)
+            # A burst that is still going on shows up again on the next pass
+            if dirty: self.apply(dirty)
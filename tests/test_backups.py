@@ -0,0 +1,70 @@
+import os
+import time
+
+from goselect.backups import BackupStore, retained
+
+DAY = 86400
+
+def roster(n, edit=None):
+    lines = [f"char{i:04d}, stages/s{i % 7}.def, order={i % 3 + 1}\n" for i in range(n)]
+    if edit is not None: lines[edit] = f"changed{edit}\n"
+    return ("[Characters]\n" + "".join(lines)).encode()
+
+def chunk_files(store):
+    return sum(len(files) for _, _, files in os.walk(store.objects))
+
+def test_roundtrip_and_dedup(tmp_path):
+    store = BackupStore(str(tmp_path))
+    first = store.add(roster(500), 1000)
+    assert store.read(first) == roster(500)
+    # The same content as the newest backup is not stored again
+    assert store.add(roster(500), 2000) is None
+    chunks = chunk_files(store)
+    second = store.add(roster(500, edit=250), 3000)
+    assert store.read(second) == roster(500, edit=250)
+    # One edit only adds the chunk it lands in
+    assert chunk_files(store) - chunks <= 2
+    assert [s["id"] for s in store.list()] == [second, first]
+
+def test_manifest_survives_reopening(tmp_path):
+    store = BackupStore(str(tmp_path))
+    sid = store.add(roster(50), 1000)
+    assert BackupStore(str(tmp_path)).read(sid) == roster(50)
+
+def test_retained_keeps_last_then_one_per_day_and_week():
+    now = time.mktime((2024, 6, 30, 12, 0, 0, 0, 0, -1))
+    snaps = [{"id": str(i), "time": now - i * DAY / 4} for i in range(200)]
+    keep = retained(snaps, keep_last=5, keep_days=3, keep_weeks=2, now=now)
+    assert {str(i) for i in range(5)} <= keep
+    days = {time.strftime("%Y%m%d", time.localtime(s["time"])) for s in snaps if s["id"] in keep}
+    assert len(keep) < 20 and len(days) >= 3
+    assert all(now - s["time"] < 2 * 7 * DAY for s in snaps if s["id"] in keep)
+
+def test_compact_prunes_and_collects_garbage(tmp_path):
+    store = BackupStore(str(tmp_path), keep_last=2, keep_days=0, keep_weeks=0)
+    ids = [store.add(roster(100, edit=i), 1000 + i) for i in range(6)]
+    store.compact()
+    assert [s["id"] for s in store.list()] == ids[:-3:-1]
+    for sid in ids[-2:]: assert store.read(sid) == roster(100, edit=ids.index(sid))
+    live = {h for s in store.snapshots for h in s["chunks"]}
+    assert chunk_files(store) == len(live)
+
+def drain(store):
+    worker = store.worker
+    if worker is not None: worker.join()
+
+def test_worker_survives_a_failing_backup(tmp_path):
+    store = BackupStore(str(tmp_path))
+    calls = []
+    original = store.add
+    def add(data, when=None):
+        calls.append(data)
+        if len(calls) == 1: raise ValueError("corrupt manifest")
+        return original(data, when)
+    store.add = add
+    store.submit(roster(10), 1000)
+    drain(store)
+    assert store.worker is None
+    store.submit(roster(10, edit=3), 2000)
+    drain(store)
+    assert [store.read(s["id"]) for s in store.list()] == [roster(10, edit=3)]
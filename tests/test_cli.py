@@ -0,0 +1,31 @@
+from goselect.cli import main
+from goselect.selectdef import SelectDef
+
+SELECT_DEF = "[Characters]\nkfm, stages/a.def\n\n[ExtraStages]\nstages/a.def\n"
+
+def make_game(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    path = data / "select.def"
+    path.write_text(SELECT_DEF, encoding="utf-8")
+    return str(path)
+
+def run(tmp_path, path, *argv):
+    return main(["--root", str(tmp_path), "--select", path, *argv])
+
+def test_add_stage_with_params(tmp_path):
+    path = make_game(tmp_path)
+    assert run(tmp_path, path, "add-stage", "stages/b.def", "music=sound/b.mp3", "order=2") == 0
+    assert SelectDef.load(path).extra_stages[-1] == "stages/b.def, music=sound/b.mp3, order=2"
+
+def test_add_stage_as_one_argument(tmp_path):
+    path = make_game(tmp_path)
+    assert run(tmp_path, path, "add-stage", "stages/b.def, music=sound/b.mp3") == 0
+    assert SelectDef.load(path).extra_stages[-1] == "stages/b.def, music=sound/b.mp3"
+
+def test_add_stage_in_batch(tmp_path):
+    path = make_game(tmp_path)
+    batch = tmp_path / "edits.txt"
+    batch.write_text("add-stage stages/b.def, music=sound/b.mp3\nadd-stage stages/c.def\n", encoding="utf-8")
+    assert run(tmp_path, path, "batch", str(batch)) == 0
+    assert SelectDef.load(path).extra_stages[-2:] == ["stages/b.def, music=sound/b.mp3", "stages/c.def"]
@@ -0,0 +1,25 @@
+from goselect.defreader import SAMPLE_SIZE, def_file, read_section
+
+def write_def(tmp_path, text, encoding, padding=0):
+    path = tmp_path / "char.def"
+    # Plain ASCII comments push the [Info] section past the detection sample
+    filler = "".join(f"; comment line {i:06d}\n" for i in range(padding // 22 + 1)) if padding else ""
+    path.write_bytes((filler + text).encode(encoding))
+    return str(path)
+
+def test_utf8(tmp_path):
+    path = write_def(tmp_path, '[Info]\nname = "Kung Fü Man"\n', "utf-8")
+    assert read_section(path, "info")["name"] == "Kung Fü Man"
+
+def test_cp932_past_sample(tmp_path):
+    path = write_def(tmp_path, '[Files]\nsprite = kfm.sff\n\n[Info]\nname = "格闘家"\nauthor = "作者"\n', "cp932", padding=SAMPLE_SIZE + 1000)
+    info = read_section(path, "info")
+    assert info["name"] == "格闘家"
+    assert info["author"] == "作者"
+    assert def_file(path).encoding == "cp932"
+    # Sections read after the switch use the encoding that worked
+    assert read_section(path, "files")["sprite"] == "kfm.sff"
+
+def test_latin1_fallback(tmp_path):
+    path = write_def(tmp_path, '[Info]\nname = "Été café"\n', "latin-1", padding=SAMPLE_SIZE + 1000)
+    assert read_section(path, "info")["name"] == "Été café"
@@ -0,0 +1,71 @@
+from goselect.history import History
+from goselect.selectdef import SelectDef
+
+SAMPLE = (
+    "; roster\r\n"
+    "[Characters]\r\n"
+    "kfm, stages/kfm.def, music=sound/kfm.mp3\r\n"
+    "; bosses\r\n"
+    "evilkfm ; the boss\r\n"
+    "empty\r\n"
+    "\r\n"
+    "[ExtraStages]\r\n"
+    "; arenas\r\n"
+    "stages/a.def\r\n"
+    "stages/b.def, music=b.ogg ; loud"
+)
+
+def load(tmp_path):
+    path = tmp_path / "select.def"
+    path.write_bytes(SAMPLE.encode("utf-8"))
+    doc = SelectDef.load(str(path))
+    return doc, History(doc)
+
+def undo_all(history):
+    while history.can_undo(): history.undo()
+
+def assert_loaded_state(doc):
+    assert doc.render() == SAMPLE
+    assert not doc.changed()
+    assert not doc.save()
+
+def test_undo_slot_edits(tmp_path):
+    doc, history = load(tmp_path)
+    with history.slot(0): doc.set_slot(0, "ryu", "stages/ryu.def")
+    with history.slot(1): doc.slots[1].set("order", "3")
+    # Padding slots added past the end are removed again
+    with history.slot(8): doc.set_slot(8, "ken")
+    with history.slots([0, 1, 2]): doc.shift_slots([0, 1], 1)
+    assert doc.changed()
+    undo_all(history)
+    assert_loaded_state(doc)
+
+def test_undo_stage_edits(tmp_path):
+    doc, history = load(tmp_path)
+    with history.stages(1): doc.set_stage(1, "stages/c.def")
+    with history.stages(0): doc.remove_stage(0)
+    with history.stages(0): doc.remove_stage(0)
+    with history.stages(len(doc.extra_stages)): doc.extra_stages.append("stages/d.def")
+    undo_all(history)
+    assert_loaded_state(doc)
+
+def test_transaction_is_one_step(tmp_path):
+    doc, history = load(tmp_path)
+    with history.transaction():
+        with history.slot(0): doc.set_slot(0, "ryu")
+        with history.stages(0): doc.remove_stage(0)
+    edited = doc.render()
+    assert history.undo() == [("stages", 0), ("slot", 0)]
+    assert not history.can_undo()
+    assert_loaded_state(doc)
+    history.redo()
+    assert doc.render() == edited
+
+def test_edit_and_revert_by_hand_is_unchanged(tmp_path):
+    doc, history = load(tmp_path)
+    with history.slot(2): doc.set_slot(2, "ryu")
+    with history.slot(2): doc.set_slot(2, "empty")
+    # The line is rebuilt but comes out identical, so there is nothing to save
+    assert not doc.changed()
+    undo_all(history)
+    assert_loaded_state(doc)
@@ -0,0 +1,108 @@
+import os
+import zipfile
+import threading
+
+from goselect import importer
+from goselect.importer import clean_name, inspect, install, plan
+
+KFM = {"kfm/kfm.def": b"[Files]\n", "kfm/kfm.cmd": b"", "kfm/kfm.cns": b"", "kfm/kfm.air": b"", "kfm/sprites/kfm.sff": b"x" * 100}
+STAGE = {"arena/arena.def": b"[Info]\n", "arena/arena.sff": b"y" * 50, "arena/sound/bgm.ogg": b"z" * 10}
+
+def make_zip(tmp_path, name, files):
+    path = tmp_path / name
+    with zipfile.ZipFile(path, "w") as zf:
+        for member, data in files.items(): zf.writestr(member, data)
+    return str(path)
+
+def make_game(tmp_path):
+    chars, stages = tmp_path / "chars", tmp_path / "stages"
+    chars.mkdir()
+    stages.mkdir()
+    return str(chars), str(stages)
+
+def tree(root):
+    return sorted(os.path.relpath(os.path.join(d, n), root).replace(os.sep, "/") for d, _, names in os.walk(root) for n in names)
+
+def test_clean_name_rejects_escapes():
+    assert clean_name("./kfm\\kfm.def") == "kfm/kfm.def"
+    assert clean_name("kfm//sprites/kfm.sff") == "kfm/sprites/kfm.sff"
+    for bad in ("../kfm.def", "kfm/../../evil.def", "/etc/passwd", "C:/evil.def", "C:evil.def", "..\\evil.def"):
+        assert clean_name(bad) is None, bad
+
+def test_escaping_members_are_not_installed(tmp_path):
+    chars, stages = make_game(tmp_path)
+    path = make_zip(tmp_path, "kfm.zip", {**KFM, "../evil.def": b"", "kfm/../../evil.cns": b""})
+    pack = inspect(path)
+    assert [(i.kind, i.dest) for i in pack.items] == [("char", "kfm")]
+    install([pack], chars, stages)
+    assert tree(chars) == sorted(f"kfm/{n}" for n in ("kfm.def", "kfm.cmd", "kfm.cns", "kfm.air", "sprites/kfm.sff"))
+    assert not (tmp_path / "evil.def").exists()
+    assert not (tmp_path / "evil.cns").exists()
+
+def test_inspect_char_and_stage(tmp_path):
+    path = make_zip(tmp_path, "mix.zip", {**KFM, **STAGE, "readme.txt": b""})
+    pack = inspect(path)
+    stage, char = pack.items
+    assert (char.kind, char.dest, char.defs) == ("char", "kfm", ["kfm.def"])
+    # A stage's subfolders without a .def of their own go along with it
+    assert (stage.kind, sorted(stage.files.values())) == ("stage", ["arena.def", "arena.sff", "sound/bgm.ogg"])
+    assert pack.ignored == ["readme.txt"]
+
+def test_plan_collisions(tmp_path):
+    chars, stages = make_game(tmp_path)
+    os.mkdir(os.path.join(chars, "KFM"))
+    packs = [inspect(make_zip(tmp_path, "a.zip", KFM)), inspect(make_zip(tmp_path, "b.zip", KFM))]
+
+    messages = plan(packs, chars, stages, "skip")
+    assert [i.skip for p in packs for i in p.items] == ["chars/kfm already exists"] * 2
+    assert len(messages) == 2
+
+    plan(packs, chars, stages, "rename")
+    assert [i.dest for p in packs for i in p.items] == ["kfm_2", "kfm_3"]
+    assert not any(i.skip for p in packs for i in p.items)
+
+    packs = [inspect(make_zip(tmp_path, "a.zip", KFM)), inspect(make_zip(tmp_path, "b.zip", KFM))]
+    plan(packs, chars, stages, "overwrite")
+    # Only what was on disk before is replaced; the second copy in the batch is skipped
+    assert [i.skip for p in packs for i in p.items] == [None, "chars/kfm already exists"]
+
+def test_plan_stage_file_collision(tmp_path):
+    chars, stages = make_game(tmp_path)
+    (tmp_path / "stages" / "Arena.SFF").write_bytes(b"")
+    pack = inspect(make_zip(tmp_path, "arena.zip", STAGE))
+    plan([pack], chars, stages, "skip")
+    assert pack.items[0].skip == "stages/arena.sff already exists"
+    plan([pack], chars, stages, "overwrite")
+    assert pack.items[0].skip is None
+
+def test_install(tmp_path):
+    chars, stages = make_game(tmp_path)
+    packs = [inspect(make_zip(tmp_path, "mix.zip", {**KFM, **STAGE}))]
+    plan(packs, chars, stages)
+    result = install(packs, chars, stages)
+    assert result.errors == []
+    assert result.char_dirs == ["kfm"]
+    assert [name for name, _ in result.chars] == ["kfm"]
+    assert result.stage_dirs == {"", "sound"}
+    assert tree(stages) == ["arena.def", "arena.sff", "sound/bgm.ogg"]
+    assert not os.path.exists(importer.staging_dir(chars))
+
+def test_cancel_leaves_nothing(tmp_path, monkeypatch):
+    chars, stages = make_game(tmp_path)
+    (tmp_path / "stages" / "keep.def").write_bytes(b"mine")
+    packs = [inspect(make_zip(tmp_path, "mix.zip", {**STAGE, **KFM}))]
+    plan(packs, chars, stages)
+    cancel = threading.Event()
+    members = importer.open_members
+
+    def cancel_midway(path):
+        # Cancel once part of the archive has been written out
+        for n, (member, f) in enumerate(members(path)):
+            if n == 3: cancel.set()
+            yield member, f
+    monkeypatch.setattr(importer, "open_members", cancel_midway)
+    result = install(packs, chars, stages, cancel=cancel)
+    assert (result.chars, result.stages, result.errors) == ([], [], [])
+    assert tree(stages) == ["keep.def"]
+    assert tree(chars) == []
+    assert not os.path.exists(importer.staging_dir(chars))
@@ -0,0 +1,31 @@
+import configparser
+
+from goselect.profiles import WarmProfiles, active_profile, get_profile, profile_names
+
+def test_legacy_paths_become_default_profile():
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    config.read_string("[Paths]\nMugenRoot = /games/ikemen\nSelectDef = /games/ikemen/data/select.def\n")
+    assert active_profile(config) == "Default"
+    assert profile_names(config) == ["Default"]
+    assert get_profile(config, "Default") == ("/games/ikemen", "/games/ikemen/data/select.def")
+
+def test_warm_dirty_state_is_checked_once():
+    calls = []
+    def is_dirty(state):
+        calls.append(state["name"])
+        return state["dirty"]
+    warm = WarmProfiles(is_dirty, limit=2)
+    for name, dirty in (("a", True), ("b", False), ("c", False)):
+        warm.put(name, {"name": name, "dirty": dirty})
+    # Over the limit: the oldest clean state goes, the one with unsaved edits stays
+    assert list(warm.states) == ["a", "c"]
+    for _ in range(3): assert warm.dirty() == ["a"]
+    assert calls == ["a", "b", "c"]
+
+    state = warm.take("a")
+    state["dirty"] = False
+    warm.put("a", state)
+    assert warm.dirty() == []
+    warm.discard("a")
+    assert "a" not in warm and warm.dirty() == []
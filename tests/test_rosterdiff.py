@@ -0,0 +1,78 @@
+import random
+
+from goselect.backups import BackupStore
+from goselect.rosterdiff import BackupDiffs, align, diff, restore, rows
+from goselect.selectdef import SelectDef
+
+ROSTER = ("[Characters]\n; the cast\nkfm, stages/kfm.def, order=1\nryu, order=2\nken\nrandomselect\n"
+          "\n[ExtraStages]\nstages/a.def\nstages/b.def, music=sound/b.mp3\n")
+
+def doc(text=ROSTER):
+    return SelectDef.from_bytes(text.encode())
+
+def test_align_keeps_order_and_pairs_unique_keys():
+    a = ["kfm", "ryu", "ken", "chun", "guile"]
+    b = ["kfm", "ken", "ryu", "new", "chun"]
+    pairs = align(a, b)
+    assert [i for i, _ in pairs if i is not None] == list(range(len(a)))
+    assert [j for _, j in pairs if j is not None] == list(range(len(b)))
+    matched = [(a[i], b[j]) for i, j in pairs if i is not None and j is not None]
+    assert all(x == y for x, y in matched if x in ("kfm", "chun"))
+
+def test_diff_reports_fields():
+    old, new = doc(), doc()
+    new.slots[1].set("order", "5")
+    new.slots[2].char = "sagat"
+    new.set_stage(1, "stages/b.def, music=sound/c.mp3")
+    texts = [text for text, _, _ in rows(diff(old, new))]
+    assert "slot 1 ryu: order 2 -> 5" in texts
+    assert "extra stage 1: stages/b.def, music=sound/b.mp3 -> stages/b.def, music=sound/c.mp3" in texts
+    assert any(t.startswith("slot 2") for t in texts)
+
+def test_unchanged_roster_has_no_changes():
+    assert diff(doc(), doc()) == []
+
+def test_full_restore_reproduces_backup():
+    rnd = random.Random(5)
+    chars = ["kfm", "ryu", "ken", "chun", "guile", "empty", "randomselect"]
+    for _ in range(200):
+        old = doc()
+        new = doc()
+        for _ in range(rnd.randint(1, 6)):
+            op = rnd.random()
+            if op < 0.3 and new.slots: new.remove_slot(rnd.randrange(len(new.slots)))
+            elif op < 0.6: new.set_slot(rnd.randrange(len(new.slots) + 2), rnd.choice(chars))
+            elif new.slots: new.slots[rnd.randrange(len(new.slots))].set("order", str(rnd.randint(1, 9)))
+            if rnd.random() < 0.2 and new.extra_stages: new.remove_stage(0)
+            if rnd.random() < 0.2: new.extra_stages.append(f"stages/x{rnd.randint(0, 3)}.def")
+        picks = [(c, f) for _, c, f in rows(diff(old, new))]
+        restore(new, picks)
+        assert diff(old, new) == []
+        assert [s.line() for s in new.slots] == [s.line() for s in old.slots]
+        assert [str(e) for e in new.extra_stages] == [str(e) for e in old.extra_stages]
+
+def test_partial_restore_touches_only_picked_field():
+    old, new = doc(), doc()
+    new.slots[0].set("order", "9")
+    new.slots[1].set("order", "7")
+    pick = [(c, f) for text, c, f in rows(diff(old, new)) if text.startswith("slot 0")]
+    slots, stages = restore(new, pick)
+    assert slots == [0] and stages == []
+    assert new.slots[0].get("order") == "1"
+    assert new.slots[1].get("order") == "7"
+
+def save(store, path, text, when):
+    # What the GUI does: back up the file as it is, then write the new one
+    with open(path, "rb") as f: store.add(f.read(), when)
+    with open(path, "w", encoding="utf-8", newline="") as f: f.write(text)
+
+def test_each_backup_shows_the_save_that_made_it(tmp_path):
+    path = str(tmp_path / "select.def")
+    with open(path, "w", encoding="utf-8", newline="") as f: f.write(ROSTER)
+    store = BackupStore(str(tmp_path / "backups"))
+    save(store, path, ROSTER.replace("ryu, order=2", "ryu, order=3"), 1000)
+    save(store, path, ROSTER.replace("ryu, order=2", "ryu, order=3").replace("\nken\n", "\nken, ai=8\n"), 2000)
+    newest, oldest = [s["id"] for s in store.list()]
+    diffs = BackupDiffs(store)
+    assert [t for t, _, _ in rows(diffs.introduced(oldest, path))] == ["slot 1 ryu: order 2 -> 3"]
+    assert [t for t, _, _ in rows(diffs.introduced(newest, path))] == ["slot 2 ken: ai (none) -> 8"]
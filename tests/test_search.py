@@ -0,0 +1,46 @@
+from goselect.search import SearchIndex
+
+def build(names):
+    index = SearchIndex()
+    for name in names: index.add(name, [name])
+    return index
+
+def test_rank_exact_prefix_substring():
+    index = build(["rkfm", "kfm_2", "kfm", "akfmb", "kfmx"])
+    # Exact first, then prefix, then substring; insertion order within each rank
+    assert index.search("kfm") == ["kfm", "kfm_2", "kfmx", "rkfm", "akfmb"]
+    assert index.search("KFM ") == index.search("kfm")
+
+def test_any_key_matches():
+    index = SearchIndex()
+    index.add("chars/kfm", ["kfm", "Kung Fu Man"])
+    index.add("chars/ryu", ["ryu", "Ryu"])
+    assert index.search("kung") == ["chars/kfm"]
+    assert index.search("fu man") == ["chars/kfm"]
+    # Matches never span two keys
+    assert index.search("kfm\0kung") == []
+    assert index.search("mkung") == []
+
+def test_short_and_long_queries():
+    index = build(["kfm", "kyo", "iori"])
+    assert index.search("k") == ["kfm", "kyo"]
+    assert index.search("o") == ["kyo", "iori"]
+    assert index.search("ior") == ["iori"]
+    assert index.search("iorix") == []
+    assert index.search("") == ["kfm", "kyo", "iori"]
+
+def test_remove():
+    index = build(["kfm", "kfm_2", "ryu"])
+    index.remove("kfm")
+    index.remove("missing")
+    assert index.search("kfm") == ["kfm_2"]
+    assert index.search("") == ["kfm_2", "ryu"]
+    assert len(index) == 2
+    index.add("kfm", ["kfm"])
+    assert index.search("kfm") == ["kfm", "kfm_2"]
+
+def test_fuzzy():
+    index = build(["kfm_theme", "kfm_ending_theme", "ryu_theme"])
+    assert index.fuzzy("kfmth") == ["kfm_theme", "kfm_ending_theme"]
+    assert index.fuzzy("kfmth", limit=1) == ["kfm_theme"]
+    assert index.fuzzy("zz") == []
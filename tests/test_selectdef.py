@@ -0,0 +1,84 @@
+import os
+
+from goselect.selectdef import SelectDef
+
+SAMPLE = (
+    "; GO-Select test roster\r\n"
+    "[Options]\r\n"
+    "arcade.maxmatches = 6,1,1,0\r\n"
+    "\r\n"
+    "[Characters]\r\n"
+    "; row 1\r\n"
+    "kfm,   stages/kfm.def ,music=sound/kfm.mp3 ; spacing kept\r\n"
+    "randomselect\r\n"
+    "\r\n"
+    "\tevilkfm, order=3\r\n"
+    "empty\r\n"
+    "; trailing comment\r\n"
+    "[ExtraStages]\r\n"
+    "stages/a.def ; first\r\n"
+    "; between\r\n"
+    "stages/b.def,music=b.ogg\r\n"
+    "[Rest]\r\n"
+    "x = 1"
+)
+
+def load(tmp_path, text=SAMPLE, encoding="utf-8"):
+    path = tmp_path / "select.def"
+    path.write_bytes(text.encode(encoding, "surrogateescape"))
+    return SelectDef.load(str(path)), path
+
+def test_round_trip_is_byte_identical(tmp_path):
+    doc, path = load(tmp_path)
+    assert doc.newline == "\r\n"
+    assert [s.char for s in doc.slots] == ["kfm", "randomselect", "evilkfm", "empty"]
+    assert doc.extra_stages == ["stages/a.def", "stages/b.def,music=b.ogg"]
+    assert doc.render() == SAMPLE
+    doc.save(str(tmp_path / "copy.def"))
+    assert (tmp_path / "copy.def").read_bytes() == path.read_bytes()
+
+def test_undecodable_bytes_survive(tmp_path):
+    raw = b"[Characters]\nkfm ; caf\xe9\n\xff\xfe\nryu\n"
+    path = tmp_path / "select.def"
+    path.write_bytes(raw)
+    doc = SelectDef.load(str(path))
+    doc.save(str(tmp_path / "copy.def"))
+    assert (tmp_path / "copy.def").read_bytes() == raw
+
+def test_unchanged_save_does_not_write(tmp_path):
+    doc, path = load(tmp_path)
+    mtime = os.stat(path).st_mtime_ns
+    assert not doc.changed()
+    assert not doc.save()
+    assert os.stat(path).st_mtime_ns == mtime
+
+def test_edit_rewrites_only_its_line(tmp_path):
+    doc, path = load(tmp_path)
+    doc.slots[0].set("order", "2")
+    doc.set_stage(1, "stages/c.def")
+    assert doc.changed()
+    assert doc.save()
+    expected = (SAMPLE
+                .replace("kfm,   stages/kfm.def ,music=sound/kfm.mp3 ; spacing kept", "kfm, stages/kfm.def, music=sound/kfm.mp3, order=2 ; spacing kept")
+                .replace("stages/b.def,music=b.ogg", "stages/c.def"))
+    assert path.read_bytes().decode() == expected
+    assert not doc.changed()
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+def test_new_lines_follow_file_newline(tmp_path):
+    doc, path = load(tmp_path)
+    doc.set_slot(5, "ryu")
+    doc.extra_stages.append("stages/d.def")
+    text = doc.render()
+    assert "\nempty\r\nryu\r\n" in text
+    assert "stages/b.def,music=b.ogg\r\nstages/d.def\r\n[Rest]" in text
+    # The file's last line still has no line ending
+    assert text.endswith("x = 1")
+
+def test_remove_keeps_comments(tmp_path):
+    doc, _ = load(tmp_path)
+    doc.remove_slot(0)
+    doc.remove_stage(1)
+    text = doc.render()
+    assert "; row 1\r\nrandomselect\r\n" in text
+    assert "stages/a.def ; first\r\n; between\r\n[Rest]" in text
@@ -0,0 +1,117 @@
+import struct
+import zlib
+
+import pytest
+
+from goselect.sff import SffError, png_read, png_write, read_sprite, scale_rgba
+
+W, H = 40, 40
+
+def pixels():
+    return bytes((x + y) % 24 for y in range(H) for x in range(W))
+
+def palette(shift, step):
+    # Entry i is (i + shift, 2i, 3i); step 4 adds the padding byte SFF v2 uses
+    return b"".join(bytes(((i + shift) & 0xFF, i * 2 & 0xFF, i * 3 & 0xFF)) + b"\0" * (step - 3) for i in range(256))
+
+def expected(px, pal, step):
+    return b"".join(b"\0\0\0\0" if p == 0 else pal[p * step:p * step + 3] + b"\xff" for p in px)
+
+# --- SFF v1 ---
+def pcx(px, pal=None):
+    head = bytearray(128)
+    head[0:4] = bytes((10, 5, 1, 8))
+    struct.pack_into("<HHHH", head, 4, 0, 0, W - 1, H - 1)
+    head[65] = 1
+    struct.pack_into("<H", head, 66, W)
+    body = b"".join(bytes((0xC1, p)) if p >= 0xC0 else bytes((p,)) for p in px)
+    return bytes(head) + body + (b"\x0c" + pal if pal else b"")
+
+def sff_v1(sprites):
+    """sprites: [(group, item, pcx bytes or None for a link to sprite 0, samepal)]"""
+    out = bytearray(b"ElecbyteSpr\0" + bytes((0, 1, 0, 1)))
+    out += struct.pack("<IIIII", 0, len(sprites), 512, 32, 1)
+    out += bytes(512 - len(out))
+    for n, (g, i, data, samepal) in enumerate(sprites):
+        data = data or b""
+        nxt = len(out) + 32 + len(data) if n + 1 < len(sprites) else 0
+        out += struct.pack("<IIhhHHHB", nxt, len(data), 0, 0, g, i, 0, samepal) + bytes(13) + data
+    return bytes(out)
+
+def test_v1_own_palette(tmp_path):
+    pal = palette(7, 3)
+    path = tmp_path / "a.sff"
+    path.write_bytes(sff_v1([(0, 0, pcx(pixels()), 0), (9000, 0, pcx(pixels(), pal), 0)]))
+    assert read_sprite(str(path)) == (W, H, expected(pixels(), pal, 3))
+
+def test_v1_shared_palette_ignores_marker_in_pixels(tmp_path):
+    pal = palette(7, 3)
+    px = bytearray(pixels())
+    # The byte 769 from the end looks like the start of an embedded palette
+    px[-769] = 0x0C
+    path = tmp_path / "a.sff"
+    path.write_bytes(sff_v1([(0, 0, pcx(pixels(), pal), 0), (9000, 0, pcx(bytes(px)), 1)]))
+    assert read_sprite(str(path)) == (W, H, expected(px, pal, 3))
+
+def test_v1_link_and_missing_sprite(tmp_path):
+    pal = palette(3, 3)
+    path = tmp_path / "a.sff"
+    path.write_bytes(sff_v1([(0, 0, pcx(pixels(), pal), 0), (9000, 0, None, 0)]))
+    assert read_sprite(str(path)) == (W, H, expected(pixels(), pal, 3))
+    assert read_sprite(str(path), 1, 1) is None
+
+# --- SFF v2 ---
+def rle8(px):
+    return b"".join(bytes((0x41, p)) if p & 0xC0 == 0x40 else bytes((p,)) for p in px)
+
+def rle5(px):
+    # One packet per pixel: run length 0 (one pixel), no extra data bytes, explicit colour
+    return b"".join(bytes((0, 0x80, p)) for p in px)
+
+def lz5(px):
+    # Colour runs only (every control bit clear); a control byte before every 8 tokens
+    out = bytearray()
+    for n, p in enumerate(px):
+        if n % 8 == 0: out.append(0)
+        out.append(1 << 5 | p)
+    return bytes(out)
+
+def png_indexed(px):
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+    raw = b"".join(b"\x00" + px[y * W:(y + 1) * W] for y in range(H))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", W, H, 8, 3, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+def sff_v2(fmt, data, pal):
+    nodes_off, pal_off = 512, 512 + 28 * 2
+    ldata = pal_off + 16
+    blob = pal + (data if fmt == 0 else struct.pack("<I", W * H) + data)
+    head = bytearray(b"ElecbyteSpr\0" + bytes((0, 0, 0, 2)))
+    head += bytes(36 - len(head))
+    head += struct.pack("<IIIIIII", nodes_off, 2, pal_off, 1, ldata, len(blob), ldata + len(blob))
+    head += bytes(512 - len(head))
+    sprite = struct.pack("<HHHHhhHBBIIHH", 9000, 0, W, H, 0, 0, 0, fmt, 8, len(pal), len(blob) - len(pal), 0, 0)
+    # A link (zero length) to the first node
+    link = struct.pack("<HHHHhhHBBIIHH", 9000, 1, W, H, 0, 0, 0, fmt, 8, 0, 0, 0, 0)
+    return bytes(head) + sprite + link + struct.pack("<HHHHII", 1, 1, 256, 0, 0, len(pal)) + blob
+
+@pytest.mark.parametrize("fmt, encode", [(0, bytes), (2, rle8), (3, rle5), (4, lz5), (10, png_indexed)])
+def test_v2_formats(tmp_path, fmt, encode):
+    pal = palette(11, 4)
+    path = tmp_path / "a.sff"
+    path.write_bytes(sff_v2(fmt, encode(pixels()), pal))
+    assert read_sprite(str(path)) == (W, H, expected(pixels(), pal, 4))
+    assert read_sprite(str(path), 9000, 1) == (W, H, expected(pixels(), pal, 4))
+
+def test_not_an_sff(tmp_path):
+    path = tmp_path / "a.sff"
+    path.write_bytes(b"nope" * 200)
+    with pytest.raises(SffError): read_sprite(str(path))
+
+def test_png_roundtrip_and_scale():
+    rgba = expected(pixels(), palette(1, 3), 3)
+    w, h, ctype, px, _, _ = png_read(png_write(W, H, rgba))
+    assert (w, h, ctype, bytes(px)) == (W, H, 6, rgba)
+    sw, sh, small = scale_rgba(W, H, rgba, 20, 10)
+    assert (sw, sh, len(small)) == (10, 10, 400)
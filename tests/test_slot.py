@@ -0,0 +1,49 @@
+import sys
+
+from goselect.params import build_params_string, parse_params_string
+from goselect.selectdef import Slot, slot_content
+
+def test_params_are_pre_parsed():
+    slot = Slot("kfm", "stages/kfm.def, Music=sound/kfm.mp3,  order=2, ,includestage=0")
+    assert slot.stages == ("stages/kfm.def",)
+    assert list(slot.items()) == [("music", "sound/kfm.mp3"), ("order", "2"), ("includestage", "0")]
+    assert slot.get("order") == "2"
+    assert slot.get("missing", "-") == "-"
+    assert slot.params == "stages/kfm.def, music=sound/kfm.mp3, order=2, includestage=0"
+    assert slot.line() == "kfm, stages/kfm.def, music=sound/kfm.mp3, order=2, includestage=0"
+
+def test_params_match_the_string_helpers():
+    text = "stages/a.def, stages/b.def, order=1, music=x.ogg"
+    kv, positional = parse_params_string(text)
+    assert Slot("kfm", text).params == build_params_string(kv, positional)
+
+def test_set_and_managed_order():
+    slot = Slot("kfm", "order=2, music=a.ogg")
+    slot.set("Order", "3")
+    slot.set("music", "")
+    assert list(slot.items()) == [("order", "3")]
+    slot.set_params({"zz": "1", "music": "b.ogg", "order": ""}, ["stages/x.def"], managed_keys=["music", "order"])
+    # Managed keys come first, empty values are dropped
+    assert slot.params == "stages/x.def, music=b.ogg, zz=1"
+
+def test_strings_are_interned():
+    a = Slot("".join(["k", "fm"]), "".join(["or", "der=", "2"]))
+    b = Slot("".join(["kf", "m"]), "order=" + str(2))
+    assert a.char is b.char
+    assert a.kv[0] is b.kv[0] and a.kv[1] is b.kv[1]
+    assert a.kv[0] is sys.intern("order")
+
+def test_changes_drop_the_raw_line():
+    slot = Slot("kfm")
+    slot.raw = "kfm ; as read\n"
+    assert list(slot.render("\n")) == ["kfm ; as read\n"]
+    slot.stages = ["stages/kfm.def"]
+    assert slot.raw is None
+    assert list(slot.render("\n")) == ["kfm, stages/kfm.def\n"]
+
+def test_special_and_content():
+    assert Slot("RandomSelect").is_special()
+    assert Slot("empty").is_special()
+    assert not Slot("kfm").is_special()
+    assert slot_content(Slot("kfm", "a.def, order=1")) == ("kfm", ("a.def",), ("order", "1"))
+    assert not hasattr(Slot(), "__dict__")
@@ -0,0 +1,25 @@
+from goselect.selectdef import SelectDef
+from goselect.validate import CASE, MISSING, Validator
+
+def make_game(tmp_path):
+    for rel in ("chars/kfm/kfm.def", "stages/a.def", "sound/Bgm.mp3"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    return Validator(str(tmp_path))
+
+def test_slot_references(tmp_path):
+    v = make_game(tmp_path)
+    doc = SelectDef.from_bytes(b"[Characters]\nkfm, stages/a.def, music=sound/Bgm.mp3\nKFM\nryu, stages/x.def\nrandomselect\n")
+    assert v.check_slot(doc.slots[0]) == []
+    assert [s for s, _ in v.check_slot(doc.slots[1])] == [CASE]
+    assert [s for s, _ in v.check_slot(doc.slots[2])] == [MISSING, MISSING]
+    assert v.check_slot(doc.slots[3]) == []
+
+def test_extra_stage_music(tmp_path):
+    v = make_game(tmp_path)
+    assert v.check_stage("stages/a.def, music=Bgm.mp3 80, order=2") == []
+    problems = v.check_stage("stages/a.def, music=sound/bgm.mp3, round1.music=x.ogg")
+    assert problems == [(CASE, "music case differs: sound/bgm.mp3 (on disk: sound/Bgm.mp3)"),
+                        (MISSING, "round1.music not found: x.ogg")]
+    assert [s for s, _ in v.check_stage("stages/b.def, final.music=sound/Bgm.mp3")] == [MISSING]